@@ -0,0 +1,458 @@
+"""扫雷性能基准测试
+
+运行方式（在项目根目录）：
+    python -m benchmarks.minesweeper_bench
+"""
+import random
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pygame
+
+import minesweeper_game
+import minesweeper_solver
+from minesweeper_core import DIFFICULTIES, check_candidate, count_neighbors, generate, three_bv
+from minesweeper_game import (BLACK, BLUE, CHUNK_SIZE, GRAY, LIGHT_GRAY, RED, WINDOW_HEIGHT, WINDOW_WIDTH,
+                              EndlessMinesweeper, Minesweeper)
+
+
+class RecursiveMinesweeper(Minesweeper):
+    """原来递归展开、每翻开一格就重新数一遍未翻开格子的实现，作为对照"""
+    def reveal_cell(self, x, y):
+        if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+            return
+
+        if self.revealed[x][y] or self.flagged[x][y]:
+            return
+
+        if self.first_click:
+            self.first_click = False
+            self.place_mines(x, y)
+
+        self.revealed[x][y] = True
+
+        if self.grid[x][y] == -1:
+            self.game_over = True
+            return
+
+        if self.grid[x][y] == 0:
+            for dx in [-1, 0, 1]:
+                for dy in [-1, 0, 1]:
+                    new_x, new_y = x + dx, y + dy
+                    if 0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size:
+                        self.reveal_cell(new_x, new_y)
+
+        unrevealed_count = int(np.count_nonzero(~self.revealed))
+        if unrevealed_count == self.mines_count:
+            self.win = True
+
+    def calculate_score(self):
+        pass
+
+
+class QuietMinesweeper(Minesweeper):
+    """不保存分数，避免基准测试写入最高分"""
+    def calculate_score(self):
+        pass
+
+
+class DirectDrawMinesweeper(QuietMinesweeper):
+    """原来每帧逐格画背景、边框和数字的实现，作为缓存棋盘的对照"""
+    def draw(self, screen):
+        for x in range(self.grid_size):
+            for y in range(self.grid_size):
+                rect = pygame.Rect(
+                    self.game_left + x * self.cell_size,
+                    self.game_top + y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size
+                )
+                if self.revealed[x][y]:
+                    pygame.draw.rect(screen, LIGHT_GRAY, rect)
+                else:
+                    pygame.draw.rect(screen, GRAY, rect)
+                pygame.draw.rect(screen, BLACK, rect, 1)
+                if self.revealed[x][y]:
+                    if self.grid[x][y] == -1:
+                        pygame.draw.circle(screen, RED, rect.center, self.cell_size // 3)
+                    elif self.grid[x][y] > 0:
+                        text = str(self.grid[x][y])
+                        text_rect = minesweeper_game.small_font.get_rect(text)
+                        minesweeper_game.small_font.render_to(screen, (rect.x + (self.cell_size - text_rect.width) // 2,
+                                                                       rect.y + (self.cell_size - text_rect.height) // 2),
+                                                              text, BLUE)
+                elif self.flagged[x][y]:
+                    pygame.draw.polygon(screen, RED, [
+                        (rect.x + self.cell_size // 4, rect.y + self.cell_size // 4),
+                        (rect.x + self.cell_size * 3 // 4, rect.y + self.cell_size // 2),
+                        (rect.x + self.cell_size // 4, rect.y + self.cell_size * 3 // 4)
+                    ])
+
+
+class ScanChordMinesweeper(QuietMinesweeper):
+    """双击时重新数一遍周围旗子的实现，作为增量维护旗子数的对照"""
+    def chord(self, x, y):
+        if not self.revealed[x, y] or self.grid[x, y] <= 0:
+            return False
+        around = (slice(max(x - 1, 0), x + 2), slice(max(y - 1, 0), y + 2))
+        if int(np.count_nonzero(self.flagged[around])) != self.grid[x, y]:
+            return False
+        opened = False
+        for nx in range(max(x - 1, 0), min(x + 2, self.grid_size)):
+            for ny in range(max(y - 1, 0), min(y + 2, self.grid_size)):
+                if not self.revealed[nx, ny] and not self.flagged[nx, ny]:
+                    self.reveal_cell(nx, ny)
+                    opened = True
+                    if self.game_over or self.win:
+                        return True
+        return opened
+
+
+def play(cls, seed, size=16, mines=40, moves=60):
+    """用固定种子随机插旗和点击，每步之后记录 (翻开状态, 是否失败, 是否胜利)"""
+    random.seed(seed)
+    game = cls(size, mines)
+    actions = random.Random(seed)
+    history = []
+    for _ in range(moves):
+        if game.game_over or game.win:
+            break
+        x, y = actions.randrange(size), actions.randrange(size)
+        # 只插旗不拔旗：拔旗后原来的实现不会再展开已经翻开的空白格，两者会有差别
+        if actions.random() < 0.15 and not game.flagged[x][y]:
+            game.toggle_flag(x, y)
+        else:
+            game.reveal_cell(x, y)
+        history.append((game.revealed.tobytes(), game.game_over, game.win))
+    return history
+
+
+def check_equivalence(games=300):
+    """两种实现在相同种子下每一步的结果都相同时返回对局数，否则抛出 AssertionError"""
+    for seed in range(games):
+        size, mines = (16, 40) if seed % 2 else (30, 60)
+        assert play(QuietMinesweeper, seed, size, mines) == play(RecursiveMinesweeper, seed, size, mines), \
+            f"种子 {seed} 的结果不一致"
+    return games
+
+
+def empty_board(cls, size):
+    """没有地雷的 size x size 棋盘，点一下就会翻开整个棋盘"""
+    game = cls(size, 0)
+    game.grid = np.zeros((size, size), dtype=np.int8)
+    game.first_click = False
+    game.index_zeros()
+    return game
+
+
+def bench_open(cls, size):
+    """在空棋盘中间点一下，返回翻开整个棋盘的秒数"""
+    game = empty_board(cls, size)
+    start = time.perf_counter()
+    game.reveal_cell(size // 2, size // 2)
+    elapsed = time.perf_counter() - start
+    assert game.win
+    return elapsed
+
+
+def list_place_mines(size, mines_count, first_x, first_y):
+    """原来基于列表的布雷和逐格数地雷，返回 grid"""
+    grid = [[0 for _ in range(size)] for _ in range(size)]
+    safe_cells = [(first_x + dx, first_y + dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1]
+                  if 0 <= first_x + dx < size and 0 <= first_y + dy < size]
+    all_positions = [(x, y) for x in range(size) for y in range(size)
+                     if (x, y) not in safe_cells]
+    for x, y in random.sample(all_positions, mines_count):
+        grid[x][y] = -1
+    for x in range(size):
+        for y in range(size):
+            if grid[x][y] != -1:
+                count = 0
+                for dx in [-1, 0, 1]:
+                    for dy in [-1, 0, 1]:
+                        if 0 <= x + dx < size and 0 <= y + dy < size:
+                            if grid[x + dx][y + dy] == -1:
+                                count += 1
+                grid[x][y] = count
+    return grid
+
+
+def check_generation(boards=50):
+    """NumPy 布雷的棋盘与按原来规则逐格数出来的结果一致、第一次点击周围没有地雷时返回棋盘数"""
+    for seed in range(boards):
+        size = 5 + seed % 30
+        mines = (size * size - 9) * (seed % 7) // 8
+        game = QuietMinesweeper(size, mines, seed)
+        x, y = seed % size, seed * 7 % size
+        game.place_mines(x, y)
+        grid = game.grid
+        assert int(np.count_nonzero(grid == -1)) == mines, f"种子 {seed} 的地雷数不对"
+        assert (grid[max(x - 1, 0):x + 2, max(y - 1, 0):y + 2] != -1).all(), f"种子 {seed} 的第一次点击周围有地雷"
+        for i in range(size):
+            for j in range(size):
+                if grid[i, j] != -1:
+                    expected = int(np.count_nonzero(grid[max(i - 1, 0):i + 2, max(j - 1, 0):j + 2] == -1))
+                    assert grid[i, j] == expected, f"种子 {seed} 的 ({i}, {j}) 周围地雷数不对"
+    return boards
+
+
+def bench_generate(size, density=0.156, old=False):
+    """布雷并计算周围地雷数（地雷比例与 16x16/40 相同），返回秒数"""
+    mines = int(size * size * density)
+    start = time.perf_counter()
+    if old:
+        list_place_mines(size, mines, size // 2, size // 2)
+    else:
+        QuietMinesweeper(size, mines, 0).place_mines(size // 2, size // 2)
+    return time.perf_counter() - start
+
+
+def choice_generate(seed, size, mines_count, first_x, first_y):
+    """原来用 rng.choice 不放回抽样的布雷，抽样数较多时 NumPy 会生成整个排列，作为内存占用的对照"""
+    safe = sorted((first_x + dx) * size + first_y + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                  if 0 <= first_x + dx < size and 0 <= first_y + dy < size)
+    picks = np.random.default_rng(seed).choice(size * size - len(safe), mines_count, replace=False)
+    for cell in safe:
+        picks[picks >= cell] += 1
+    mines = np.zeros(size * size, dtype=bool)
+    mines[picks] = True
+    return count_neighbors(mines.reshape(size, size))
+
+
+def bench_generate_memory(size, density=0.15, old=False):
+    """布雷并计算周围地雷数时 tracemalloc 记录的内存峰值（MB）"""
+    mines = int(size * size * density)
+    tracemalloc.start()
+    (choice_generate if old else generate)(0, size, mines, size // 2, size // 2)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def check_chording(games=300, size=16, mines=40, moves=200):
+    """随机插旗、点击和双击，两种实现每一步的结果相同、旗子数与逐格数出来的一致时返回对局数"""
+    for seed in range(games):
+        counted, scanned = QuietMinesweeper(size, mines, seed), ScanChordMinesweeper(size, mines, seed)
+        actions = random.Random(seed)
+        for _ in range(moves):
+            if counted.game_over or counted.win:
+                break
+            x, y = actions.randrange(size), actions.randrange(size)
+            action = actions.random()
+            # 多数时候把旗插在真正的地雷上、在翻开的数字上双击，这样双击才经常能翻开格子
+            if not counted.first_click and actions.random() < 0.8:
+                targets = np.argwhere(counted.grid == -1 if action < 0.3 else counted.revealed & (counted.grid > 0))
+                if len(targets):
+                    x, y = targets[actions.randrange(len(targets))].tolist()
+            for game in (counted, scanned):
+                if action < 0.3:
+                    game.toggle_flag(x, y)
+                elif action < 0.6:
+                    game.chord(x, y)
+                else:
+                    game.reveal_cell(x, y)
+            assert (counted.revealed == scanned.revealed).all() and counted.game_over == scanned.game_over, \
+                f"种子 {seed} 的结果不一致"
+        flags = counted.flagged.astype(np.int8)
+        padded = np.pad(flags, 1)
+        around = sum(padded[dx:dx + size, dy:dy + size] for dx in (0, 1, 2) for dy in (0, 1, 2)) - flags
+        assert (counted.flag_counts == around).all(), f"种子 {seed} 的旗子数不对"
+    return games
+
+
+def bench_chord(cls, calls=20000):
+    """在所有数字上尝试双击（旗子数不够，不会翻开格子），返回每次判断的微秒数"""
+    game = cls(16, 40, 0)
+    game.reveal_cell(8, 8)
+    numbers = np.argwhere(game.revealed & (game.grid > 0)).tolist()
+    start = time.perf_counter()
+    for k in range(calls):
+        game.chord(*numbers[k % len(numbers)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def check_drawing(games=30, size=16, mines=40, moves=40):
+    """同一局分别用缓存棋盘和逐格绘制，每步之后画出来的像素都相同时返回对局数
+
+    每局一直用同一个缓存棋盘，检查的是只重画状态变了的格子没有漏掉什么。踩到地雷之后
+    缓存棋盘会显示所有地雷，与原来不同，所以只比较到游戏结束之前。
+    """
+    cached_screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    direct_screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    for seed in range(games):
+        cached, direct = QuietMinesweeper(size, mines, seed), DirectDrawMinesweeper(size, mines, seed)
+        actions = random.Random(seed)
+        for _ in range(moves):
+            x, y = actions.randrange(size), actions.randrange(size)
+            flag = actions.random() < 0.2
+            for game in (cached, direct):
+                if flag:
+                    game.toggle_flag(x, y)
+                else:
+                    game.reveal_cell(x, y)
+            if cached.game_over or cached.win:
+                break
+            cached.draw(cached_screen)
+            direct.draw(direct_screen)
+            assert pygame.image.tostring(cached_screen, "RGB") == pygame.image.tostring(direct_screen, "RGB"), \
+                f"种子 {seed} 画出来的棋盘不一致"
+    return games
+
+
+def bench_draw(cls, size, frames=200):
+    """翻开一部分、插了一些旗的 size x size 棋盘不再变化时，返回每帧绘制的毫秒数"""
+    game = cls(size, size * size // 6, 0)
+    game.reveal_cell(size // 2, size // 2)
+    for x, y in np.argwhere(game.grid == -1)[::3].tolist():
+        game.toggle_flag(x, y)
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    game.draw(screen)
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.draw(screen)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def bench_endless(chunks=2000):
+    """无尽模式在相距很远的位置各插一面旗，返回 (每个新区块的毫秒数, 每个区块的字节数)"""
+    game = EndlessMinesweeper(seed=0)
+    start = time.perf_counter()
+    for k in range(chunks):
+        game.toggle_flag(k * CHUNK_SIZE * 1000, -k * CHUNK_SIZE * 1000)
+    elapsed = time.perf_counter() - start
+    chunk = next(iter(game.chunks.values()))
+    size = chunk.grid.nbytes + chunk.revealed.nbytes + chunk.flagged.nbytes
+    return elapsed / chunks * 1000, size
+
+
+def bench_solver(size=16, mines=40, games=200):
+    """求解器自动玩若干局，检查推出的安全格和地雷都正确，返回 (胜率, 每步分析的平均毫秒数, 中位数)"""
+    wins = 0
+    times = []
+    for seed in range(games):
+        game = QuietMinesweeper(size, mines, seed)
+        while not (game.game_over or game.win):
+            if not game.first_click:
+                start = time.perf_counter()
+                analysis = minesweeper_solver.analyze(game.grid, game.revealed, game.mines_count)
+                times.append(time.perf_counter() - start)
+                assert all(game.grid[cell] != -1 for cell in analysis.safe), f"种子 {seed} 推出的安全格是地雷"
+                assert all(game.grid[cell] == -1 for cell in analysis.mines), f"种子 {seed} 推出的地雷不对"
+            minesweeper_solver.step(game)
+        wins += game.win
+    return wins / games, sum(times) / len(times) * 1000, sorted(times)[len(times) // 2] * 1000
+
+
+def flood_three_bv(grid):
+    """逐格广度优先遍历数 3BV：每片空白格连同边缘算一下，剩下没被覆盖的数字格各算一下"""
+    width, height = grid.shape
+    covered = np.zeros(grid.shape, dtype=bool)
+    clicks = 0
+    for x in range(width):
+        for y in range(height):
+            if grid[x, y] != 0 or covered[x, y]:
+                continue
+            clicks += 1
+            covered[x, y] = True
+            queue = deque([(x, y)])
+            while queue:
+                cx, cy = queue.popleft()
+                for nx in range(max(cx - 1, 0), min(cx + 2, width)):
+                    for ny in range(max(cy - 1, 0), min(cy + 2, height)):
+                        if not covered[nx, ny]:
+                            covered[nx, ny] = True
+                            if grid[nx, ny] == 0:
+                                queue.append((nx, ny))
+    return clicks + int(np.count_nonzero((grid > 0) & ~covered))
+
+
+def check_three_bv(boards=300):
+    """按段合并的 3BV 与逐格遍历的结果一致时返回棋盘数"""
+    for seed in range(boards):
+        size = 3 + seed % 40
+        mines = (size * size - 9) * (seed % 9) // 10
+        grid = generate(seed, size, mines, seed % size, seed * 7 % size)
+        assert three_bv(grid) == flood_three_bv(grid), f"种子 {seed} 的 3BV 不一致"
+    return boards
+
+
+def bench_three_bv(size, density=0.156, old=False):
+    """地雷比例与 16x16/40 相同的棋盘上计算 3BV，返回秒数"""
+    grid = generate(0, size, int(size * size * density), size // 2, size // 2)
+    start = time.perf_counter()
+    flood_three_bv(grid) if old else three_bv(grid)
+    return time.perf_counter() - start
+
+
+def bench_no_guess(difficulty, candidates):
+    """检查一批候选种子，通过的棋盘再用游戏本身开局、让求解器只靠推理下完，返回 (通过比例, 每个候选的毫秒数)"""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    boards = [check_candidate((difficulty.size, difficulty.mines, rng.getrandbits(64))) for _ in range(candidates)]
+    elapsed = time.perf_counter() - start
+    boards = [board for board in boards if board is not None]
+    for seed, x, y in boards:
+        game = QuietMinesweeper(difficulty.size, difficulty.mines, seed, start=(x, y))
+        moves = minesweeper_solver.solve(game)
+        assert game.win and all(move.kind != "guess" for move in moves), f"种子 {seed} 不是无猜棋盘"
+    return len(boards) / candidates, elapsed / candidates * 1000
+
+
+def main():
+    # 字体由 minesweeper_game.main() 创建，这里不打开窗口，单独初始化
+    pygame.init()
+    pygame.freetype.init()
+    minesweeper_game.game_font, minesweeper_game.small_font = minesweeper_game.load_fonts()
+
+    print(f"逐段展开与递归实现逐步对比：{check_equivalence()} 局结果完全一致")
+    print(f"{'棋盘':>10} {'递归':>10} {'逐段广度优先':>10}")
+    for size in (20, 30, 200, 2000):
+        old = f"{bench_open(RecursiveMinesweeper, size) * 1000:.1f}ms" if size <= 30 else "超出递归深度"
+        new = bench_open(QuietMinesweeper, size) * 1000
+        print(f"{f'{size}x{size}':>10} {old:>10} {new:>10.1f}ms")
+
+    print(f"NumPy 布雷与逐格计算对比：{check_generation()} 个棋盘结果正确")
+    print(f"{'布雷':>10} {'列表':>10} {'NumPy':>10}")
+    for size in (100, 300, 1000, 5000):
+        old = f"{bench_generate(size, old=True) * 1000:.0f}ms" if size <= 300 else "-"
+        new = bench_generate(size) * 1000
+        print(f"{f'{size}x{size}':>10} {old:>10} {new:>10.0f}ms")
+    print(f"{'布雷内存峰值':>10} {'rng.choice':>10} {'分批置位':>10}")
+    for size in (1000, 5000):
+        old, new = bench_generate_memory(size, old=True), bench_generate_memory(size)
+        print(f"{f'{size}x{size}':>10} {old:>8.0f}MB {new:>8.0f}MB")
+
+    for size, mines, games in ((9, 10, 200), (16, 40, 200), (30, 99, 50)):
+        rate, mean, median = bench_solver(size, mines, games)
+        print(f"求解器 {size}x{size}/{mines}：胜率 {rate:.0%}，每步分析平均 {mean:.2f}ms，中位数 {median:.2f}ms")
+
+    for difficulty, candidates in zip(DIFFICULTIES, (200, 200, 100)):
+        rate, ms = bench_no_guess(difficulty, candidates)
+        print(f"无猜棋盘 {difficulty.label} {difficulty.size}x{difficulty.size}/{difficulty.mines}："
+              f"{rate:.0%} 的候选通过，检查一个候选 {ms:.1f}ms，平均 {ms / max(rate, 1e-9):.0f}ms 得到一个棋盘")
+
+    print(f"按段合并与逐格遍历计算 3BV 对比：{check_three_bv()} 个棋盘结果一致")
+    print(f"{'3BV':>10} {'逐格遍历':>10} {'按段合并':>10}")
+    for size in (100, 300, 1000, 5000):
+        old = f"{bench_three_bv(size, old=True) * 1000:.0f}ms" if size <= 300 else "-"
+        new = bench_three_bv(size) * 1000
+        print(f"{f'{size}x{size}':>10} {old:>10} {new:>10.1f}ms")
+
+    print(f"增量旗子数与逐格数旗子对比：{check_chording()} 局双击结果一致")
+    old, new = bench_chord(ScanChordMinesweeper), bench_chord(QuietMinesweeper)
+    print(f"双击判断：逐格数旗子 {old:.2f}us，增量旗子数 {new:.2f}us")
+
+    print(f"缓存棋盘与逐格绘制对比：{check_drawing()} 局每一步画出来都相同")
+    print(f"{'绘制一帧':>10} {'逐格绘制':>10} {'缓存棋盘':>10}")
+    for size in (9, 16, 24, 120):
+        old, new = bench_draw(DirectDrawMinesweeper, size), bench_draw(QuietMinesweeper, size)
+        print(f"{f'{size}x{size}':>10} {old:>8.2f}ms {new:>8.3f}ms")
+
+    ms, size = bench_endless()
+    print(f"无尽模式：生成一个新区块 {ms:.2f}ms，每个区块的状态 {size} 字节")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""分数保存性能与可靠性基准测试
+
+运行方式（在项目根目录）：
+    python -m benchmarks.scores_bench
+"""
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from scores import DEFAULT_SCORES, ScoreStore
+
+
+def old_load_scores(path):
+    """原来每次都从磁盘解析整个 JSON 文件的实现，作为对照"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except:
+            return dict(DEFAULT_SCORES)
+    return dict(DEFAULT_SCORES)
+
+
+def old_save_score(path, game_name, score):
+    """原来先读一遍、破纪录时原地重写整个文件的实现"""
+    scores = old_load_scores(path)
+    if score > scores.get(game_name, 0):
+        scores[game_name] = score
+        with open(path, 'w') as f:
+            json.dump(scores, f)
+
+
+def store_in(directory, compact_entries=64):
+    return ScoreStore(os.path.join(directory, "high_scores.json"), os.path.join(directory, "high_scores.journal"),
+                      os.path.join(directory, "high_scores.lock"), compact_entries)
+
+
+def seed_scores(path, games=20):
+    """写一个有若干个游戏最高分的快照"""
+    with open(path, 'w') as f:
+        json.dump({**DEFAULT_SCORES, **{f"game{k}": k * 100 for k in range(games)}}, f)
+
+
+def bench_load(calls=5000):
+    """连续调用 load_scores，返回 (原来, 内存缓存) 每次的微秒数"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = store_in(directory)
+        seed_scores(store.path)
+        start = time.perf_counter()
+        for _ in range(calls):
+            old_load_scores(store.path)
+        old = (time.perf_counter() - start) / calls * 1e6
+        start = time.perf_counter()
+        for _ in range(calls):
+            dict(store.load())
+        new = (time.perf_counter() - start) / calls * 1e6
+    return old, new
+
+
+def bench_save(record, calls=2000):
+    """连续保存分数，record 为真时每次都破纪录，返回 (原来, 日志) 每次的微秒数"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = store_in(directory)
+        seed_scores(store.path)
+        store.load()
+        results = []
+        for save in (lambda k: old_save_score(store.path, "snake", k),
+                     lambda k: store.save("snake", k)):
+            start = time.perf_counter()
+            for k in range(calls):
+                save(1000 + k if record else 0)
+            results.append((time.perf_counter() - start) / calls * 1e6)
+        store.close()
+    return tuple(results)
+
+
+def check_crash():
+    """模拟写到一半时崩溃，返回 (原来保留下来的分数个数, 日志保留下来的分数个数)"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = store_in(directory)
+        seed_scores(store.path)
+        expected = old_load_scores(store.path)
+        # 原来的实现：以 'w' 打开时文件已经被清空，写了一部分就崩溃
+        with open(store.path, 'r') as f:
+            data = f.read()
+        with open(store.path, 'w') as f:
+            f.write(data[:len(data) // 2])
+        old = sum(old_load_scores(store.path).get(name) == value for name, value in expected.items())
+        # 日志：快照不动，只在日志末尾留下半行
+        seed_scores(store.path)
+        with open(store.journal_path, 'wb') as f:
+            f.write(b'{"game": "snake", "sco')
+        new_scores = store_in(directory).load()
+        new = sum(new_scores.get(name) == value for name, value in expected.items())
+    return old, new, len(expected)
+
+
+def _save_task(args):
+    """子进程：随机保存一批分数，返回每个游戏自己存过的最高分"""
+    directory, seed, saves = args
+    store = store_in(directory, compact_entries=8)  # 频繁合并，检查合并时其他进程的日志不会丢
+    rng = random.Random(seed)
+    best = {}
+    for _ in range(saves):
+        name, score = rng.choice(("snake", "tetris", "minesweeper", "a", "b")), rng.randrange(100000)
+        store.save(name, score)
+        best[name] = max(best.get(name, 0), score)
+    store.close()
+    return best
+
+
+def check_concurrent(processes=8, saves=300):
+    """多个进程同时保存，最后读出的每个最高分都等于所有进程存过的最大值时返回进程数"""
+    with tempfile.TemporaryDirectory() as directory:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_save_task, [(directory, seed, saves) for seed in range(processes)])
+            pool.close()
+            pool.join()
+        expected = {}
+        for best in results:
+            for name, score in best.items():
+                expected[name] = max(expected.get(name, 0), score)
+        loaded = store_in(directory).load()
+        assert all(loaded[name] == score for name, score in expected.items()), f"{loaded} != {expected}"
+    return processes
+
+
+def main():
+    print(f"{check_concurrent()} 个进程同时保存（每 8 条合并一次），最高分一个不少")
+    old, new, total = check_crash()
+    print(f"写到一半时崩溃：原来的实现保留 {old}/{total} 个最高分，日志保留 {new}/{total} 个")
+    old, new = bench_load()
+    print(f"load_scores：原来 {old:.1f}us，内存缓存 {new:.2f}us")
+    old, new = bench_save(record=False)
+    print(f"save_score（没破纪录）：原来 {old:.1f}us，日志 {new:.2f}us")
+    old, new = bench_save(record=True)
+    print(f"save_score（每次破纪录）：原来 {old:.1f}us，日志 {new:.1f}us（不 fsync / 每秒最多 fsync 一次）")
+
+
+if __name__ == '__main__':
+    main()
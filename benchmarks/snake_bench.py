@@ -0,0 +1,303 @@
+"""贪吃蛇性能基准测试
+
+运行方式（在项目根目录）：
+    python -m benchmarks.snake_bench
+"""
+import random
+import time
+from collections import deque
+
+from snake_ai import Autopilot
+from snake_core import (DIRECTIONS, RIGHT, Arena, FreeCells, Food, Snake, SnakeGame, arena_bot,
+                        greedy_policy, run_games)
+
+
+def bench_update(length, ticks=100000):
+    """测量给定蛇长下每次 update 的平均耗时（纳秒）"""
+    # 单行的环形棋盘比蛇长略宽，蛇一直向右走永远追不上自己的尾巴
+    snake = Snake(grid_width=length + 2, grid_height=1)
+    snake.length = length
+    for _ in range(length - 1):
+        snake.update()
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        snake.update()
+    elapsed = time.perf_counter() - start
+    return elapsed / ticks * 1e9
+
+
+def bench_food_spawn(width=200, height=200, samples=20000):
+    """逐步填满棋盘，比较空闲格子索引与拒绝采样的生成耗时（纳秒）"""
+    snake = Snake(grid_width=width, grid_height=height)
+    free = snake.free_cells
+    food = Food(snake)
+    size = width * height
+    results = []
+    for coverage in (0.5, 0.9, 0.99, 0.999):
+        # 直接占用随机空闲格子来模拟越来越长的蛇
+        while free.count > size * (1 - coverage):
+            free.remove(free.choice())
+
+        start = time.perf_counter()
+        for _ in range(samples):
+            food.randomize_position(snake)
+        indexed = (time.perf_counter() - start) / samples * 1e9
+
+        start = time.perf_counter()
+        for _ in range(samples):
+            while random.randrange(size) not in free:
+                pass
+        rejection = (time.perf_counter() - start) / samples * 1e9
+        results.append((coverage, indexed, rejection))
+    return results
+
+
+def bench_batch(games=1000, max_steps=5000):
+    """无界面批量运行示例机器人，返回 (每秒步数, 平均得分)"""
+    start = time.perf_counter()
+    results = run_games(greedy_policy, range(games), max_steps=max_steps)
+    elapsed = time.perf_counter() - start
+    steps = sum(r["steps"] for r in results)
+    return steps / elapsed, sum(r["score"] for r in results) / games
+
+
+def bench_vec(num_boards=4096, steps=50, repeats=20):
+    """比较批量环境与逐个调用 Snake.update 的吞吐量（棋盘步/秒）
+
+    两边交替各测 repeats 轮，取各自最快的一轮，减少机器负载波动对比值的影响。
+    """
+    import numpy as np
+    from snake_vec import VecSnakeEnv
+
+    env = VecSnakeEnv(num_boards, seed=0)
+    actions = np.random.default_rng(0).integers(-1, 4, (steps, num_boards))
+    snakes = [Snake() for _ in range(num_boards)]
+    vec_time = loop_time = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(steps):
+            env.step(actions[i])
+        vec_time = min(vec_time, (time.perf_counter() - start) / steps)
+
+        start = time.perf_counter()
+        for snake in snakes:
+            snake.update()
+        loop_time = min(loop_time, time.perf_counter() - start)
+    return num_boards / vec_time, num_boards / loop_time
+
+
+def bench_autopilot_decision(size=100, length=5000, decisions=20000):
+    """在 size x size 棋盘上摆一条沿哈密顿环的长蛇，测量每秒决策次数"""
+    pilot = Autopilot(size, size)
+    game = SnakeGame(size, size, seed=0)
+    snake = game.snake
+    # 蛇头在环上第 length-1 个格子，蛇身沿环向后排列
+    cells = [pilot.path[i] for i in range(length - 1, -1, -1)]
+    snake.positions = deque((c % size, c // size) for c in cells)
+    snake.occupied = set(snake.positions)
+    snake.free_cells = FreeCells(size * size)
+    for c in cells:
+        snake.free_cells.remove(c)
+    snake.length = length
+    game.food.randomize_position(snake)
+
+    start = time.perf_counter()
+    for _ in range(decisions):
+        pilot(game)
+    return decisions / (time.perf_counter() - start)
+
+
+def bench_autopilot_fill(size=20, games=10):
+    """自动驾驶从头玩到填满棋盘，返回 (平均得分, 平均步数)"""
+    results = run_games(Autopilot(size, size), range(games), max_steps=10**7,
+                        grid_width=size, grid_height=size)
+    return (sum(r["score"] for r in results) / games,
+            sum(r["steps"] for r in results) / games)
+
+
+def bench_render(size=10000, length=1000000, frames=50):
+    """10000x10000 棋盘上摆一条蛇形往返的长蛇，比较视口绘制与逐节绘制的单帧耗时（毫秒）"""
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from snake_game import BLOCK_SIZE, Camera, draw_snake
+
+    # 只需要蛇身位置和占用集合，在左上角 1000 列宽的区域里往返铺满
+    snake = Snake(size, size)
+    span = 1000
+    snake.positions = deque((x if y % 2 == 0 else span - 1 - x, y)
+                            for y in range(length // span) for x in range(span))
+    snake.occupied = set(snake.positions)
+    surface = pygame.Surface((800, 600))
+    camera = Camera(size, size)
+
+    start = time.perf_counter()
+    for i in range(frames):
+        camera.update(snake.positions[i * 997 % length])
+        draw_snake(surface, snake, (0, 0, 0), camera)
+    viewport = (time.perf_counter() - start) / frames * 1e3
+
+    # 原来的做法：不管是否可见，每一节都画一次
+    start = time.perf_counter()
+    for p in snake.positions:
+        pygame.draw.rect(surface, (0, 0, 0), (p[0]*BLOCK_SIZE, p[1]*BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+    every_segment = (time.perf_counter() - start) * 1e3
+    return viewport, every_segment
+
+
+def bench_arena(counts=(100, 250, 500), size=500, ticks=100):
+    """size x size 棋盘上 n 条机器人蛇，返回每个 n 的 (每 tick 毫秒, 逐条比较蛇身的碰撞检测毫秒)"""
+    results = []
+    for n in counts:
+        arena = Arena(size, size, food_count=2000, seed=0)
+        for _ in range(n):
+            arena.add_snake()
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            arena.step({i: arena_bot(arena, snake, rng) for i, snake in arena.snakes.items()})
+        per_tick = (time.perf_counter() - start) / ticks * 1e3
+
+        # 对照：不用共享格子表，每个蛇头和其他所有蛇的蛇身逐一比较（只统计碰撞检测本身）
+        snakes = list(arena.snakes.values())
+        start = time.perf_counter()
+        for snake in snakes:
+            head = snake.positions[0]
+            any(head in other.positions for other in snakes if other is not snake)
+        pairwise = (time.perf_counter() - start) * 1e3
+        results.append((n, len(snakes), per_tick, pairwise))
+    return results
+
+
+def check_prediction(turns=20):
+    """本机服务器手动 tick：转向发出后、服务器确认前，客户端预测的蛇头已经朝新方向走了一格；
+    确认后预测与服务器的蛇身一致。全部通过时返回检查过的转向次数
+    """
+    import asyncio
+    from snake_net import GameClient, GameServer
+
+    async def run():
+        server = GameServer(seed=0)
+        port = await server.start('127.0.0.1', 0)
+        client = GameClient()
+        await client.connect('127.0.0.1', port)
+        rng = random.Random(0)
+        checked = 0
+        for turn in range(turns):
+            server.tick()
+            await client.receive()
+            if client.snake_id is None:
+                continue  # 蛇刚死，下一个 tick 才复活
+            current = client.direction or RIGHT
+            direction = rng.choice([d for d in DIRECTIONS if d not in (current, (-current[0], -current[1]))])
+            (x, y), ticks = client.snakes[client.snake_id][0], client.ticks
+            assert client.send_direction(direction), f"第 {turn} 次转向没有发出"
+            expected = ((x + direction[0]) % client.grid_width, (y + direction[1]) % client.grid_height)
+            assert client.pending and client.ticks == ticks, "转向在检查前已被确认"
+            assert client.predicted[0] == expected, f"第 {turn} 次转向在确认前没有显示"
+            await asyncio.sleep(0.02)  # 让服务器读到转向
+            server.tick()
+            await client.receive()
+            assert not client.pending, f"第 {turn} 次转向没有被确认"
+            if client.snake_id is not None:
+                assert client.predicted == client.snakes[client.snake_id], f"第 {turn} 次确认后预测与服务器不一致"
+            checked += 1
+        client.close()
+        server.server.close()
+        await server.server.wait_closed()
+        await asyncio.sleep(0.1)  # 让服务器处理完断开的连接
+        return checked
+
+    return asyncio.run(run())
+
+
+def bench_server(players=64, seconds=5.0):
+    """在本机启动服务器和 players 个机器人客户端
+
+    返回 (实际 tick/秒, 平均 tick 耗时(毫秒), 最大 tick 耗时(毫秒), 每个客户端每 tick 收到的字节数)。
+    客户端与服务器在同一个进程里运行，tick 耗时只统计服务器自身的处理。
+    """
+    import asyncio
+    from snake_net import GameClient, GameServer
+
+    async def bot(client, rng):
+        while True:
+            await client.receive()
+            if rng.random() < 0.2:
+                client.send_direction(rng.choice(DIRECTIONS))
+
+    async def run():
+        server = GameServer(seed=0)
+        port = await server.start('127.0.0.1', 0)
+        clients = [GameClient() for _ in range(players)]
+        for client in clients:
+            await client.connect('127.0.0.1', port)
+        bots = [asyncio.ensure_future(bot(c, random.Random(i))) for i, c in enumerate(clients)]
+        ticker = asyncio.ensure_future(server.run())
+        await asyncio.sleep(0.5)  # 预热
+        ticks = server.arena.ticks
+        received = sum(c.bytes_received for c in clients)
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        elapsed = time.perf_counter() - start
+        ticks = server.arena.ticks - ticks
+        received = sum(c.bytes_received for c in clients) - received
+        times = list(server.tick_times)[-ticks:]
+        ticker.cancel()
+        for task in bots:
+            task.cancel()
+        for client in clients:
+            client.close()
+        server.server.close()
+        await server.server.wait_closed()
+        await asyncio.sleep(0.1)  # 让服务器处理完断开的连接
+        return (ticks / elapsed, sum(times) / len(times) * 1e3, max(times) * 1e3,
+                received / ticks / players)
+
+    return asyncio.run(run())
+
+
+def main():
+    print("蛇身移动 + 自碰撞检测")
+    print(f"{'蛇长':>10} {'每次更新(ns)':>14}")
+    for length in (10, 100, 1000, 10000, 100000):
+        print(f"{length:>10} {bench_update(length):>14.0f}")
+
+    print()
+    print("200x200 棋盘食物生成")
+    print(f"{'覆盖率':>8} {'空闲索引(ns)':>14} {'拒绝采样(ns)':>14}")
+    for coverage, indexed, rejection in bench_food_spawn():
+        print(f"{coverage:>8.1%} {indexed:>14.0f} {rejection:>14.0f}")
+
+    print()
+    steps_per_second, average_score = bench_batch()
+    print(f"无界面批量运行 1000 局：{steps_per_second:,.0f} 步/秒，平均得分 {average_score:.1f}")
+
+    rate = bench_autopilot_decision()
+    print(f"自动驾驶 100x100 棋盘、蛇长 5000：{rate:,.0f} 次决策/秒（{1e6 / rate:.1f} 微秒/次）")
+    average_score, average_steps = bench_autopilot_fill()
+    print(f"自动驾驶填满 20x20 棋盘：平均得分 {average_score:.0f}，平均 {average_steps:,.0f} 步")
+
+    vec_rate, loop_rate = bench_vec()
+    print(f"4096 个棋盘批量 step：{vec_rate:,.0f} 棋盘步/秒，"
+          f"Python 循环 Snake.update：{loop_rate:,.0f} 步/秒（{vec_rate / loop_rate:.0f} 倍）")
+
+    viewport, every_segment = bench_render()
+    print(f"10000x10000 棋盘、蛇长 1,000,000 单帧绘制：视口 {viewport:.2f} 毫秒，"
+          f"逐节绘制 {every_segment:.0f} 毫秒")
+
+    print()
+    print("500x500 大逃杀（机器人决策 + 移动 + 碰撞）")
+    print(f"{'蛇数':>6} {'存活':>6} {'每 tick(ms)':>12} {'逐条比较碰撞(ms)':>18}")
+    for n, alive, per_tick, pairwise in bench_arena():
+        print(f"{n:>6} {alive:>6} {per_tick:>12.2f} {pairwise:>18.2f}")
+
+    print(f"多人客户端预测：{check_prediction()} 次转向在服务器确认前就已显示")
+    rate, average, worst, size = bench_server()
+    print(f"多人服务器 64 个本机客户端：{rate:.1f} tick/秒，每 tick 平均 {average:.2f} 毫秒、"
+          f"最长 {worst:.2f} 毫秒，每个客户端每 tick {size:.0f} 字节")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""俄罗斯方块性能基准测试
+
+运行方式（在项目根目录）：
+    python -m benchmarks.tetris_bench
+"""
+import copy
+import random
+import time
+
+from tetris_core import SHAPES, WALL, PieceGenerator, SnapshotRing, Tetris, run_games
+
+
+class ListTetris(Tetris):
+    """原来基于二维列表逐格检查的实现，作为位掩码版本的对照"""
+    def intersects(self) -> bool:
+        for i in range(4):
+            for j in range(4):
+                if i * 4 + j in self.figure.image():
+                    if (i + self.figure.y > self.height - 1 or
+                        j + self.figure.x > self.width - 1 or
+                        j + self.figure.x < 0 or
+                        self.field[i + self.figure.y][j + self.figure.x] > 0):
+                        return True
+        return False
+
+    def freeze(self) -> None:
+        for i in range(4):
+            for j in range(4):
+                if i * 4 + j in self.figure.image():
+                    self.field[i + self.figure.y][j + self.figure.x] = self.figure.color
+        self.break_lines()
+        self.new_figure()
+        if self.intersects():
+            self.state = "gameover"
+
+    def go_space(self) -> None:
+        while not self.intersects():
+            self.figure.y += 1
+        self.figure.y -= 1
+        self.freeze()
+
+    def break_lines(self) -> None:
+        lines = 0
+        for i in range(1, self.height):
+            zeros = 0
+            for j in range(self.width):
+                if self.field[i][j] == 0:
+                    zeros += 1
+            if zeros == 0:
+                lines += 1
+                for i2 in range(i, 1, -1):
+                    for j in range(self.width):
+                        self.field[i2][j] = self.field[i2-1][j]
+        self.score += lines ** 2
+        self.level = self.score // 10 + 1
+
+
+def landing_depth(game, rotation, x):
+    """方块以给定旋转和横坐标直接落下后的最低行号，放不下时返回 -1"""
+    figure = game.figure
+    saved = figure.rotation, figure.x, figure.y
+    figure.rotation, figure.x = rotation, x
+    depth = -1
+    if not game.intersects():
+        while not game.intersects():
+            figure.y += 1
+        figure.y -= 1
+        depth = figure.y + figure.piece().bottom
+    figure.rotation, figure.x, figure.y = saved
+    return depth
+
+
+def play(cls, seed, pieces=300):
+    """用固定种子玩一局，每步之后记录 (棋盘颜色, 分数, 状态)
+
+    大部分方块放到能落得最深的位置，以便频繁消行；其余时候随机操作。
+    """
+    game = cls(20, 10, PieceGenerator(seed))
+    actions = random.Random(seed)
+    history = []
+
+    def record():
+        history.append(([row[:] for row in game.field], game.score, game.state))
+
+    for _ in range(pieces):
+        if game.state == "gameover":
+            break
+        if actions.random() < 0.2:
+            for _ in range(actions.randrange(1, 4)):
+                action = actions.randrange(4)
+                if action == 0:
+                    game.rotate()
+                elif action in (1, 2):
+                    game.go_side(action * 2 - 3)
+                else:
+                    game.go_down()
+                record()
+        else:
+            figure = game.figure
+            options = [(landing_depth(game, r, x), actions.random(), r, x)
+                       for r in range(len(SHAPES[figure.type])) for x in range(-2, 10)]
+            _, _, rotation, x = max(options)
+            while figure.rotation != rotation:
+                before = figure.rotation
+                game.rotate()
+                record()
+                if figure.rotation == before:
+                    break
+            while figure.x != x and game.figure is figure:
+                before = figure.x
+                game.go_side(1 if x > figure.x else -1)
+                record()
+                if figure.x == before:
+                    break
+        if game.state != "gameover":
+            game.go_space()
+            record()
+    return history
+
+
+def check_equivalence(games=200):
+    """两种实现在相同种子下每一步的结果都相同时返回对局数，否则抛出 AssertionError
+
+    另外在任意行（包括第 0、1 行）全满的棋盘上直接比较 break_lines。
+    """
+    for seed in range(games):
+        assert play(Tetris, seed) == play(ListTetris, seed), f"种子 {seed} 的结果不一致"
+        full_rows = random.Random(seed).sample(range(20), seed % 6)
+        new, old = filled_game(Tetris, seed, full_rows, 0), filled_game(ListTetris, seed, full_rows, 0)
+        new.break_lines()
+        old.break_lines()
+        assert (new.field, new.score) == (old.field, old.score), f"种子 {seed} 的消行结果不一致"
+    return games
+
+
+def filled_game(cls, seed=0, full_rows=range(16, 20), top=8):
+    """构造一个从 top 行往下随机堆放、full_rows 中各行全满的棋盘"""
+    game = cls(20, 10, PieceGenerator(seed))
+    rng = random.Random(seed)
+    for i in range(top, 20):
+        for j in range(10):
+            if rng.random() < 0.6:
+                game.field[i][j] = rng.randint(1, 7)
+    for i in full_rows:
+        game.field[i] = [rng.randint(1, 7) for _ in range(10)]
+    for i, row in enumerate(game.field):
+        game.rows[i] = game.empty_row | sum(1 << (j + WALL) for j, c in enumerate(row) if c)
+    game.update_skyline()
+    return game
+
+
+def bench_intersects(cls, calls=100000):
+    """在半满的棋盘上反复检查方块各个位置的碰撞，返回每次调用的纳秒数"""
+    game = filled_game(cls)
+    figure = game.figure
+    positions = [(x, y) for y in range(0, 18) for x in range(-1, 9)]
+    start = time.perf_counter()
+    for k in range(calls):
+        figure.x, figure.y = positions[k % len(positions)]
+        game.intersects()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def bench_break_lines(cls, calls=2000):
+    """消去底部 4 个整行，返回每次调用的微秒数（不计构造棋盘的时间）"""
+    games = [filled_game(cls, seed) for seed in range(calls)]
+    start = time.perf_counter()
+    for game in games:
+        game.break_lines()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_hard_drop(height, calls=20000):
+    """height 行、下半部分堆放方块的棋盘上计算落点，返回 (逐行下移, 每列高度) 的纳秒数"""
+    game = Tetris(height, 10, PieceGenerator(0))
+    rng = random.Random(0)
+    for i in range(height // 2, height):
+        game.field[i] = [rng.randint(1, 7) if rng.random() < 0.6 else 0 for _ in range(10)]
+        game.rows[i] = game.empty_row | sum(1 << (j + WALL) for j, c in enumerate(game.field[i]) if c)
+    game.update_skyline()
+    figure = game.figure
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        figure.y = 0
+        while not game.intersects():
+            figure.y += 1
+    loop = (time.perf_counter() - start) / calls * 1e9
+
+    figure.y = 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        game._ghost_key = None  # 不使用缓存，每次都重新计算
+        game.drop_position()
+    skyline = (time.perf_counter() - start) / calls * 1e9
+    return loop, skyline
+
+
+def bench_decode(calls=100000):
+    """取出当前方块占用的格子（绘制和固定时都要做），比较逐格解码与查表，返回纳秒数"""
+    figure = Tetris(20, 10, PieceGenerator(0)).figure
+    start = time.perf_counter()
+    for _ in range(calls):
+        [(i, j) for i in range(4) for j in range(4) if i * 4 + j in figure.image()]
+    decode = (time.perf_counter() - start) / calls * 1e9
+    start = time.perf_counter()
+    for _ in range(calls):
+        figure.piece().cells
+    table = (time.perf_counter() - start) / calls * 1e9
+    return decode, table
+
+
+def bench_snapshot(capacity=10000, calls=20000):
+    """在半满的棋盘上比较深拷贝 field 与环形缓冲区保存、恢复局面，返回 (深拷贝, 保存, 恢复) 的微秒数和缓冲区 MB"""
+    game = filled_game(Tetris)
+    ring = SnapshotRing(capacity, game.height, game.width)
+    start = time.perf_counter()
+    for _ in range(calls):
+        copy.deepcopy(game.field)
+    deep = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for _ in range(calls):
+        ring.save(game)
+    save = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for k in range(calls):
+        ring.load(game, k % capacity)
+    load = (time.perf_counter() - start) / calls * 1e6
+    return deep, save, load, len(ring.buffer) / 1e6
+
+
+def bench_ai(games=5, max_pieces=500):
+    """机器人只看当前方块、同时看下一个方块各玩几局，返回 [(平均行数, 每秒评估次数)]"""
+    from tetris_ai import play_game
+
+    results = []
+    for lookahead, pieces in ((False, max_pieces), (True, max_pieces // 5)):
+        runs = [play_game(seed=seed, max_pieces=pieces, lookahead=lookahead) for seed in range(games)]
+        results.append((sum(r["lines"] for r in runs) / games,
+                        sum(r["evaluations"] for r in runs) / sum(r["seconds"] for r in runs)))
+    return results
+
+
+def bench_headless(games=2000, mode="bag"):
+    """无界面批量运行固定脚本（方块依次放到不同的列），返回 (局数, 每秒方块数, 平均方块数)"""
+    start = time.perf_counter()
+    results = run_games(lambda game: (0, game.pieces * 3 % 8), range(games), mode=mode)
+    elapsed = time.perf_counter() - start
+    pieces = sum(r["pieces"] for r in results)
+    return games, pieces / elapsed, pieces / games
+
+
+def main():
+    print(f"位掩码与列表实现逐步对比：{check_equivalence()} 局结果完全一致")
+    print(f"{'':>12} {'列表':>10} {'位掩码':>10} {'加速':>8}")
+    old, new = bench_intersects(ListTetris), bench_intersects(Tetris)
+    print(f"{'intersects':>12} {old:>8.0f}ns {new:>8.0f}ns {old / new:>7.1f}x")
+    old, new = bench_break_lines(ListTetris), bench_break_lines(Tetris)
+    print(f"{'break_lines':>12} {old:>8.1f}us {new:>8.1f}us {old / new:>7.1f}x")
+    for height in (20, 200):
+        old, new = bench_hard_drop(height)
+        print(f"{f'落点({height}行)':>10} {old:>8.0f}ns {new:>8.0f}ns {old / new:>7.1f}x  （逐行下移 / 每列高度）")
+    old, new = bench_decode()
+    print(f"{'方块格子':>12} {old:>8.0f}ns {new:>8.0f}ns {old / new:>7.1f}x  （逐格解码 / 查表）")
+
+    deep, save, load, size = bench_snapshot()
+    print(f"悔棋快照：深拷贝 field {deep:.1f}us，保存 {save:.1f}us，恢复 {load:.1f}us，"
+          f"10000 个局面共 {size:.2f} MB")
+
+    games, rate, pieces = bench_headless()
+    print(f"无界面批量运行 {games} 局（7-bag，固定脚本）：{rate:,.0f} 个方块/秒，平均 {pieces:.0f} 个方块/局")
+
+    (lines, rate), (ahead_lines, ahead_rate) = bench_ai()
+    print(f"机器人（只看当前方块）500 个方块：平均 {lines:.1f} 行，{rate:,.0f} 次评估/秒")
+    print(f"机器人（同时看下一个方块）100 个方块：平均 {ahead_lines:.1f} 行，{ahead_rate:,.0f} 次评估/秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -218,7 +218,8 @@ def main():
             cmd.extend(['--add-data', f'{scores_path}{separator}.'])
             
             # 添加其他Python文件
-            for py_file in ['snake_game.py', 'tetris_game.py']:
+            for py_file in ['snake_game.py', 'snake_core.py', 'snake_ai.py', 'tetris_game.py', 'tetris_core.py',
+                            'minesweeper_game.py', 'minesweeper_core.py', 'minesweeper_solver.py']:
                 py_path = os.path.join(current_dir, py_file)
                 if os.path.exists(py_path):
                     cmd.extend(['--add-data', f'{py_path}{separator}.'])
@@ -1,20 +1,12 @@
 # -*- coding: utf-8 -*-
+import multiprocessing
 import pygame
 import sys
-import snake_game
-import tetris_game
-import minesweeper_game
 import pygame.freetype
 
-# 初始化 Pygame
-pygame.init()
-pygame.freetype.init()
-
 # 设置窗口
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption('游戏选择')
 
 # 颜色定义
 WHITE = (255, 255, 255)
@@ -25,27 +17,30 @@ BUTTON_HOVER = (230, 235, 240)  # 浅灰色悬停
 BUTTON_BORDER = (180, 185, 190)  # 浅灰色边框
 TEXT_COLOR = (50, 55, 60)  # 深灰色文字
 
-# 创建字体对象
-try:
-    # Mac系统中文字体路径
-    font_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
-    game_font = pygame.freetype.Font(font_path, 36)
-    title_font = pygame.freetype.Font(font_path, 48)
-    small_font = pygame.freetype.Font(font_path, 24)  # 添加小号字体
-except Exception as e:
-    print(f"加载字体失败: {e}")
+# 字体在 main() 中创建：扫雷的进程池用 spawn 启动子进程，子进程会把这个脚本当作 __mp_main__ 重新导入，
+# 所以模块顶层不能初始化 pygame、打开窗口或导入各个游戏模块
+game_font = None
+title_font = None
+small_font = None
+
+def load_fonts():
+    """返回 (game_font, title_font, small_font)"""
+    try:
+        # Mac系统中文字体路径
+        font_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
+        return (pygame.freetype.Font(font_path, 36), pygame.freetype.Font(font_path, 48),
+                pygame.freetype.Font(font_path, 24))  # 最后一个是小号字体
+    except Exception as e:
+        print(f"加载字体失败: {e}")
     try:
         # 尝试其他中文字体
         font_path = "/System/Library/Fonts/STHeiti Light.ttc"
-        game_font = pygame.freetype.Font(font_path, 36)
-        title_font = pygame.freetype.Font(font_path, 48)
-        small_font = pygame.freetype.Font(font_path, 24)  # 添加小号字体
+        return (pygame.freetype.Font(font_path, 36), pygame.freetype.Font(font_path, 48),
+                pygame.freetype.Font(font_path, 24))
     except Exception as e:
         print(f"加载备用字体失败: {e}")
-        # 如果都失败了，使用系统默认字体
-        game_font = pygame.freetype.SysFont(None, 36)
-        title_font = pygame.freetype.SysFont(None, 48)
-        small_font = pygame.freetype.SysFont(None, 24)  # 添加小号字体
+    # 如果都失败了，使用系统默认字体
+    return pygame.freetype.SysFont(None, 36), pygame.freetype.SysFont(None, 48), pygame.freetype.SysFont(None, 24)
 
 class Button:
     def __init__(self, x, y, width, height, text, description=None):
@@ -103,6 +98,19 @@ class Button:
         return False
 
 def main():
+    global game_font, title_font, small_font
+    # 游戏模块在导入时就会初始化 pygame，放到这里导入，进程池的子进程就不会加载它们
+    import snake_game
+    import tetris_game
+    import minesweeper_game
+
+    # 初始化 Pygame
+    pygame.init()
+    pygame.freetype.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('游戏选择')
+    game_font, title_font, small_font = load_fonts()
+
     # 创建按钮 - 调整按钮大小和位置
     button_width = 200  # 适中的按钮宽度
     button_height = 60  # 适中的按钮高度
@@ -196,4 +204,5 @@ def main():
         pygame.display.flip()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后扫雷的进程池子进程需要
     main() 
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""扫雷核心（无界面）：按种子和第一次点击的格子布雷，以及在后台生成不用猜的棋盘
+
+不导入 pygame。进程池用 spawn 启动子进程，子进程除了这个模块和 minesweeper_solver，
+还会把启动它的脚本（game_menu 或 minesweeper_game）当作 __mp_main__ 重新导入，
+所以这两个脚本都只在 main() 里初始化 pygame、打开窗口。
+无猜棋盘只保存 (种子, 第一次点击的 x, y)，用 generate 可以还原出完全相同的棋盘。
+"""
+import json
+import multiprocessing
+import os
+import random
+import threading
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import minesweeper_solver
+
+BOARDS_FILE = "minesweeper_boards.json"  # 生成好的无猜棋盘，与 high_scores.json 放在同一目录
+BOARDS_VERSION = 2  # 布雷算法改变后同一个种子得到的棋盘不同，版本不同的文件中的棋盘作废
+POOL_CAPACITY = 20  # 每个难度最多保存多少个棋盘
+BATCH_PER_WORKER = 2  # 每批给每个子进程几个候选棋盘，批与批之间检查是否要停下
+SAMPLE_BATCH = 1 << 16  # 布雷时每批抽取的随机编号个数，限制临时数组的大小
+
+
+class Difficulty(NamedTuple):
+    name: str  # 保存棋盘用的键
+    label: str  # 按钮上的文字
+    size: int  # 棋盘边长
+    mines: int
+    score_key: str  # 保存最高分用的键
+
+
+DIFFICULTIES = (
+    Difficulty("beginner", "初级", 9, 10, "minesweeper_beginner"),
+    Difficulty("intermediate", "中级", 16, 40, "minesweeper"),  # 沿用原来的 16x16 最高分
+    Difficulty("expert", "高级", 24, 120, "minesweeper_expert"),
+)
+
+Board = Tuple[int, int, int]  # (种子, 第一次点击的 x, y)
+
+
+def sample_mines(rng, size, mines_count, safe_cells):
+    """在 size x size 的棋盘上随机选 mines_count 个不在 safe_cells 中的格子，返回按 x * size + y 编号的布尔数组
+
+    不生成所有候选位置的列表（rng.choice 不放回抽样会生成整个排列）：在去掉安全格子后的编号上
+    每批抽 SAMPLE_BATCH 个随机编号，去重后把还没选中的置位，直到够数；要选的格子超过一半时改为选不放雷的格子。
+    最后在安全格子的位置插入 False，其余格子往后挪。除了结果只多用一个同样大小的布尔数组。
+    """
+    safe = sorted(x * size + y for x, y in safe_cells)
+    total = size * size - len(safe)
+    invert = mines_count * 2 > total
+    wanted = total - mines_count if invert else mines_count
+    picked = np.zeros(total, dtype=bool)
+    count = 0
+    while count < wanted:
+        picks = np.unique(rng.integers(0, total, min(wanted - count, SAMPLE_BATCH)))
+        picks = picks[~picked[picks]][:wanted - count]
+        picked[picks] = True
+        count += len(picks)
+    if invert:
+        np.logical_not(picked, out=picked)
+    # 第 k 个安全格子（从 0 数）在去掉安全格子后的编号中对应 cell - k
+    return np.insert(picked, [cell - k for k, cell in enumerate(safe)], False)
+
+
+def count_neighbors(mines):
+    """mines 为布尔数组，返回 int8 数组：地雷格为 -1，其余为周围 8 格中的地雷数"""
+    width, height = mines.shape
+    padded = np.zeros((width + 2, height + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = mines
+    counts = np.zeros((width, height), dtype=np.int8)
+    # 把补了一圈 0 的棋盘错开 8 个方向分别加上，相当于用 3x3 全 1 的卷积核（去掉中心）做卷积
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            if dx != 1 or dy != 1:
+                counts += padded[dx:dx + width, dy:dy + height]
+    counts[mines] = -1
+    return counts
+
+
+def generate(seed, size, mines_count, first_x, first_y):
+    """按种子布雷，第一次点击的格子及其周围没有地雷，返回 grid（下标 [x][y]，-1 为地雷）"""
+    safe_cells = [(first_x + dx, first_y + dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1]
+                  if 0 <= first_x + dx < size and 0 <= first_y + dy < size]
+    rng = np.random.default_rng(seed)
+    mines = sample_mines(rng, size, mines_count, safe_cells)
+    return count_neighbors(mines.reshape(size, size))
+
+
+def count_regions(mask):
+    """mask 中 8 连通（含斜向相邻）的区域个数
+
+    每列中连续的一段 True 作为一个节点，相邻两列中挨着的段之间连边，再用向量化的并查集合并，
+    不逐格遍历，工作量与格子数成线性关系。
+    """
+    width, height = mask.shape
+    padded = np.zeros((width, height + 2), dtype=bool)  # 每列两端补一格，每一段的起点和终点都能从相邻两格找到
+    padded[:, 1:-1] = mask
+    before, after = padded[:, :-1], padded[:, 1:]
+    # 展平后的下标按列、行单调递增，直接作为查找用的键，每列占 stride 个
+    stride = height + 1
+    starts = np.flatnonzero(after & ~before)  # 段的第一格
+    ends = np.flatnonzero(before & ~after)  # 段最后一格的下一格
+    runs = len(starts)
+    if runs == 0:
+        return 0
+    # 右边一列中与第 i 段挨着（含斜向）的段：最后一格不早于 start - 1，第一格不晚于 end
+    low = np.searchsorted(ends - 1, starts + stride - 1, 'left')
+    high = np.searchsorted(starts, ends + stride, 'right')
+    counts = np.maximum(high - low, 0)
+    left = np.repeat(np.arange(runs), counts)
+    right = np.repeat(low, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    # 每轮把每条边两端的根中较大的挂到较小的下面，再压缩路径，直到所有边的两端都在同一棵树里
+    parent = np.arange(runs)
+    while left.size:
+        left_root, right_root = parent[left], parent[right]
+        apart = left_root != right_root
+        left, right = left[apart], right[apart]
+        if not left.size:
+            break
+        left_root, right_root = left_root[apart], right_root[apart]
+        np.minimum.at(parent, np.maximum(left_root, right_root), np.minimum(left_root, right_root))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return int(np.count_nonzero(parent == np.arange(runs)))
+
+
+def three_bv(grid):
+    """3BV：不插旗翻开所有安全格子最少要点几下
+
+    每片 8 连通的空白格点一下就连同边缘的数字一起翻开，其余不挨着空白格的数字格各要点一下。
+    """
+    zeros = grid == 0
+    isolated = int(np.count_nonzero((grid > 0) & ~minesweeper_solver.touching(zeros)))
+    return count_regions(zeros) + isolated
+
+
+def open_cells(grid, revealed, x, y):
+    """和玩家点击一样翻开 (x, y)，空白格连同周围的格子一起展开"""
+    width, height = grid.shape
+    revealed[x, y] = True
+    queue = deque([(x, y)])
+    while queue:
+        x, y = queue.popleft()
+        if grid[x, y] != 0:
+            continue
+        for nx in range(max(x - 1, 0), min(x + 2, width)):
+            for ny in range(max(y - 1, 0), min(y + 2, height)):
+                if not revealed[nx, ny]:
+                    revealed[nx, ny] = True
+                    queue.append((nx, ny))
+
+
+def no_guess(grid, first_x, first_y, mines_count):
+    """从 (first_x, first_y) 开始，每一步只翻开求解器确定安全的格子，能翻开所有安全格子时返回 True"""
+    revealed = np.zeros(grid.shape, dtype=bool)
+    open_cells(grid, revealed, first_x, first_y)
+    safe_total = grid.size - mines_count
+    while int(np.count_nonzero(revealed)) < safe_total:
+        safe = minesweeper_solver.analyze(grid, revealed, mines_count).safe
+        if not safe:
+            return False
+        for x, y in safe:
+            if not revealed[x, y]:
+                open_cells(grid, revealed, x, y)
+    return True
+
+
+def check_candidate(task) -> Optional[Board]:
+    """进程池的任务：task 为 (边长, 地雷数, 种子)，第一次点击的格子也由种子决定，是无猜棋盘时返回 (种子, x, y)
+
+    第一下就能翻开整个棋盘（3BV 为 1）的不要，开局替玩家点开之后就没有可玩的了。
+    """
+    size, mines_count, seed = task
+    picker = random.Random(seed)
+    x, y = picker.randrange(size), picker.randrange(size)
+    grid = generate(seed, size, mines_count, x, y)
+    if three_bv(grid) > 1 and no_guess(grid, x, y, mines_count):
+        return seed, x, y
+    return None
+
+
+class BoardPool:
+    """每个难度保存若干个无猜棋盘，取走一个之后由后台线程用进程池补满，并写回磁盘"""
+    def __init__(self, path=BOARDS_FILE, capacity=POOL_CAPACITY, workers=None):
+        self.path = path
+        self.capacity = capacity
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)  # 留一个核心给界面
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # 界面线程和后台线程都会保存，同一时间只能有一个在写临时文件
+        self.stopping = threading.Event()
+        self.thread = None
+        self.boards = self.load()
+
+    def load(self) -> Dict[str, List[Board]]:
+        """读取磁盘上的棋盘，文件不存在、损坏或版本不同时从空池开始"""
+        boards = {difficulty.name: [] for difficulty in DIFFICULTIES}
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            if saved.get("version") != BOARDS_VERSION:
+                return boards
+            for name in boards:
+                entries = saved.get(name, [])
+                boards[name] = [tuple(entry) for entry in entries
+                                if len(entry) == 3 and all(isinstance(v, int) for v in entry)][:self.capacity]
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+        return boards
+
+    def save(self):
+        """先写临时文件再替换，中途退出也不会留下写了一半的文件
+
+        整个写入和替换都持有 save_lock，并且在锁内读取棋盘，后写完的一定是更新的内容。
+        """
+        with self.save_lock:
+            with self.lock:
+                data = {name: [list(board) for board in boards] for name, boards in self.boards.items()}
+                data = json.dumps({"version": BOARDS_VERSION, **data})
+            temp = self.path + ".tmp"
+            try:
+                with open(temp, 'w') as f:
+                    f.write(data)
+                os.replace(temp, self.path)
+            except OSError:
+                pass  # 缓存写不进去也不影响游戏，下次启动重新生成
+
+    def ready(self, name) -> int:
+        """某个难度现在有几个可以直接用的棋盘"""
+        with self.lock:
+            return len(self.boards[name])
+
+    def take(self, name) -> Optional[Board]:
+        """取出一个棋盘并在后台补充，池是空的时候返回 None"""
+        with self.lock:
+            board = self.boards[name].pop(0) if self.boards[name] else None
+        if board is not None:
+            self.save()
+        self.refill()
+        return board
+
+    def refill(self):
+        """有难度没存满并且后台线程没在运行时，启动后台线程"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        if all(self.ready(difficulty.name) >= self.capacity for difficulty in DIFFICULTIES):
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.fill, daemon=True)
+        self.thread.start()
+
+    def fill(self):
+        """后台线程：每批挑剩余最少的难度，把一批候选种子交给进程池检查，直到全部存满或要求停止"""
+        # 在有其他线程（界面、SDL）的进程里 fork 可能复制到被别的线程持有的锁，子进程会卡死，所以用 spawn
+        with multiprocessing.get_context("spawn").Pool(self.workers) as pool:
+            while not self.stopping.is_set():
+                missing = [d for d in DIFFICULTIES if self.ready(d.name) < self.capacity]
+                if not missing:
+                    break
+                difficulty = min(missing, key=lambda d: self.ready(d.name))
+                tasks = [(difficulty.size, difficulty.mines, random.getrandbits(64))
+                         for _ in range(self.workers * BATCH_PER_WORKER)]
+                found = [board for board in pool.map(check_candidate, tasks) if board is not None]
+                if found:
+                    with self.lock:
+                        boards = self.boards[difficulty.name]
+                        boards.extend(found[:self.capacity - len(boards)])
+                    self.save()
+            # 正常关闭并等待子进程退出，而不是在退出 with 时直接 terminate
+            pool.close()
+            pool.join()
+
+    def close(self):
+        """让后台线程检查完当前这一批后停下，并等它关闭进程池"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
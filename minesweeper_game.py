@@ -1,29 +1,38 @@
+import hashlib
+import minesweeper_solver
+import multiprocessing
 import pygame
 import random
 import scores
+import struct
 import sys
+from collections import OrderedDict, deque
 
-# 初始化 Pygame
-pygame.init()
-pygame.freetype.init()
+import numpy as np
 
-# 创建字体对象
-try:
-    # Mac系统中文字体路径
-    font_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
-    game_font = pygame.freetype.Font(font_path, 36)
-    small_font = pygame.freetype.Font(font_path, 20)  # 更小的字号
-except Exception as e:
-    print(f"加载字体失败: {e}")
+from minesweeper_core import DIFFICULTIES, BoardPool, count_neighbors, generate, three_bv
+
+# 字体在 main() 中创建：单独运行这个脚本时，进程池的 spawn 子进程会把它当作 __mp_main__ 重新导入，
+# 所以模块顶层不初始化 pygame
+game_font = None
+small_font = None
+
+
+def load_fonts():
+    """返回 (game_font, small_font)"""
+    try:
+        # Mac系统中文字体路径
+        font_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
+        return pygame.freetype.Font(font_path, 36), pygame.freetype.Font(font_path, 20)  # 后一个是更小的字号
+    except Exception as e:
+        print(f"加载字体失败: {e}")
     try:
         # 尝试其他中文字体
         font_path = "/System/Library/Fonts/STHeiti Light.ttc"
-        game_font = pygame.freetype.Font(font_path, 36)
-        small_font = pygame.freetype.Font(font_path, 20)  # 更小的字号
+        return pygame.freetype.Font(font_path, 36), pygame.freetype.Font(font_path, 20)
     except Exception as e:
         print(f"加载备用字体失败: {e}")
-        game_font = pygame.freetype.SysFont(None, 36)
-        small_font = pygame.freetype.SysFont(None, 20)  # 更小的字号
+    return pygame.freetype.SysFont(None, 36), pygame.freetype.SysFont(None, 20)
 
 # 颜色定义
 BACKGROUND = (255, 255, 255)  # 白色背景
@@ -48,8 +57,22 @@ BUTTON_BORDER = (200, 200, 200)  # 按钮边框和阴影颜色
 
 # 游戏设置
 CELL_SIZE = 30
+BOARD_PIXELS = 480  # 棋盘最大的显示边长，格子多时缩小格子
 GRID_SIZE = 16  # 16x16 网格
 MINES_COUNT = 40  # 40个地雷
+MAX_GRID_SIZE = 5000  # 棋盘边长上限，5000x5000 的 int8 棋盘占 25MB
+
+# 无尽模式设置
+CHUNK_SIZE = 32  # 每个区块的边长
+ENDLESS_DENSITY = 0.15  # 每格是地雷的概率
+MIN_ENDLESS_DENSITY = 0.12  # 地雷太少时空白格会无限连通，一次点击停不下来
+MINE_CACHE_CHUNKS = 256  # 最多缓存多少个区块的地雷分布，只用于计算区块边上的数字，随时可以重新生成
+BOARD_TOP = 70  # 无尽模式棋盘区域的上边界，上面显示状态
+SCROLL_SPEED = 600  # 方向键移动视野的速度（像素/秒）
+
+# 提示和自动求解
+AUTO_STEP_INTERVAL = 150  # 自动求解每走一步的间隔（毫秒）
+HINT_COLORS = {"safe": GREEN, "mine": RED, "guess": ORANGE}  # 提示格子的边框颜色
 
 # 窗口设置
 WINDOW_WIDTH = 800
@@ -119,14 +142,62 @@ class Button:
                 return True
         return False
 
+TILES = {}  # 格子边长 -> 画好的各种格子
+
+
+def cell_tiles(size):
+    """按格子边长画好每种格子（背景、边框、数字、旗子、地雷），绘制时整格 blit
+    
+    键：-1 到 8 为翻开后的格子（-1 是踩到的地雷），"hidden" 未翻开，"flag" 插了旗，
+    "hidden_mine" 游戏结束后显示的未翻开地雷。
+    """
+    tiles = TILES.get(size)
+    if tiles is not None:
+        return tiles
+    
+    def blank(color):
+        tile = pygame.Surface((size, size))
+        tile.fill(color)
+        pygame.draw.rect(tile, BLACK, tile.get_rect(), 1)
+        return tile
+    
+    tiles = {"hidden": blank(GRAY)}
+    for value in range(9):
+        tile = blank(LIGHT_GRAY)
+        if value > 0:
+            text = str(value)
+            text_rect = small_font.get_rect(text)
+            small_font.render_to(tile, ((size - text_rect.width) // 2, (size - text_rect.height) // 2), text, BLUE)
+        tiles[value] = tile
+    for key, color in ((-1, LIGHT_GRAY), ("hidden_mine", GRAY)):
+        tile = blank(color)
+        pygame.draw.circle(tile, RED, (size // 2, size // 2), size // 3)
+        tiles[key] = tile
+    flag = blank(GRAY)
+    pygame.draw.polygon(flag, RED, [(size // 4, size // 4), (size * 3 // 4, size // 2), (size // 4, size * 3 // 4)])
+    tiles["flag"] = flag
+    TILES[size] = tiles
+    return tiles
+
+
 class Minesweeper:
-    def __init__(self):
-        self.grid_size = GRID_SIZE
-        self.mines_count = MINES_COUNT
-        self.cell_size = CELL_SIZE
-        self.grid = [[0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
-        self.revealed = [[False for _ in range(self.grid_size)] for _ in range(self.grid_size)]
-        self.flagged = [[False for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+    def __init__(self, grid_size=GRID_SIZE, mines_count=MINES_COUNT, seed=None, start=None,
+                 score_key="minesweeper"):
+        if not 0 < grid_size <= MAX_GRID_SIZE:
+            raise ValueError(f"棋盘边长必须在 1 到 {MAX_GRID_SIZE} 之间")
+        self.grid_size = grid_size
+        self.mines_count = mines_count
+        self.seed = random.getrandbits(64) if seed is None else seed  # 地雷位置由种子和第一次点击的格子决定
+        self.cell_size = max(1, min(CELL_SIZE, BOARD_PIXELS // grid_size))
+        self.score_key = score_key  # 不同难度的最高分分开保存
+        # 下标都是 [x][y]，grid 中 -1 表示地雷，其余为周围的地雷数
+        self.grid = np.zeros((grid_size, grid_size), dtype=np.int8)
+        self.revealed = np.zeros((grid_size, grid_size), dtype=bool)
+        self.flagged = np.zeros((grid_size, grid_size), dtype=bool)
+        self.flag_counts = np.zeros((grid_size, grid_size), dtype=np.int8)  # 每格周围 8 格中插了旗的个数，插旗时更新
+        # 每列一个 bytearray，0 表示周围没有地雷且没插旗的格子，用 find 在 C 层面找连续的一段
+        self.zero_cols = None
+        self.safe_left = self.grid_size * self.grid_size - self.mines_count  # 还没翻开的安全格子数
         self.game_over = False
         self.win = False
         self.first_click = True
@@ -134,38 +205,34 @@ class Minesweeper:
         self.elapsed_time = 0
         self.flags_left = self.mines_count
         self.score = 0
+        self.three_bv = 0  # 玩家翻开所有安全格子最少还要点几下，布雷时计算
+        self.three_bv_per_second = 0.0
+        self.assisted = False  # 用过提示或自动求解的一局不记录最高分
+        self.start = start  # 无猜棋盘第一次点击的格子，开局时已经替玩家翻开
+        self.board_surface = None  # 画好的整个棋盘，第一次绘制时创建，之后只重画状态变了的格子
+        self.dirty = []  # 需要重画的格子，每项为 (x, 起始 y, 结束 y)，即一列中的一段
         
         # 计算游戏区域的位置
         self.game_left = (WINDOW_WIDTH - self.grid_size * self.cell_size) // 2
         self.game_top = (WINDOW_HEIGHT - self.grid_size * self.cell_size) // 2
         
-    def place_mines(self, first_x, first_y):
-        # 确保第一次点击的位置及其周围没有地雷
-        safe_cells = [(first_x + dx, first_y + dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1]
-                     if 0 <= first_x + dx < self.grid_size and 0 <= first_y + dy < self.grid_size]
-        
-        # 创建所有可能的位置列表，除去安全区域
-        all_positions = [(x, y) for x in range(self.grid_size) for y in range(self.grid_size)
-                        if (x, y) not in safe_cells]
-        
-        # 随机选择地雷位置
-        mine_positions = random.sample(all_positions, self.mines_count)
+        if start is not None:
+            # 无猜棋盘只保证从这一格开始不用猜，直接替玩家点开，计时从玩家第一次翻开格子开始
+            self.first_click = False
+            self.place_mines(*start)
+            self.safe_left -= self.open_region(*start)
+            self.three_bv -= 1  # 第一格一定是空白格，它所在的那片已经替玩家点开了
         
-        # 放置地雷
-        for x, y in mine_positions:
-            self.grid[x][y] = -1
-            
-        # 计算每个格子周围的地雷数
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                if self.grid[x][y] != -1:
-                    count = 0
-                    for dx in [-1, 0, 1]:
-                        for dy in [-1, 0, 1]:
-                            if 0 <= x + dx < self.grid_size and 0 <= y + dy < self.grid_size:
-                                if self.grid[x + dx][y + dy] == -1:
-                                    count += 1
-                    self.grid[x][y] = count
+    def place_mines(self, first_x, first_y):
+        # 确保第一次点击的位置及其周围没有地雷，地雷位置由种子决定
+        self.grid = generate(self.seed, self.grid_size, self.mines_count, first_x, first_y)
+        self.three_bv = three_bv(self.grid)
+        self.index_zeros()
+    
+    def index_zeros(self):
+        """根据 grid 和 flagged 重建 zero_cols，放置地雷后调用"""
+        blocked = ((self.grid != 0) | self.flagged).view(np.uint8)
+        self.zero_cols = [bytearray(column) for column in blocked]
     
     def reveal_cell(self, x, y):
         if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
@@ -176,32 +243,110 @@ class Minesweeper:
             
         if self.first_click:
             self.first_click = False
-            self.start_time = pygame.time.get_ticks()
             self.place_mines(x, y)
-        
-        self.revealed[x][y] = True
+        if self.start_time is None:
+            self.start_time = pygame.time.get_ticks()
         
         if self.grid[x][y] == -1:
+            self.revealed[x][y] = True
             self.game_over = True
+            # 游戏结束后显示所有地雷
+            for mine_x, mine_y in np.argwhere(self.grid == -1).tolist():
+                self.invalidate(mine_x, mine_y, mine_y + 1)
             return
         
         if self.grid[x][y] == 0:
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    new_x, new_y = x + dx, y + dy
-                    if 0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size:
-                        self.reveal_cell(new_x, new_y)
+            self.safe_left -= self.open_region(x, y)
+        else:
+            self.revealed[x][y] = True
+            self.safe_left -= 1
+            self.invalidate(x, y, y + 1)
         
         # 检查是否获胜
-        unrevealed_count = sum(row.count(False) for row in self.revealed)
-        if unrevealed_count == self.mines_count:
+        if self.safe_left == 0:
             self.win = True
+            self.elapsed_time = pygame.time.get_ticks() - self.start_time
             self.calculate_score()
     
+    def open_region(self, x, y):
+        """从空白格 (x, y) 开始翻开整片空白区域及其边缘的数字，返回新翻开的格子数
+        
+        广度优先遍历的单位是一列中连续的一段空白格：一段空白格连同上下左右斜向相邻的格子
+        都用切片一次翻开，再在左右两列的相邻范围内找出新的空白段放进队列。
+        """
+        size = self.grid_size
+        zero_cols = self.zero_cols
+        start = zero_cols[x].rfind(1, 0, y) + 1
+        queue = deque([(x, start)])
+        seen = {(x, start)}
+        opened = 0
+        while queue:
+            x, start = queue.popleft()
+            end = zero_cols[x].find(1, start)
+            if end < 0:
+                end = size
+            low, high = max(start - 1, 0), min(end + 1, size)
+            for nx in range(max(x - 1, 0), min(x + 2, size)):
+                opened += self.reveal_range(nx, low, high)
+                if nx == x:
+                    continue
+                column = zero_cols[nx]
+                position = column.find(0, low, high)
+                while position >= 0:
+                    run = column.rfind(1, 0, position) + 1
+                    if (nx, run) not in seen:
+                        seen.add((nx, run))
+                        queue.append((nx, run))
+                    position = column.find(1, position, high)
+                    if position < 0:
+                        break
+                    position = column.find(0, position, high)
+        return opened
+    
+    def reveal_range(self, x, low, high):
+        """翻开第 x 列 [low, high) 中没插旗的格子，返回新翻开的格子数"""
+        revealed = self.revealed[x, low:high]
+        hidden = ~revealed & ~self.flagged[x, low:high]
+        opened = int(np.count_nonzero(hidden))
+        revealed[hidden] = True
+        if opened:
+            self.invalidate(x, low, high)
+        return opened
+    
+    def invalidate(self, x, low, high):
+        """第 x 列 [low, high) 的格子状态变了，下一帧重画；还没画过棋盘时不用记"""
+        if self.board_surface is not None:
+            self.dirty.append((x, low, high))
+    
     def toggle_flag(self, x, y):
         if not self.revealed[x][y]:
             self.flagged[x][y] = not self.flagged[x][y]
-            self.flags_left += -1 if self.flagged[x][y] else 1
+            change = 1 if self.flagged[x][y] else -1
+            self.flags_left -= change
+            # 周围 8 格的旗子数跟着变，双击时不用再数一遍
+            self.flag_counts[max(x - 1, 0):x + 2, max(y - 1, 0):y + 2] += change
+            self.flag_counts[x, y] -= change
+            self.invalidate(x, y, y + 1)
+            if self.zero_cols is not None:
+                # 插了旗的空白格不会被自动翻开，也不会从它继续展开
+                self.zero_cols[x][y] = bool(self.flagged[x][y] or self.grid[x][y] != 0)
+    
+    def chord(self, x, y):
+        """在翻开的数字上双击（中键或左右键同时按）：周围的旗子数等于数字时，翻开周围其余没插旗的格子
+        
+        旗子插错时会翻到地雷，和普通点击一样算输。返回是否翻开了格子。
+        """
+        if not self.revealed[x, y] or self.grid[x, y] <= 0 or self.flag_counts[x, y] != self.grid[x, y]:
+            return False
+        opened = False
+        for nx in range(max(x - 1, 0), min(x + 2, self.grid_size)):
+            for ny in range(max(y - 1, 0), min(y + 2, self.grid_size)):
+                if not self.revealed[nx, ny] and not self.flagged[nx, ny]:
+                    self.reveal_cell(nx, ny)
+                    opened = True
+                    if self.game_over or self.win:
+                        return True
+        return opened
     
     def calculate_score(self):
         if self.win:
@@ -210,74 +355,288 @@ class Minesweeper:
             # 时间奖励：越快完成得分越高
             time_bonus = max(0, 2000 - self.elapsed_time // 1000)  # 每秒扣除1分，最多扣除2000分
             # 剩余旗子奖励：每个正确放置的旗子50分
-            flag_bonus = sum(50 for x in range(self.grid_size) for y in range(self.grid_size)
-                           if self.flagged[x][y] and self.grid[x][y] == -1)
+            flag_bonus = 50 * int(np.count_nonzero(self.flagged & (self.grid == -1)))
             
             self.score = base_score + time_bonus + flag_bonus
+            # 每秒完成多少 3BV，不同棋盘之间也可以比较
+            self.three_bv_per_second = self.three_bv * 1000 / max(self.elapsed_time, 1)
             
-            # 保存最高分
-            scores.save_score("minesweeper", self.score)
+            # 保存最高分，另外记录最快的 3BV/s 和通关过的最大 3BV
+            if not self.assisted:
+                scores.save_score(self.score_key, self.score)
+                scores.save_score(f"{self.score_key}_3bv_per_second", round(self.three_bv_per_second, 2))
+                scores.save_score(f"{self.score_key}_3bv", self.three_bv)
+    
+    def status_text(self):
+        if self.game_over:
+            return "游戏结束"
+        if self.win:
+            return f"胜利！得分：{self.score} | {self.three_bv_per_second:.2f} 3BV/s"
+        return f"剩余旗子：{self.flags_left} | 时间：{self.elapsed_time//1000}秒"
+    
+    def cell_at(self, pos):
+        """屏幕坐标所在的格子，不在棋盘上时返回 None"""
+        x = (pos[0] - self.game_left) // self.cell_size
+        y = (pos[1] - self.game_top) // self.cell_size
+        if 0 <= x < self.grid_size and 0 <= y < self.grid_size:
+            return x, y
+        return None
+    
+    def tile(self, tiles, x, y):
+        """格子 (x, y) 现在应该画成哪一种"""
+        if self.revealed[x, y]:
+            return tiles[int(self.grid[x, y])]
+        if self.flagged[x, y]:
+            return tiles["flag"]
+        if self.game_over and self.grid[x, y] == -1:
+            return tiles["hidden_mine"]
+        return tiles["hidden"]
     
     def draw(self, screen):
-        # 绘制网格
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                rect = pygame.Rect(
-                    self.game_left + x * self.cell_size,
-                    self.game_top + y * self.cell_size,
-                    self.cell_size,
-                    self.cell_size
-                )
-                
-                # 绘制基础方块
-                if self.revealed[x][y]:
-                    pygame.draw.rect(screen, LIGHT_GRAY, rect)
+        size = self.cell_size
+        if self.board_surface is None:
+            self.board_surface = pygame.Surface((self.grid_size * size, self.grid_size * size))
+            self.dirty = [(x, 0, self.grid_size) for x in range(self.grid_size)]
+        # 只把状态变了的格子画到缓存的棋盘上，棋盘不变时每帧只有一次 blit
+        tiles = cell_tiles(size)
+        for x, low, high in self.dirty:
+            for y in range(low, high):
+                self.board_surface.blit(self.tile(tiles, x, y), (x * size, y * size))
+        self.dirty = []
+        screen.blit(self.board_surface, (self.game_left, self.game_top))
+
+class Chunk:
+    """无尽模式中有格子被翻开或插旗过的区块，grid/revealed/flagged 与 Minesweeper 相同，下标为区块内的 [x][y]"""
+    __slots__ = ("grid", "revealed", "flagged")
+    
+    def __init__(self, grid):
+        self.grid = grid
+        self.revealed = np.zeros(grid.shape, dtype=bool)
+        self.flagged = np.zeros(grid.shape, dtype=bool)
+
+
+class EndlessMinesweeper:
+    """无尽模式：棋盘没有边界，按 CHUNK_SIZE 分成区块
+    
+    每个区块的地雷由全局种子和区块坐标的哈希决定，第一次翻开或插旗时才生成，
+    区块边上的数字按需生成相邻区块的地雷来计算。内存只随玩家去过的区域增长。
+    第一次点击的格子周围 3x3 没有地雷，与经典模式一样第一下总能翻开一片。
+    """
+    def __init__(self, seed=None, density=ENDLESS_DENSITY):
+        if not MIN_ENDLESS_DENSITY <= density < 1:
+            raise ValueError(f"地雷比例必须在 {MIN_ENDLESS_DENSITY} 到 1 之间")
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.density = density
+        self.chunks = {}  # (cx, cy) -> Chunk，只保存有格子被翻开或插旗的区块
+        self.mine_cache = OrderedDict()  # (cx, cy) -> 地雷布尔数组，最近用过的放在最后
+        self.cell_size = CELL_SIZE
+        self.game_over = False
+        self.win = False  # 无尽模式没有胜利，只在踩到地雷时结束
+        self.first_click = True
+        self.origin = (0, 0)  # 周围 3x3 没有地雷的格子，第一次点击时换成点击的格子
+        self.start_time = None
+        self.elapsed_time = 0
+        self.opened = 0  # 翻开的安全格子数，即分数
+        self.flags = 0
+        # 视野左上角的像素坐标，起点 (0, 0) 放在屏幕中间
+        self.view_x = self.cell_size // 2 - WINDOW_WIDTH // 2
+        self.view_y = self.cell_size // 2 - (WINDOW_HEIGHT - BOARD_TOP) // 2
+    
+    @property
+    def score(self):
+        return self.opened
+    
+    def chunk_mines(self, cx, cy):
+        """区块 (cx, cy) 的地雷分布，同一个种子和坐标总是得到同样的结果"""
+        key = (cx, cy)
+        mines = self.mine_cache.get(key)
+        if mines is not None:
+            self.mine_cache.move_to_end(key)
+            return mines
+        digest = hashlib.blake2b(struct.pack("<Qqq", self.seed, cx, cy), digest_size=8).digest()
+        rng = np.random.default_rng(int.from_bytes(digest, "little"))
+        mines = rng.random((CHUNK_SIZE, CHUNK_SIZE)) < self.density
+        ox, oy = self.origin
+        for x in (ox - 1, ox, ox + 1):
+            for y in (oy - 1, oy, oy + 1):
+                if (x // CHUNK_SIZE, y // CHUNK_SIZE) == key:
+                    mines[x % CHUNK_SIZE, y % CHUNK_SIZE] = False
+        self.mine_cache[key] = mines
+        if len(self.mine_cache) > MINE_CACHE_CHUNKS:
+            self.mine_cache.popitem(last=False)
+        return mines
+    
+    def chunk(self, cx, cy):
+        """取出区块，第一次用到时生成：把周围 3x3 个区块的地雷拼起来数完再取中间一块"""
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None:
+            chunk = self.chunks[cx, cy] = Chunk(self.chunk_grid(cx, cy))
+        return chunk
+    
+    def chunk_grid(self, cx, cy):
+        mines = np.block([[self.chunk_mines(cx + dx, cy + dy) for dy in (-1, 0, 1)] for dx in (-1, 0, 1)])
+        return count_neighbors(mines)[CHUNK_SIZE:2 * CHUNK_SIZE, CHUNK_SIZE:2 * CHUNK_SIZE].copy()
+    
+    def move_origin(self, x, y):
+        """把没有地雷的 3x3 移到 (x, y) 周围；只在第一次点击前调用，已生成的区块只有旗子，重新数一遍地雷即可"""
+        if (x, y) == self.origin:
+            return
+        self.origin = (x, y)
+        self.mine_cache.clear()
+        for (cx, cy), chunk in self.chunks.items():
+            chunk.grid = self.chunk_grid(cx, cy)
+    
+    def reveal_cell(self, x, y):
+        cx, lx = divmod(x, CHUNK_SIZE)
+        cy, ly = divmod(y, CHUNK_SIZE)
+        chunk = self.chunk(cx, cy)
+        if chunk.revealed[lx, ly] or chunk.flagged[lx, ly]:
+            return
+        
+        if self.first_click:
+            self.first_click = False
+            self.start_time = pygame.time.get_ticks()
+            self.move_origin(x, y)
+        
+        chunk.revealed[lx, ly] = True
+        if chunk.grid[lx, ly] == -1:
+            self.game_over = True
+            scores.save_score("minesweeper_endless", self.opened)
+            return
+        self.opened += 1
+        if chunk.grid[lx, ly] != 0:
+            return
+        
+        # 空白格：跨区块广度优先展开，地雷比例不低于 MIN_ENDLESS_DENSITY 时空白区域总是有限的
+        queue = deque([(x, y)])
+        while queue:
+            x, y = queue.popleft()
+            for nx in (x - 1, x, x + 1):
+                for ny in (y - 1, y, y + 1):
+                    cx, lx = divmod(nx, CHUNK_SIZE)
+                    cy, ly = divmod(ny, CHUNK_SIZE)
+                    chunk = self.chunk(cx, cy)
+                    if chunk.revealed[lx, ly] or chunk.flagged[lx, ly]:
+                        continue
+                    chunk.revealed[lx, ly] = True
+                    self.opened += 1
+                    if chunk.grid[lx, ly] == 0:
+                        queue.append((nx, ny))
+    
+    def toggle_flag(self, x, y):
+        cx, lx = divmod(x, CHUNK_SIZE)
+        cy, ly = divmod(y, CHUNK_SIZE)
+        chunk = self.chunk(cx, cy)
+        if not chunk.revealed[lx, ly]:
+            chunk.flagged[lx, ly] = not chunk.flagged[lx, ly]
+            self.flags += 1 if chunk.flagged[lx, ly] else -1
+    
+    def status_text(self):
+        if self.game_over:
+            return f"游戏结束，翻开了 {self.opened} 格"
+        return f"已翻开：{self.opened} | 旗子：{self.flags} | 时间：{self.elapsed_time//1000}秒"
+    
+    def scroll(self, dx, dy):
+        self.view_x += dx
+        self.view_y += dy
+    
+    def cell_at(self, pos):
+        if pos[1] < BOARD_TOP:
+            return None
+        return ((pos[0] + int(self.view_x)) // self.cell_size,
+                (pos[1] - BOARD_TOP + int(self.view_y)) // self.cell_size)
+    
+    def draw(self, screen):
+        size = self.cell_size
+        view_x, view_y = int(self.view_x), int(self.view_y)
+        screen.set_clip(pygame.Rect(0, BOARD_TOP, WINDOW_WIDTH, WINDOW_HEIGHT - BOARD_TOP))
+        tiles = cell_tiles(size)
+        first_x, first_y = view_x // size, view_y // size
+        for x in range(first_x, (view_x + WINDOW_WIDTH) // size + 1):
+            cx, lx = divmod(x, CHUNK_SIZE)
+            for y in range(first_y, (view_y + WINDOW_HEIGHT - BOARD_TOP) // size + 1):
+                cy, ly = divmod(y, CHUNK_SIZE)
+                # 没有生成的区块里的格子都还没翻开
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    tile = tiles["hidden"]
+                elif chunk.revealed[lx, ly]:
+                    tile = tiles[int(chunk.grid[lx, ly])]
                 else:
-                    pygame.draw.rect(screen, GRAY, rect)
-                
-                # 绘制边框
-                pygame.draw.rect(screen, BLACK, rect, 1)
-                
-                if self.revealed[x][y]:
-                    if self.grid[x][y] == -1:
-                        # 绘制地雷
-                        pygame.draw.circle(screen, RED,
-                                         (self.game_left + x * self.cell_size + self.cell_size // 2,
-                                          self.game_top + y * self.cell_size + self.cell_size // 2),
-                                         self.cell_size // 3)
-                    elif self.grid[x][y] > 0:
-                        # 绘制数字
-                        text = str(self.grid[x][y])
-                        text_rect = small_font.get_rect(text)
-                        text_pos = (
-                            self.game_left + x * self.cell_size + (self.cell_size - text_rect.width) // 2,
-                            self.game_top + y * self.cell_size + (self.cell_size - text_rect.height) // 2
-                        )
-                        small_font.render_to(screen, text_pos, text, BLUE)
-                elif self.flagged[x][y]:
-                    # 绘制旗子
-                    pygame.draw.polygon(screen, RED, [
-                        (self.game_left + x * self.cell_size + self.cell_size // 4,
-                         self.game_top + y * self.cell_size + self.cell_size // 4),
-                        (self.game_left + x * self.cell_size + self.cell_size * 3 // 4,
-                         self.game_top + y * self.cell_size + self.cell_size // 2),
-                        (self.game_left + x * self.cell_size + self.cell_size // 4,
-                         self.game_top + y * self.cell_size + self.cell_size * 3 // 4)
-                    ])
+                    tile = tiles["flag" if chunk.flagged[lx, ly] else "hidden"]
+                screen.blit(tile, (x * size - view_x, BOARD_TOP + y * size - view_y))
+        screen.set_clip(None)
+
+
+def new_game(difficulty, no_guess, pool):
+    """按难度开一局；选了无猜时从棋盘池取一个，池里暂时没有时退回普通的随机棋盘"""
+    board = pool.take(difficulty.name) if no_guess else None
+    if board is None:
+        return Minesweeper(difficulty.size, difficulty.mines, score_key=difficulty.score_key)
+    seed, x, y = board
+    return Minesweeper(difficulty.size, difficulty.mines, seed, start=(x, y), score_key=difficulty.score_key)
+
 
 def main():
+    global game_font, small_font
+    # 初始化 Pygame
+    pygame.init()
+    pygame.freetype.init()
+    game_font, small_font = load_fonts()
+
+    # 进程池的子进程在后台生成无猜棋盘，退出时等它们检查完当前一批再关闭
+    pool = BoardPool()
+    pool.refill()
+    try:
+        play(pool)
+    finally:
+        pool.close()
+
+
+def play(pool):
     # 初始化屏幕
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption('扫雷')
     clock = pygame.time.Clock()
     
-    # 创建按钮
-    start_btn = Button(
+    # 创建按钮，每个难度一个开始按钮
+    difficulty_btns = [
+        (Button(
+            WINDOW_WIDTH//2 - 230 + i * 160,
+            int(WINDOW_HEIGHT * 0.6),
+            140,
+            60,
+            difficulty.label,
+            button_color=START_BTN_COLOR,
+            hover_color=START_BTN_HOVER
+        ), difficulty)
+        for i, difficulty in enumerate(DIFFICULTIES)
+    ]
+    endless_btn = Button(
         WINDOW_WIDTH//2 - 100,
-        int(WINDOW_HEIGHT * 0.6),
+        int(WINDOW_HEIGHT * 0.6) + 80,
         200,
         60,
-        "开始游戏",
+        "无尽模式",
+        button_color=START_BTN_COLOR,
+        hover_color=START_BTN_HOVER
+    )
+    no_guess_btn = Button(
+        WINDOW_WIDTH//2 - 100,
+        int(WINDOW_HEIGHT * 0.6) + 160,
+        200,
+        36,
+        "",
+        small=True,
+        button_color=BACK_BTN_COLOR,
+        hover_color=BACK_BTN_HOVER
+    )
+    restart_btn = Button(
+        WINDOW_WIDTH//2 - 100,
+        WINDOW_HEIGHT - 80,
+        200,
+        60,
+        "重新开始",
         button_color=START_BTN_COLOR,
         hover_color=START_BTN_HOVER
     )
@@ -293,14 +652,22 @@ def main():
         button_color=BACK_BTN_COLOR,
         hover_color=BACK_BTN_HOVER
     )
+    hint_btn = Button(10, 60, 100, 36, "提示", small=True)
+    auto_btn = Button(10, 106, 100, 36, "自动", small=True)
     
     game = None
+    difficulty = DIFFICULTIES[1]
+    no_guess = True  # 是否使用不用猜的棋盘
+    hint = None  # 当前显示的提示
+    auto = False  # 是否在自动求解
+    last_auto = 0
     game_started = False
-    high_score = scores.load_scores()["minesweeper"]
+    high_scores = scores.load_scores()
     
     running = True
     while running:
         current_time = pygame.time.get_ticks()
+        frame_time = clock.get_time() / 1000
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -310,27 +677,69 @@ def main():
                 return
                 
             if not game_started:
-                if start_btn.handle_event(event):
+                for button, choice in difficulty_btns:
+                    if button.handle_event(event):
+                        game_started = True
+                        difficulty = choice
+                        game = new_game(difficulty, no_guess, pool)
+                if endless_btn.handle_event(event):
                     game_started = True
-                    game = Minesweeper()
+                    game = EndlessMinesweeper()
+                elif no_guess_btn.handle_event(event):
+                    no_guess = not no_guess
+                hint, auto = None, False
+                continue
+            
+            if (game.game_over or game.win) and restart_btn.handle_event(event):
+                game = EndlessMinesweeper() if isinstance(game, EndlessMinesweeper) else new_game(difficulty, no_guess, pool)
+                hint, auto = None, False
+                high_scores = scores.load_scores()
                 continue
                 
+            if isinstance(game, Minesweeper) and not game.game_over and not game.win:
+                if hint_btn.handle_event(event):
+                    hint = minesweeper_solver.hint(game)
+                    game.assisted = True
+                    continue
+                if auto_btn.handle_event(event):
+                    auto = not auto
+                    game.assisted = True
+                    continue
+                
             if game_started and not game.game_over and not game.win:
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = event.pos
-                    grid_x = (mouse_pos[0] - game.game_left) // game.cell_size
-                    grid_y = (mouse_pos[1] - game.game_top) // game.cell_size
-                    
-                    if 0 <= grid_x < game.grid_size and 0 <= grid_y < game.grid_size:
-                        if event.button == 1:  # 左键点击
+                    hint = None
+                    cell = game.cell_at(event.pos)
+                    if cell is not None:
+                        grid_x, grid_y = cell
+                        # 中键，或者按住一个键时再按另一个键：双击数字。先按下的那个键对翻开的格子不起作用
+                        left, _, right = pygame.mouse.get_pressed()
+                        if isinstance(game, Minesweeper) and (
+                                event.button == 2 or (event.button == 1 and right) or (event.button == 3 and left)):
+                            game.chord(grid_x, grid_y)
+                        elif event.button == 1:  # 左键点击
                             game.reveal_cell(grid_x, grid_y)
                         elif event.button == 3:  # 右键点击
                             game.toggle_flag(grid_x, grid_y)
         
         # 更新游戏时间
-        if game_started and game and not game.game_over and not game.win and not game.first_click:
+        if game_started and game and not game.game_over and not game.win and game.start_time is not None:
             game.elapsed_time = current_time - game.start_time
         
+        # 自动求解
+        if auto and isinstance(game, Minesweeper) and current_time - last_auto >= AUTO_STEP_INTERVAL:
+            last_auto = current_time
+            hint = None
+            if minesweeper_solver.step(game) is None:
+                auto = False
+        
+        # 无尽模式用方向键或 WASD 移动视野
+        if game_started and isinstance(game, EndlessMinesweeper):
+            keys = pygame.key.get_pressed()
+            step = SCROLL_SPEED * frame_time
+            game.scroll(((keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])) * step,
+                        ((keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])) * step)
+        
         # 绘制
         screen.fill(BACKGROUND)
         
@@ -345,24 +754,33 @@ def main():
             game_font.render_to(screen, title_pos, title_text, BLACK)
             
             # 绘制最高分
-            high_score_text = f"历史最高分：{high_score}"
-            high_score_rect = game_font.get_rect(high_score_text)
+            high_score_text = "历史最高分：" + "  ".join(
+                f"{d.label} {high_scores.get(d.score_key, 0)}" for d in DIFFICULTIES)
+            high_score_rect = small_font.get_rect(high_score_text)
             high_score_pos = (
                 WINDOW_WIDTH//2 - high_score_rect.width // 2,
                 WINDOW_HEIGHT//4 + title_rect.height + 20
             )
-            game_font.render_to(screen, high_score_pos, high_score_text, BLACK)
+            small_font.render_to(screen, high_score_pos, high_score_text, BLACK)
+            endless_text = f"无尽模式最多翻开：{high_scores.get('minesweeper_endless', 0)} 格"
+            endless_rect = small_font.get_rect(endless_text)
+            small_font.render_to(screen, (WINDOW_WIDTH//2 - endless_rect.width // 2,
+                                          high_score_pos[1] + high_score_rect.height + 20), endless_text, BLACK)
+            speed_text = "最快 3BV/s：" + "  ".join(
+                f"{d.label} {high_scores.get(f'{d.score_key}_3bv_per_second', 0):.2f}" for d in DIFFICULTIES)
+            speed_rect = small_font.get_rect(speed_text)
+            small_font.render_to(screen, (WINDOW_WIDTH//2 - speed_rect.width // 2,
+                                          high_score_pos[1] + 2 * (high_score_rect.height + 20)), speed_text, BLACK)
             
             # 绘制开始按钮
-            start_btn.draw(screen)
+            for button, _ in difficulty_btns:
+                button.draw(screen)
+            endless_btn.draw(screen)
+            no_guess_btn.text = "无猜棋盘：开" if no_guess else "无猜棋盘：关"
+            no_guess_btn.draw(screen)
         else:
             # 绘制游戏状态
-            if game.game_over:
-                status_text = "游戏结束"
-            elif game.win:
-                status_text = f"胜利！得分：{game.score}"
-            else:
-                status_text = f"剩余旗子：{game.flags_left} | 时间：{game.elapsed_time//1000}秒"
+            status_text = game.status_text()
             
             status_rect = game_font.get_rect(status_text)
             status_pos = (
@@ -374,21 +792,28 @@ def main():
             # 绘制游戏网格
             game.draw(screen)
             
+            if isinstance(game, Minesweeper):
+                hint_btn.draw(screen)
+                auto_btn.text = "停止" if auto else "自动"
+                auto_btn.draw(screen)
+                if hint is not None:
+                    rect = pygame.Rect(game.game_left + hint.x * game.cell_size,
+                                       game.game_top + hint.y * game.cell_size,
+                                       game.cell_size, game.cell_size)
+                    pygame.draw.rect(screen, HINT_COLORS[hint.kind], rect, 3)
+                    hint_text = {"safe": "绿框：安全", "mine": "红框：地雷"}.get(
+                        hint.kind, f"只能猜：{hint.probability:.0%}")
+                    small_font.render_to(screen, (10, 160), hint_text, BLACK)
+            
+            if isinstance(game, Minesweeper):
+                board_text = "无猜棋盘" if game.start is not None else "随机棋盘"
+                small_font.render_to(screen, (10, WINDOW_HEIGHT - 40), board_text, BLACK)
+                if not game.first_click:
+                    small_font.render_to(screen, (10, WINDOW_HEIGHT - 70), f"3BV：{game.three_bv}", BLACK)
+            
             # 如果游戏结束，显示重新开始按钮
             if game.game_over or game.win:
-                restart_btn = Button(
-                    WINDOW_WIDTH//2 - 100,
-                    WINDOW_HEIGHT - 80,
-                    200,
-                    60,
-                    "重新开始",
-                    button_color=START_BTN_COLOR,
-                    hover_color=START_BTN_HOVER
-                )
                 restart_btn.draw(screen)
-                
-                if restart_btn.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, {'pos': pygame.mouse.get_pos(), 'button': 1})):
-                    game = Minesweeper()
         
         # 始终显示返回按钮
         back_btn.draw(screen)
@@ -397,4 +822,5 @@ def main():
         clock.tick(60)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
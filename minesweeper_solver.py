@@ -0,0 +1,422 @@
+"""扫雷求解器：根据已翻开的数字推出一定安全和一定是地雷的格子，需要猜的时候估计每格是地雷的概率
+
+只读取 Minesweeper 的 grid（只看已翻开的格子）、revealed 和地雷总数，不相信玩家插的旗。
+依次使用三种规则，前一种推不出新结论时才用后一种：
+    单格规则：数字减去周围已知地雷为 0 时其余格子都安全，等于未知格子数时都是地雷
+    子集规则：一个数字的未知格子是另一个的子集时，两者之差的地雷数也确定
+    枚举边界：把相互关联的数字分成独立的连通块，分别枚举所有满足条件的布雷方式，
+             再按剩余地雷数合并各块，得到每格是地雷的概率
+"""
+import math
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+ENUMERATION_LIMIT = 40  # 一个连通块超过这么多格子时不再枚举，改用数字给出的局部密度估计概率
+EXACT_COMPONENTS = 8  # 连通块不超过这么多个时按剩余地雷总数精确合并，更多时（大棋盘）把各块看成相互独立
+NEIGHBOR_DX = np.array([-1, -1, -1, 0, 0, 1, 1, 1])
+NEIGHBOR_DY = np.array([-1, 0, 1, -1, 1, -1, 0, 1])
+
+Cell = Tuple[int, int]
+
+
+class Analysis(NamedTuple):
+    safe: Set[Cell]  # 一定安全的格子
+    mines: Set[Cell]  # 一定是地雷的格子
+    probabilities: Dict[Cell, float]  # 与数字相邻、还不确定的格子是地雷的概率
+    other: float  # 不与任何数字相邻的未翻开格子是地雷的概率
+    unconstrained: int  # 这样的格子有多少个
+
+
+class Hint(NamedTuple):
+    x: int
+    y: int
+    kind: str  # "safe" 可以放心翻开，"mine" 一定是地雷，"guess" 只能猜，选的是最不可能是地雷的格子
+    probability: float  # 是地雷的概率
+
+
+def log_comb(n, k):
+    """ln C(n, k)，地雷数很大时直接算组合数太慢"""
+    if k < 0 or k > n:
+        return -math.inf
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def touching(mask):
+    """与 mask 中某个格子相同或相邻的格子"""
+    width, height = mask.shape
+    padded = np.pad(mask, 1)
+    result = np.zeros_like(mask)
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            result |= padded[dx:dx + width, dy:dy + height]
+    return result
+
+
+def constraints_of(grid, revealed):
+    """每个与未翻开格子相邻的已翻开数字给出一条约束 (未翻开的相邻格子, 数字)，格子编号为 x * 列数 + y"""
+    width, height = grid.shape
+    hidden = ~revealed
+    border = revealed & touching(hidden)
+    xs, ys = np.nonzero(border)
+    # 每个数字的 8 个相邻格子一次算出编号，出界或已翻开的记为 -1
+    nxs = xs[:, None] + NEIGHBOR_DX
+    nys = ys[:, None] + NEIGHBOR_DY
+    ids = nxs * height + nys
+    inside = (nxs >= 0) & (nxs < width) & (nys >= 0) & (nys < height)
+    ids[~inside] = 0
+    ids[~(inside & hidden.ravel()[ids])] = -1
+    constraints = {}
+    for row, value in zip(ids.tolist(), grid[xs, ys].tolist()):
+        constraints[frozenset(cell for cell in row if cell >= 0)] = value
+    return [(set(cells), value) for cells, value in constraints.items()]
+
+
+def simplify(constraints, safe, mines):
+    """去掉已知的格子并应用单格规则，返回 (剩下的约束, 是否推出了新格子)"""
+    progress = False
+    changed = True
+    while changed:
+        changed = False
+        remaining = []
+        for cells, count in constraints:
+            if cells & mines:
+                count -= len(cells & mines)
+                cells = cells - mines
+            if cells & safe:
+                cells = cells - safe
+            if not cells:
+                continue
+            if count == 0:
+                safe |= cells
+                changed = True
+            elif count == len(cells):
+                mines |= cells
+                changed = True
+            else:
+                remaining.append((cells, count))
+        constraints = remaining
+        progress |= changed
+    return constraints, progress
+
+
+def subset_rule(constraints, safe, mines):
+    """子集规则，推出了新格子时返回 True"""
+    by_cell = {}
+    for i, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(i)
+    progress = False
+    for i, (small, small_count) in enumerate(constraints):
+        # 只有与 small 共享格子的约束才可能包含它，任取 small 中的一格即可找到所有候选
+        for j in by_cell[next(iter(small))]:
+            big, big_count = constraints[j]
+            if j == i or len(big) <= len(small) or not small <= big:
+                continue
+            rest = big - small
+            rest_count = big_count - small_count
+            if rest_count == 0 and not rest <= safe:
+                safe |= rest
+                progress = True
+            elif rest_count == len(rest) and not rest <= mines:
+                mines |= rest
+                progress = True
+    return progress
+
+
+def components(constraints):
+    """按共享格子把约束分成互不相关的连通块，返回 [(格子列表, 约束列表)]"""
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        first = find(next(iter(cells)))
+        for cell in cells:
+            root = find(cell)
+            if root != first:
+                parent[root] = first
+    groups = {}
+    for cells, count in constraints:
+        groups.setdefault(find(next(iter(cells))), []).append((cells, count))
+    result = []
+    for group in groups.values():
+        cells = set()
+        for c, _ in group:
+            cells |= c
+        result.append((cells, group))
+    return result
+
+
+def enumerate_component(cells, constraints):
+    """枚举一个连通块的所有布雷方式，返回 {地雷数: (方式数, {格子: 该格是地雷的方式数})}
+
+    只与同一批数字相邻的格子可以互换，合成一组后只枚举每组的地雷数，
+    每组放 m 个地雷的方式数为 C(组大小, m)。
+    """
+    membership = {}
+    for k, (group, _) in enumerate(constraints):
+        for cell in group:
+            membership.setdefault(cell, []).append(k)
+    by_key = {}
+    for cell in sorted(membership):
+        by_key.setdefault(tuple(membership[cell]), []).append(cell)
+    # 按涉及的第一个约束排序，相邻的组先被赋值，约束能尽早检查
+    groups = sorted(by_key.items())
+    sizes = [len(members) for _, members in groups]
+    linked = [key for key, _ in groups]
+    need = [count for _, count in constraints]  # 每条约束还需要的地雷数
+    left = [len(group) for group, _ in constraints]  # 每条约束还没赋值的格子数
+    assignment = [0] * len(groups)
+    results = {}
+
+    def search(i, mines, ways):
+        if i == len(groups):
+            total, counts = results.get(mines, (0, [0] * len(groups)))
+            for j, m in enumerate(assignment):
+                if m:
+                    counts[j] += ways * m
+            results[mines] = (total + ways, counts)
+            return
+        ks = linked[i]
+        size = sizes[i]
+        for k in ks:
+            left[k] -= size
+        low = max(max(need[k] - left[k] for k in ks), 0)
+        high = min(min(need[k] for k in ks), size)
+        for m in range(low, high + 1):
+            for k in ks:
+                need[k] -= m
+            assignment[i] = m
+            search(i + 1, mines + m, ways * math.comb(size, m))
+            for k in ks:
+                need[k] += m
+        assignment[i] = 0
+        for k in ks:
+            left[k] += size
+
+    search(0, 0, 1)
+    result = {}
+    for mines, (total, counts) in results.items():
+        cell_counts = {}
+        for (_, members), count in zip(groups, counts):
+            for cell in members:
+                cell_counts[cell] = count / len(members)
+        result[mines] = (total, cell_counts)
+    return result
+
+
+def estimate_component(cells, constraints):
+    """连通块太大时的近似：每格的概率取相邻数字剩余密度的平均值，只给出最可能的地雷数"""
+    densities = {}
+    for group, count in constraints:
+        for cell in group:
+            densities.setdefault(cell, []).append(count / len(group))
+    probabilities = {cell: sum(values) / len(values) for cell, values in densities.items()}
+    mines = round(sum(probabilities.values()))
+    return {mines: (1, {cell: p for cell, p in probabilities.items()})}
+
+
+def analyze(grid, revealed, mines_count) -> Analysis:
+    """根据已翻开的格子推理，见模块说明"""
+    width, height = grid.shape
+    constraints = constraints_of(grid, revealed)
+    safe: Set[int] = set()
+    mines: Set[int] = set()
+    probabilities: Dict[int, float] = {}
+    hidden_total = width * height - int(np.count_nonzero(revealed))
+    other = 0.0
+    while True:
+        constraints, progress = simplify(constraints, safe, mines)
+        if progress or subset_rule(constraints, safe, mines):
+            continue
+        probabilities, other = frontier_probabilities(constraints, mines_count - len(mines),
+                                                      hidden_total - len(safe) - len(mines))
+        certain = False
+        for cell, p in probabilities.items():
+            if p <= 0.0:
+                safe.add(cell)
+                certain = True
+            elif p >= 1.0:
+                mines.add(cell)
+                certain = True
+        if not certain:
+            break
+    frontier = set(probabilities)
+    unconstrained = hidden_total - len(safe) - len(mines) - len(frontier)
+    if unconstrained and other <= 0.0:
+        # 剩下的地雷都在边界上，其余未翻开的格子全部安全
+        hidden = np.flatnonzero(~revealed.ravel())
+        safe.update(cell for cell in hidden.tolist() if cell not in frontier and cell not in mines)
+        unconstrained = 0
+    cell_of = lambda cell: divmod(cell, height)
+    return Analysis({cell_of(c) for c in safe}, {cell_of(c) for c in mines},
+                    {cell_of(c): p for c, p in probabilities.items()}, other, unconstrained)
+
+
+def frontier_probabilities(constraints, mines_left, hidden_left):
+    """枚举每个连通块后按剩余地雷数合并，返回 ({格子: 概率}, 其余格子的概率)"""
+    parts = []
+    frontier = 0
+    for cells, group in components(constraints):
+        frontier += len(cells)
+        if len(cells) > ENUMERATION_LIMIT:
+            parts.append(estimate_component(cells, group))
+        else:
+            parts.append(enumerate_component(cells, group))
+    rest = hidden_left - frontier  # 不与数字相邻的格子数
+    if len(parts) > EXACT_COMPONENTS:
+        return independent_probabilities(parts, mines_left, hidden_left, rest)
+
+    # 每个连通块的地雷数分布，rest 中的布雷方式数 C(rest, 剩余地雷) 用对数计算后再按最大值缩放
+    def combine(distributions):
+        total = {0: 1.0}
+        for dist in distributions:
+            merged = {}
+            for a, wa in total.items():
+                for b, (wb, _) in dist.items():
+                    merged[a + b] = merged.get(a + b, 0.0) + wa * wb
+            total = merged
+        return total
+
+    all_counts = combine(parts)
+    logs = {k: log_comb(rest, mines_left - k) for k in all_counts}
+    top = max(logs.values(), default=0.0)
+    if top == -math.inf:
+        # 已知条件互相矛盾（例如地雷总数对不上），退回只看边界
+        top = 0.0
+        logs = {k: 0.0 for k in all_counts}
+    scale = {k: math.exp(v - top) for k, v in logs.items()}
+    weight = sum(all_counts[k] * scale[k] for k in all_counts)
+    expected_rest = sum(all_counts[k] * scale[k] * (mines_left - k) for k in all_counts) / weight if weight else 0.0
+    other = expected_rest / rest if rest > 0 else 0.0
+
+    probabilities = {}
+    for i, dist in enumerate(parts):
+        others = combine(parts[:i] + parts[i + 1:])
+        for k, (_, cell_counts) in dist.items():
+            factor = sum(wo * scale.get(k + m, 0.0) for m, wo in others.items()) / weight if weight else 0.0
+            for cell, count in cell_counts.items():
+                probabilities[cell] = probabilities.get(cell, 0.0) + count * factor
+    # 消除浮点误差，确定的格子严格等于 0 或 1
+    for cell, p in probabilities.items():
+        if p < 1e-12:
+            probabilities[cell] = 0.0
+        elif p > 1 - 1e-12:
+            probabilities[cell] = 1.0
+    return probabilities, other
+
+
+def independent_probabilities(parts, mines_left, hidden_left, rest):
+    """连通块很多时的近似：每块多一个地雷的权重取 其余格子密度 / (1 - 密度)，各块分别归一化
+
+    其余格子很多时这就是精确结果的极限，代价只与连通块的总大小成正比。
+    密度先用全局平均值，再用算出的边界地雷期望数修正两次。
+    """
+    density = mines_left / hidden_left if hidden_left else 0.0
+    probabilities = {}
+    for _ in range(3):
+        density = min(max(density, 1e-9), 1 - 1e-9)
+        ratio = density / (1 - density)
+        probabilities = {}
+        expected = 0.0
+        for dist in parts:
+            low = min(dist)
+            weights = {k: total * ratio ** (k - low) for k, (total, _) in dist.items()}
+            weight = sum(weights.values())
+            expected += sum(k * w for k, w in weights.items()) / weight
+            for k, (total, cell_counts) in dist.items():
+                factor = weights[k] / total / weight
+                for cell, count in cell_counts.items():
+                    probabilities[cell] = probabilities.get(cell, 0.0) + count * factor
+        if rest <= 0:
+            density = 0.0
+            break
+        density = (mines_left - expected) / rest
+    return probabilities, min(max(density, 0.0), 1.0)
+
+
+def hint(game) -> Optional[Hint]:
+    """给出下一步：优先一个一定安全的格子，其次一个还没插旗的地雷，都没有时给出最不可能是地雷的格子"""
+    if game.game_over or game.win:
+        return None
+    if game.first_click:
+        # 第一次点击周围保证没有地雷
+        return Hint(game.grid_size // 2, game.grid_size // 2, "safe", 0.0)
+    analysis = analyze(game.grid, game.revealed, game.mines_count)
+    if analysis.safe:
+        x, y = min(analysis.safe)
+        return Hint(x, y, "safe", 0.0)
+    unflagged = [cell for cell in analysis.mines if not game.flagged[cell]]
+    if unflagged:
+        x, y = min(unflagged)
+        return Hint(x, y, "mine", 1.0)
+    return best_guess(game, analysis)
+
+
+def best_guess(game, analysis) -> Optional[Hint]:
+    """在边界格子和其余格子中选是地雷的概率最小的一个，其余格子优先选角上的"""
+    best = min(analysis.probabilities.items(), key=lambda item: (item[1], item[0]), default=None)
+    if analysis.unconstrained and (best is None or analysis.other < best[1]):
+        frontier = analysis.probabilities
+        hidden = ~game.revealed
+        size = game.grid_size
+        # 角上的格子相邻格子少，翻开后更可能是 0，能展开一片
+        for x, y in ((0, 0), (0, size - 1), (size - 1, 0), (size - 1, size - 1)):
+            if hidden[x, y] and (x, y) not in frontier and (x, y) not in analysis.mines:
+                return Hint(x, y, "guess", analysis.other)
+        for cell in np.argwhere(hidden).tolist():
+            cell = tuple(cell)
+            if cell not in frontier and cell not in analysis.mines:
+                return Hint(cell[0], cell[1], "guess", analysis.other)
+    if best is None:
+        return None
+    (x, y), p = best
+    return Hint(x, y, "guess", p)
+
+
+def step(game) -> Optional[Hint]:
+    """自动走一步：翻开所有一定安全的格子并给一定是地雷的格子插旗，推不出来时按概率猜一格
+
+    返回这一步依据的提示，游戏已经结束时返回 None。
+    """
+    if game.game_over or game.win:
+        return None
+    if game.first_click:
+        move = hint(game)
+        game.reveal_cell(move.x, move.y)
+        return move
+    analysis = analyze(game.grid, game.revealed, game.mines_count)
+    for x, y in analysis.mines:
+        if not game.flagged[x, y]:
+            game.toggle_flag(x, y)
+    if analysis.safe:
+        for x, y in sorted(analysis.safe):
+            if game.flagged[x, y]:
+                game.toggle_flag(x, y)  # 玩家插错的旗
+            game.reveal_cell(x, y)
+        x, y = min(analysis.safe)
+        return Hint(x, y, "safe", 0.0)
+    move = best_guess(game, analysis)
+    if move is not None:
+        if game.flagged[move.x, move.y]:
+            game.toggle_flag(move.x, move.y)
+        game.reveal_cell(move.x, move.y)
+    return move
+
+
+def solve(game, max_steps=None) -> List[Hint]:
+    """一直自动走到游戏结束（或走满 max_steps 步），返回每一步的提示"""
+    moves = []
+    while max_steps is None or len(moves) < max_steps:
+        move = step(game)
+        if move is None:
+            break
+        moves.append(move)
+    return moves
@@ -1,22 +1,206 @@
+"""分数管理
+
+最高分在进程内缓存，只在第一次用到时从磁盘加载。破纪录时把新分数追加到日志文件，
+日志条数多了再合并进 high_scores.json：先写临时文件再原子替换，写到一半崩溃也不会丢掉已有的分数。
+读写磁盘时持有文件锁，同时运行多个游戏进程也不会互相覆盖。
+"""
+import atexit
 import json
 import os
+import time
 
-SCORES_FILE = "high_scores.json"
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-def load_scores():
-    """加载历史最高分数"""
-    if os.path.exists(SCORES_FILE):
+SCORES_FILE = "high_scores.json"  # 合并后的快照
+JOURNAL_FILE = "high_scores.journal"  # 追加写入的新纪录，每行一条 JSON
+LOCK_FILE = "high_scores.lock"  # 只用来加锁的空文件
+DEFAULT_SCORES = {"snake": 0, "tetris": 0, "minesweeper": 0}
+FSYNC_INTERVAL = 1.0  # 距上次 fsync 不到这么多秒时先不 fsync，留到下一次保存或退出时
+COMPACT_ENTRIES = 64  # 日志超过这么多条时合并进快照
+
+
+class FileLock:
+    """跨进程的建议锁：Unix 用 fcntl.flock，Windows 用 msvcrt.locking 锁住锁文件的第一个字节
+
+    锁文件建不了（例如目录只读）时不加锁，只读分数的情况不受影响。
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        try:
+            self.file = open(self.path, 'a+b')
+        except OSError:
+            return self
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+
+class ScoreStore:
+    """最高分的内存缓存，加上磁盘上的快照和只追加的日志"""
+    def __init__(self, path=SCORES_FILE, journal_path=JOURNAL_FILE, lock_path=LOCK_FILE,
+                 compact_entries=COMPACT_ENTRIES):
+        self.path = path
+        self.journal_path = journal_path
+        self.lock_path = lock_path
+        self.compact_entries = compact_entries
+        self.scores = None  # 第一次用到时加载
+        self.snapshot_id = None  # 快照的 (inode, 大小, 修改时间)，其他进程合并过日志时会变
+        self.offset = 0  # 日志中已经读过的字节数
+        self.entries = 0  # 日志中的条数
+        self.tail = 0  # 日志末尾不完整的字节数（写到一半时崩溃）
+        self.journal = None  # 以追加模式打开的日志，退出时 fsync
+        self.last_sync = 0.0
+        self.unsynced = False
+
+    def load(self):
+        """返回缓存的分数，第一次调用时从磁盘加载"""
+        if self.scores is None:
+            with FileLock(self.lock_path):
+                self.reload()
+        return self.scores
+
+    def reload(self):
+        """读取快照再重放整个日志，调用时要持有锁"""
+        scores = dict(DEFAULT_SCORES)
+        try:
+            with open(self.path, 'r') as f:
+                self.snapshot_id = self.identify(os.fstat(f.fileno()))
+                saved = json.load(f)
+            if isinstance(saved, dict):
+                scores.update(saved)
+        except (OSError, ValueError):
+            self.snapshot_id = None
+        self.scores = scores
+        self.offset = self.entries = 0
+        self.replay()
+
+    @staticmethod
+    def identify(stat):
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def replay(self):
+        """读入日志中新增的记录（可能是其他进程写的），调用时要持有锁；快照换过时重新加载"""
+        try:
+            snapshot_id = self.identify(os.stat(self.path))
+        except OSError:
+            snapshot_id = None
+        if snapshot_id != self.snapshot_id:
+            self.reload()
+            return
         try:
-            with open(SCORES_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {"snake": 0, "tetris": 0, "minesweeper": 0}
-    return {"snake": 0, "tetris": 0, "minesweeper": 0}
+            with open(self.journal_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self.offset:
+                    self.reload()
+                    return
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        complete = data[:data.rfind(b"\n") + 1]  # 最后一行不完整时先不读
+        self.offset += len(complete)
+        self.tail = len(data) - len(complete)
+        for line in complete.splitlines():
+            try:
+                entry = json.loads(line)
+                self.merge(entry["game"], entry["score"])
+            except (ValueError, KeyError, TypeError):
+                continue  # 崩溃时写坏的行
+            self.entries += 1
+
+    def merge(self, game_name, score):
+        if score > self.scores.get(game_name, 0):
+            self.scores[game_name] = score
+
+    def save(self, game_name, score):
+        """破纪录时追加到日志，否则不碰磁盘"""
+        if score <= self.load().get(game_name, 0):
+            return
+        with FileLock(self.lock_path):
+            self.replay()  # 其他进程可能刚存过更高的分数
+            if score <= self.scores.get(game_name, 0):
+                return
+            self.scores[game_name] = score
+            line = (json.dumps({"game": game_name, "score": score}) + "\n").encode()
+            if self.tail:
+                line = b"\n" + line  # 把上次崩溃留下的半行单独隔开
+            if self.journal is None:
+                self.journal = open(self.journal_path, 'ab')
+            self.journal.write(line)
+            self.journal.flush()  # 交给操作系统，进程崩溃也不会丢
+            self.offset += self.tail + len(line)
+            self.tail = 0
+            self.entries += 1
+            self.unsynced = True
+            if self.entries >= self.compact_entries:
+                self.compact()
+            elif time.monotonic() - self.last_sync >= FSYNC_INTERVAL:
+                self.sync()
+
+    def sync(self):
+        """把日志 fsync 到磁盘，断电也不会丢"""
+        if self.unsynced and self.journal is not None:
+            os.fsync(self.journal.fileno())
+            self.unsynced = False
+            self.last_sync = time.monotonic()
+
+    def compact(self):
+        """把日志合并进快照，调用时要持有锁
+
+        先写临时文件并 fsync，再原子替换快照，最后清空日志。清空之前崩溃的话，
+        下次加载会重放一遍已经在快照里的记录，取最大值不受影响。
+        """
+        temp = self.path + ".tmp"
+        with open(temp, 'w') as f:
+            json.dump(self.scores, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+        with open(self.journal_path, 'r+b') as f:
+            f.truncate(0)
+            os.fsync(f.fileno())
+        self.snapshot_id = self.identify(os.stat(self.path))
+        self.offset = self.entries = self.tail = 0
+        self.unsynced = False
+
+    def close(self):
+        """退出时 fsync 还没落盘的日志"""
+        if self.journal is not None:
+            self.sync()
+            self.journal.close()
+            self.journal = None
+
+
+store = ScoreStore()
+atexit.register(store.close)
+
+
+def load_scores():
+    """历史最高分数（内存中的副本）"""
+    return dict(store.load())
+
 
 def save_score(game_name: str, score: int):
     """保存新的最高分数"""
-    scores = load_scores()
-    if score > scores.get(game_name, 0):
-        scores[game_name] = score
-        with open(SCORES_FILE, 'w') as f:
-            json.dump(scores, f) 
\ No newline at end of file
+    store.save(game_name, score)
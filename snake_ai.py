@@ -0,0 +1,127 @@
+"""贪吃蛇自动驾驶：沿哈密顿环行走，并在安全时抄近路去吃食物（不依赖 pygame）"""
+from array import array
+from collections import deque
+
+from snake_core import DIRECTIONS
+
+
+def hamiltonian_cycle(grid_width, grid_height):
+    """返回经过棋盘每个格子恰好一次的环（格子编号列表），要求宽或高为偶数
+
+    高为偶数时：先走完第 0 行，然后在第 1 列及以右蛇形往返，最后沿第 0 列回到起点。
+    """
+    if grid_height % 2 == 1:
+        if grid_width % 2 == 1:
+            raise ValueError("棋盘宽和高都是奇数时不存在哈密顿环")
+        # 转置后构造，再换回原坐标
+        return [(c % grid_height) * grid_width + c // grid_height
+                for c in hamiltonian_cycle(grid_height, grid_width)]
+    if grid_width < 2:
+        raise ValueError("棋盘宽度至少为 2")
+    path = [(x, 0) for x in range(grid_width)]
+    for y in range(1, grid_height):
+        xs = range(grid_width - 1, 0, -1) if y % 2 == 1 else range(1, grid_width)
+        path.extend((x, y) for x in xs)
+    path.extend((0, y) for y in range(grid_height - 1, 0, -1))
+    return [y * grid_width + x for x, y in path]
+
+
+class Autopilot:
+    """基于哈密顿环的贪吃蛇求解器，可直接作为 run_games 的策略函数使用
+
+    蛇身始终位于环上从蛇尾到蛇头的一段之内，因此沿环前进永远安全；
+    只有当跳过的格子都在蛇头与蛇尾之间的空白区域、且不会越过食物时才抄近路。
+    每次决策只检查四个相邻格子，耗时与棋盘大小和蛇长无关。
+    玩家操作到一半才交给自动驾驶时蛇身不一定在环上，这时先用 recover_direction 走回环上。
+    """
+    SAFETY_MARGIN = 3  # 抄近路时与蛇尾之间额外保留的格子数
+
+    def __init__(self, grid_width, grid_height):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.size = grid_width * grid_height
+        self.path = array('i', hamiltonian_cycle(grid_width, grid_height))
+        self.order = array('i', bytes(4 * self.size))  # 格子 -> 在环上的序号
+        for i, cell in enumerate(self.path):
+            self.order[cell] = i
+
+    def __call__(self, game):
+        return self.next_direction(game)
+
+    def next_direction(self, game):
+        snake = game.snake
+        w, h, n, order = self.grid_width, self.grid_height, self.size, self.order
+        hx, hy = snake.positions[0]
+        tx, ty = snake.positions[-1]
+        head = order[hy * w + hx]
+        # 蛇头沿环向前到蛇尾之间的距离，这一段全是空格子
+        to_tail = (order[ty * w + tx] - head) % n or n
+
+        allowed = 1
+        # 棋盘过半后只沿环走，保证最终能填满
+        if game.food.position is not None and snake.length * 2 < n:
+            fx, fy = game.food.position
+            to_food = (order[fy * w + fx] - head) % n
+            growth = snake.length - len(snake.positions)
+            allowed = max(1, min(to_food, to_tail - growth - self.SAFETY_MARGIN))
+
+        best, best_distance = None, 0
+        for dx, dy in DIRECTIONS:
+            cell = ((hx + dx) % w, (hy + dy) % h)
+            if cell in snake.occupied:
+                continue
+            distance = (order[cell[1] * w + cell[0]] - head) % n
+            if best_distance < distance <= allowed:
+                best, best_distance = (dx, dy), distance
+        return best
+
+    def aligned(self, snake):
+        """蛇身是否位于环上从蛇尾到蛇头的一段之内：从蛇头往蛇尾数，每一节沿环倒退的距离严格递增"""
+        w, n, order = self.grid_width, self.size, self.order
+        hx, hy = snake.positions[0]
+        head = order[hy * w + hx]
+        last = -1
+        for x, y in snake.positions:
+            back = (head - order[y * w + x]) % n
+            if back <= last:
+                return False
+            last = back
+        return True
+
+    def recover_direction(self, game):
+        """蛇身不在环上时使用，返回 (方向, 是否走向环上的下一格)，无路可走时方向为 None
+
+        对每个不会撞上的方向做有上限的洪水填充：环上的下一格能走到的空格子不少于蛇长时就走它，
+        否则走能走到的空格子最多的方向。连续沿环走过整条蛇身后，蛇身就回到了环上。
+        """
+        snake = game.snake
+        w, h, order = self.grid_width, self.grid_height, self.order
+        hx, hy = snake.positions[0]
+        successor = self.path[(order[hy * w + hx] + 1) % self.size]
+        limit = snake.length + 1
+        best, best_area, best_on_cycle = None, 0, False
+        for dx, dy in DIRECTIONS:
+            cell = ((hx + dx) % w, (hy + dy) % h)
+            if cell in snake.occupied:
+                continue
+            area = self._reachable(cell, snake.occupied, limit)
+            on_cycle = cell[1] * w + cell[0] == successor
+            if on_cycle and area >= limit:
+                return (dx, dy), True
+            if area > best_area:
+                best, best_area, best_on_cycle = (dx, dy), area, on_cycle
+        return best, best_on_cycle
+
+    def _reachable(self, start, occupied, limit):
+        """从 start 出发不穿过蛇身能走到的格子数，数到 limit 就停"""
+        w, h = self.grid_width, self.grid_height
+        seen = {start}
+        queue = deque([start])
+        while queue and len(seen) < limit:
+            x, y = queue.popleft()
+            for dx, dy in DIRECTIONS:
+                cell = ((x + dx) % w, (y + dy) % h)
+                if cell not in seen and cell not in occupied:
+                    seen.add(cell)
+                    queue.append(cell)
+        return min(len(seen), limit)
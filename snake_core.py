@@ -0,0 +1,394 @@
+"""贪吃蛇核心逻辑（不依赖 pygame，可无界面批量运行）"""
+import random
+from array import array
+from collections import deque
+
+# 默认棋盘大小（格子数），与 800x600 窗口、20 像素格子对应
+GRID_WIDTH = 40
+GRID_HEIGHT = 30
+
+# 定义方向
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+
+# 超过这个格子数的棋盘，空闲格子索引改用稀疏存储
+DENSE_FREE_CELLS_LIMIT = 1 << 22
+
+
+class _Identity(dict):
+    """只保存与恒等映射不同的项，未写入过的键映射到自身"""
+    def __missing__(self, key):
+        return key
+
+
+class FreeCells:
+    """空闲格子索引：交换删除数组 + 位置映射，增删和均匀随机抽取都是 O(1)
+
+    cells 的前 count 个元素是空闲格子，其余是被占用的格子；
+    index 记录每个格子在 cells 中的下标。格子编号为 y * 宽度 + x。
+    超大棋盘上两者都从恒等映射开始，只记录被交换过的格子，
+    内存随蛇走过的区域增长，而不是随棋盘大小增长。
+    """
+    def __init__(self, size):
+        if size > DENSE_FREE_CELLS_LIMIT:
+            self.cells = _Identity()
+            self.index = _Identity()
+        else:
+            self.cells = array('i', range(size))
+            self.index = array('i', range(size))
+        self.count = size
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, cell):
+        return self.index[cell] < self.count
+
+    def remove(self, cell):
+        """标记格子被占用：与最后一个空闲格子交换位置"""
+        cells, index = self.cells, self.index
+        self.count -= 1
+        i, last = index[cell], self.count
+        other = cells[last]
+        cells[i] = other
+        index[other] = i
+        cells[last] = cell
+        index[cell] = last
+
+    def add(self, cell):
+        """标记格子重新空闲：与第一个被占用的格子交换位置"""
+        cells, index = self.cells, self.index
+        i, first = index[cell], self.count
+        other = cells[first]
+        cells[i] = other
+        index[other] = i
+        cells[first] = cell
+        index[cell] = first
+        self.count += 1
+
+    def choice(self, rng=random):
+        """均匀随机返回一个空闲格子，没有空闲格子时返回 None"""
+        if self.count == 0:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+
+class Snake:
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.reset()
+
+    def get_head_position(self):
+        return self.positions[0]
+
+    def turn(self, direction):
+        """改变方向，蛇身长于一格时不允许直接掉头"""
+        x, y = self.direction
+        if len(self.positions) > 1 and direction == (-x, -y):
+            return False
+        self.direction = direction
+        return True
+
+    def update(self):
+        # 蛇身用格子坐标的双端队列保存，另用集合记录占用的格子，
+        # 头部插入、尾部弹出和碰撞检测都是 O(1)，与蛇长无关
+        cur = self.positions[0]
+        x, y = self.direction
+        new = ((cur[0] + x) % self.grid_width, (cur[1] + y) % self.grid_height)
+        if new in self.occupied:
+            return False
+        self.positions.appendleft(new)
+        self.occupied.add(new)
+        self.free_cells.remove(new[1] * self.grid_width + new[0])
+        if len(self.positions) > self.length:
+            tail = self.positions.pop()
+            self.occupied.discard(tail)
+            self.free_cells.add(tail[1] * self.grid_width + tail[0])
+        return True
+
+    def reset(self):
+        self.length = 1
+        start = (self.grid_width//2, self.grid_height//2)
+        self.positions = deque([start])
+        self.occupied = {start}
+        self.free_cells = FreeCells(self.grid_width * self.grid_height)
+        self.free_cells.remove(start[1] * self.grid_width + start[0])
+        self.direction = RIGHT  # 重置方向为向右
+        self.score = 0
+
+
+class Food:
+    def __init__(self, snake=None, rng=random):
+        self.position = (0, 0)
+        self.rng = rng
+        self.randomize_position(snake)
+
+    def randomize_position(self, snake=None):
+        if snake is None:
+            self.position = (self.rng.randint(0, GRID_WIDTH - 1),
+                             self.rng.randint(0, GRID_HEIGHT - 1))
+        else:
+            # 只在蛇身以外的空闲格子中生成，棋盘再满也是常数时间
+            cell = snake.free_cells.choice(self.rng)
+            if cell is None:
+                self.position = None  # 棋盘已被蛇占满
+            else:
+                self.position = (cell % snake.grid_width, cell // snake.grid_width)
+
+
+class SnakeGame:
+    """一局贪吃蛇的完整规则，每次 step 推进一格，与帧率无关"""
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, seed=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """开始新的一局，相同的 seed 得到相同的食物序列"""
+        self.rng = random.Random(seed)
+        self.snake = Snake(self.grid_width, self.grid_height)
+        self.food = Food(self.snake, self.rng)
+        self.steps = 0
+        self.done = False
+
+    @property
+    def score(self):
+        return self.snake.score
+
+    def step(self, action=None):
+        """转向 action（None 表示保持方向）并前进一格，返回 (是否吃到食物, 是否结束)"""
+        snake = self.snake
+        if action is not None:
+            snake.turn(action)
+        self.steps += 1
+        if not snake.update():
+            self.done = True
+            return False, True
+        if snake.positions[0] == self.food.position:
+            snake.length += 1
+            snake.score += 1
+            self.food.randomize_position(snake)
+            if self.food.position is None:
+                self.done = True  # 蛇占满了整个棋盘
+            return True, self.done
+        return False, False
+
+
+class ArenaSnake(Snake):
+    """竞技场中的一条蛇，占用的格子记录在 Arena.owner 中，不再单独维护空闲格子索引"""
+    def __init__(self, snake_id, start, direction=RIGHT, length=1):
+        self.id = snake_id
+        self.positions = deque([start])
+        self.direction = direction
+        self.length = length
+        self.score = 0
+
+
+class Arena:
+    """多条蛇共用一个棋盘的规则，每次 step 所有蛇同时前进一格
+
+    owner 记录每个被占用格子属于哪条蛇，撞到别的蛇、撞到自己和头碰头都只查这一张表，
+    每个 tick 的开销与蛇的数量成正比，与蛇的数量的平方无关。死掉的蛇整条变成食物。
+    step 返回本 tick 的变化（新蛇头、弹出的蛇尾、死亡、食物增减），便于只传输增量。
+    """
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, food_count=1,
+                 start_length=3, seed=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.food_count = food_count  # 棋盘上至少保持的食物数量
+        self.start_length = start_length
+        self.rng = random.Random(seed)
+        self.snakes = {}  # 蛇的编号 -> ArenaSnake，只包含活着的蛇
+        self.owner = {}  # 被蛇占用的格子 -> 蛇的编号
+        self.food = set()
+        # 既没有蛇也没有食物的格子，用于均匀随机地放置食物和新蛇
+        self.free_cells = FreeCells(grid_width * grid_height)
+        self.ticks = 0
+        self._next_id = 0
+        self._events = self._new_events()
+        self._fill_food()
+
+    @staticmethod
+    def _new_events():
+        return {
+            "spawns": [],  # (蛇的编号, 出生格子)
+            "heads": [],  # (蛇的编号, 新蛇头格子)
+            "tails": [],  # 弹出了一节蛇尾的蛇的编号
+            "deaths": [],  # 死亡或被移除的蛇的编号
+            "food_added": [],
+            "food_removed": [],
+        }
+
+    def _cell(self, position):
+        return position[1] * self.grid_width + position[0]
+
+    def _position(self, cell):
+        return (cell % self.grid_width, cell // self.grid_width)
+
+    def _fill_food(self):
+        while len(self.food) < self.food_count:
+            cell = self.free_cells.choice(self.rng)
+            if cell is None:
+                return
+            self.free_cells.remove(cell)
+            position = self._position(cell)
+            self.food.add(position)
+            self._events["food_added"].append(position)
+
+    def add_snake(self):
+        """在随机空格子上放一条新蛇，返回它的编号，棋盘已满时返回 None"""
+        cell = self.free_cells.choice(self.rng)
+        if cell is None:
+            return None
+        self.free_cells.remove(cell)
+        snake_id = self._next_id
+        self._next_id += 1
+        start = self._position(cell)
+        self.snakes[snake_id] = ArenaSnake(snake_id, start, self.rng.choice(DIRECTIONS),
+                                           self.start_length)
+        self.owner[start] = snake_id
+        self._events["spawns"].append((snake_id, start))
+        return snake_id
+
+    def remove_snake(self, snake_id):
+        """移除一条蛇（例如玩家断线），蛇身同样变成食物"""
+        snake = self.snakes.pop(snake_id, None)
+        if snake is not None:
+            self._drop_body(snake)
+
+    def _drop_body(self, snake):
+        owner, food, added = self.owner, self.food, self._events["food_added"]
+        for position in snake.positions:
+            del owner[position]
+            food.add(position)  # 格子仍不在 free_cells 中，只是从蛇身变成了食物
+            added.append(position)
+        self._events["deaths"].append(snake.id)
+
+    def step(self, actions=None):
+        """actions 为 蛇的编号 -> 方向（缺省保持方向），所有蛇前进一格，返回本 tick 的变化"""
+        w, h = self.grid_width, self.grid_height
+        owner, snakes = self.owner, self.snakes
+        if actions:
+            for snake_id, direction in actions.items():
+                snake = snakes.get(snake_id)
+                if snake is not None and direction is not None:
+                    snake.turn(direction)
+
+        # 先算出所有新蛇头，再统一判定碰撞，结果与蛇的遍历顺序无关
+        moves = {}  # 新蛇头 -> 蛇的编号
+        dead = set()
+        for snake_id, snake in snakes.items():
+            x, y = snake.positions[0]
+            dx, dy = snake.direction
+            new = ((x + dx) % w, (y + dy) % h)
+            if new in owner:
+                dead.add(snake_id)  # 撞到蛇身（包括还没离开的蛇尾）
+            elif new in moves:
+                dead.add(snake_id)  # 头碰头，两条蛇都死
+                dead.add(moves[new])
+            else:
+                moves[new] = snake_id
+
+        for snake_id in dead:
+            self._drop_body(snakes.pop(snake_id))
+
+        events = self._events
+        food, free = self.food, self.free_cells
+        for new, snake_id in moves.items():
+            if snake_id in dead:
+                continue
+            snake = snakes[snake_id]
+            snake.positions.appendleft(new)
+            owner[new] = snake_id
+            events["heads"].append((snake_id, new))
+            if new in food:
+                food.discard(new)
+                events["food_removed"].append(new)
+                snake.length += 1
+                snake.score += 1
+            else:
+                free.remove(self._cell(new))
+            if len(snake.positions) > snake.length:
+                tail = snake.positions.pop()
+                del owner[tail]
+                free.add(self._cell(tail))
+                events["tails"].append(snake_id)
+
+        self.ticks += 1
+        self._fill_food()
+        self._events = self._new_events()
+        return events
+
+
+def greedy_policy(game):
+    """简单的示例机器人：优先朝食物走，否则选择任意不会立即撞上的方向"""
+    snake = game.snake
+    hx, hy = snake.positions[0]
+    w, h = snake.grid_width, snake.grid_height
+    safe = []
+    for dx, dy in DIRECTIONS:
+        cell = ((hx + dx) % w, (hy + dy) % h)
+        if cell not in snake.occupied:
+            if cell == game.food.position:
+                return (dx, dy)
+            safe.append((dx, dy))
+    if not safe:
+        return None
+    fx, fy = game.food.position
+    # 在环形棋盘上选择离食物最近的安全方向
+    return min(safe, key=lambda d: (min((hx + d[0] - fx) % w, (fx - hx - d[0]) % w) +
+                                    min((hy + d[1] - fy) % h, (fy - hy - d[1]) % h)))
+
+
+def arena_bot(arena, snake, rng=random, sight=3):
+    """竞技场里的简单机器人：不走会立即撞上的格子，视野内有食物就靠近，否则大体保持方向
+
+    只在蛇头周围 sight 圈以内随机查看少量格子，每次决策的开销是常数。
+    """
+    hx, hy = snake.positions[0]
+    w, h = arena.grid_width, arena.grid_height
+    owner, food = arena.owner, arena.food
+    safe = []
+    for dx, dy in DIRECTIONS:
+        cell = ((hx + dx) % w, (hy + dy) % h)
+        if cell not in owner:
+            if cell in food:
+                return (dx, dy)
+            safe.append((dx, dy))
+    if not safe:
+        return None
+    for radius in range(2, sight + 1):
+        for _ in range(2):
+            # 每圈随机抽两个格子，不必扫描整个视野
+            fx = rng.randint(-radius, radius)
+            fy = rng.choice((-radius, radius))
+            if rng.random() < 0.5:
+                fx, fy = fy, fx
+            if ((hx + fx) % w, (hy + fy) % h) in food:
+                return max(safe, key=lambda d: d[0] * fx + d[1] * fy)
+    if snake.direction in safe and rng.random() > 0.1:
+        return snake.direction
+    return rng.choice(safe)
+
+
+def run_games(policy, seeds, max_steps=100000, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """按给定种子依次无界面地运行多局游戏，返回每局的统计数据"""
+    game = SnakeGame(grid_width, grid_height)
+    results = []
+    for seed in seeds:
+        game.reset(seed)
+        step = game.step
+        done = False
+        while not done and game.steps < max_steps:
+            done = step(policy(game))[1]
+        results.append({
+            "seed": seed,
+            "score": game.score,
+            "length": len(game.snake.positions),
+            "steps": game.steps,
+        })
+    return results
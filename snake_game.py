@@ -1,7 +1,11 @@
 import pygame
 import random
 import sys
+import time
+from collections import deque
 import scores
+from snake_ai import Autopilot
+from snake_core import GRID_WIDTH, GRID_HEIGHT, UP, DOWN, LEFT, RIGHT, Arena, SnakeGame, arena_bot
 
 # 初始化 Pygame
 pygame.init()
@@ -52,75 +56,136 @@ START_BTN_COLOR = ORANGE  # 开始按钮使用橙色
 START_BTN_HOVER = ORANGE_HOVER  # 开始按钮悬停色
 BUTTON_TEXT = WHITE  # 开始按钮文字保持白色
 BUTTON_BORDER = (200, 200, 200)  # 按钮边框和阴影颜色
+DEMO_COLOR = (230, 230, 230)  # 开始界面演示蛇的颜色
 
 # 设置游戏窗口
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 BLOCK_SIZE = 20
 GAME_SPEED = 15
+MOVES_PER_SECOND = 10  # 蛇每秒移动的格数，与绘制帧率无关
+DEMO_MOVES_PER_SECOND = 30  # 开始界面演示动画的速度
+RENDER_FPS = 60  # 绘制帧率
+INPUT_BUFFER_SIZE = 3  # 最多缓存的方向输入数
+MAX_FRAME_TIME = 0.25  # 单帧最多推进的时间（秒），避免窗口卡顿后连走多步
+VIEW_WIDTH = WINDOW_WIDTH // BLOCK_SIZE  # 视口宽度（格子数）
+VIEW_HEIGHT = WINDOW_HEIGHT // BLOCK_SIZE  # 视口高度（格子数）
+HUGE_GRID_WIDTH = 1000  # 超大地图的棋盘大小，最大支持 10000x10000
+HUGE_GRID_HEIGHT = 1000
+GRID_LINE_SPACING = 5  # 超大地图参考线间隔（格子数）
+AUTOPILOT_MAX_CELLS = 1000000  # 超过这个格子数的棋盘不提供自动驾驶
+ROYALE_GRID_SIZE = 500  # 大逃杀棋盘边长（格子数）
+ROYALE_SNAKES = 500  # 大逃杀中蛇的总数（一名玩家，其余是机器人）
+ROYALE_FOOD = 2000  # 大逃杀棋盘上至少保持的食物数量
 
-# 创建游戏窗口
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption('贪吃蛇游戏')
-clock = pygame.time.Clock()
-
-class Snake:
-    def __init__(self):
-        self.length = 1
-        self.positions = [(WINDOW_WIDTH//2, WINDOW_HEIGHT//2)]
-        self.direction = RIGHT  # 设置初始方向向右
-        self.color = random.choice(SNAKE_COLORS)  # 随机选择颜色
-        self.score = 0
-        self.is_moving = True  # 默认开始移动
-
-    def get_head_position(self):
-        return self.positions[0]
-
-    def update(self):
-        cur = self.get_head_position()
-        x, y = self.direction
-        new = ((cur[0] + (x*BLOCK_SIZE)) % WINDOW_WIDTH, (cur[1] + (y*BLOCK_SIZE)) % WINDOW_HEIGHT)
-        if new in self.positions[3:]:
+# 方向键与方向的对应关系
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+
+class DirectionQueue:
+    """有界的方向输入队列，快速连按的多个方向会在之后的各个 tick 中逐个生效"""
+    def __init__(self, maxlen=INPUT_BUFFER_SIZE):
+        self.maxlen = maxlen
+        self.directions = deque()
+
+    def push(self, direction, snake):
+        # 与队尾（或当前方向）比较，忽略重复方向和掉头
+        last = self.directions[-1] if self.directions else snake.direction
+        if direction == last or (len(snake.positions) > 1 and direction == (-last[0], -last[1])):
             return False
-        else:
-            self.positions.insert(0, new)
-            if len(self.positions) > self.length:
-                self.positions.pop()
-            # 每次吃到食物时改变颜色
-            if len(self.positions) > self.length:
-                self.color = random.choice(SNAKE_COLORS)
-            return True
-
-    def reset(self):
-        self.length = 1
-        self.positions = [(WINDOW_WIDTH//2, WINDOW_HEIGHT//2)]
-        self.direction = RIGHT  # 重置方向为向右
-        self.score = 0
-        self.is_moving = True  # 重置为开始移动
+        if len(self.directions) >= self.maxlen:
+            return False
+        self.directions.append(direction)
+        return True
 
-    def draw(self, surface):
-        for p in self.positions:
-            pygame.draw.rect(surface, self.color, (p[0], p[1], BLOCK_SIZE, BLOCK_SIZE))
+    def pop(self):
+        return self.directions.popleft() if self.directions else None
 
-class Food:
-    def __init__(self):
-        self.position = (0, 0)
-        self.color = random.choice(SNAKE_COLORS)  # 随机选择颜色
-        self.randomize_position()
+    def clear(self):
+        self.directions.clear()
 
-    def randomize_position(self):
-        self.position = (random.randint(0, (WINDOW_WIDTH-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE,
-                        random.randint(0, (WINDOW_HEIGHT-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE)
-        self.color = random.choice(SNAKE_COLORS)  # 每次重新生成时改变颜色
+class Camera:
+    """视口：棋盘比窗口大时跟随蛇头滚动，只绘制落在视口内的格子"""
+    def __init__(self, grid_width, grid_height, view_width=VIEW_WIDTH, view_height=VIEW_HEIGHT):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.view_width = min(view_width, grid_width)
+        self.view_height = min(view_height, grid_height)
+        self.follow = grid_width > view_width or grid_height > view_height
+        self.x = 0  # 视口左上角对应的棋盘格子
+        self.y = 0
 
-    def draw(self, surface):
-        pygame.draw.rect(surface, self.color, (self.position[0], self.position[1], BLOCK_SIZE, BLOCK_SIZE))
+    def update(self, head):
+        if self.follow:
+            self.x = (head[0] - self.view_width // 2) % self.grid_width
+            self.y = (head[1] - self.view_height // 2) % self.grid_height
+
+    def to_screen(self, cell):
+        """棋盘格子 -> 视口内的格子坐标，不在视口内时返回 None（棋盘穿墙相连）"""
+        sx = (cell[0] - self.x) % self.grid_width
+        sy = (cell[1] - self.y) % self.grid_height
+        if sx < self.view_width and sy < self.view_height:
+            return sx, sy
+        return None
+
+    def visible_cells(self):
+        """依次给出视口内每个格子的 (视口坐标, 棋盘坐标)"""
+        for sy in range(self.view_height):
+            y = (self.y + sy) % self.grid_height
+            for sx in range(self.view_width):
+                yield (sx, sy), ((self.x + sx) % self.grid_width, y)
+
+def draw_cell(surface, color, screen_cell):
+    pygame.draw.rect(surface, color, (screen_cell[0]*BLOCK_SIZE, screen_cell[1]*BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+
+def draw_snake(surface, snake, color, camera):
+    # 蛇比视口短时逐节检查，否则逐个检查视口内的格子是否被占用，
+    # 两种方式的开销都不超过视口格子数，与蛇长和棋盘大小无关
+    if len(snake.positions) <= camera.view_width * camera.view_height:
+        for p in snake.positions:
+            screen_cell = camera.to_screen(p)
+            if screen_cell is not None:
+                draw_cell(surface, color, screen_cell)
+    else:
+        occupied = snake.occupied
+        for screen_cell, cell in camera.visible_cells():
+            if cell in occupied:
+                draw_cell(surface, color, screen_cell)
+
+def draw_food(surface, food, color, camera):
+    if food.position is None:
+        return
+    screen_cell = camera.to_screen(food.position)
+    if screen_cell is not None:
+        draw_cell(surface, color, screen_cell)
 
-# 定义方向
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
+def food_hint(game):
+    """返回指向食物的方向箭头和距离（环形棋盘上的最短路线），食物在视口内时返回 None"""
+    hx, hy = game.snake.get_head_position()
+    fx, fy = game.food.position
+    w, h = game.grid_width, game.grid_height
+    # 穿墙后的有符号最短偏移
+    dx = (fx - hx + w // 2) % w - w // 2
+    dy = (fy - hy + h // 2) % h - h // 2
+    if abs(dx) < VIEW_WIDTH // 2 and abs(dy) < VIEW_HEIGHT // 2:
+        return None
+    arrow = ("←" if dx < 0 else "→" if dx > 0 else "") + ("↑" if dy < 0 else "↓" if dy > 0 else "")
+    return f"食物 {arrow} {abs(dx) + abs(dy)} 格"
+
+def draw_grid(surface, camera):
+    """滚动时绘制随棋盘移动的参考线，方便看出蛇在前进"""
+    if not camera.follow:
+        return
+    for sx in range(camera.view_width):
+        if (camera.x + sx) % GRID_LINE_SPACING == 0:
+            pygame.draw.line(surface, LIGHT_GRAY, (sx*BLOCK_SIZE, 0), (sx*BLOCK_SIZE, WINDOW_HEIGHT))
+    for sy in range(camera.view_height):
+        if (camera.y + sy) % GRID_LINE_SPACING == 0:
+            pygame.draw.line(surface, LIGHT_GRAY, (0, sy*BLOCK_SIZE), (WINDOW_WIDTH, sy*BLOCK_SIZE))
 
 class Button:
     def __init__(self, x, y, width, height, text, icon=None, small=False, button_color=None, hover_color=None):
@@ -186,9 +251,100 @@ class Button:
                 return True
         return False
 
+def draw_arena(surface, arena, player_id, camera):
+    """逐个检查视口内的格子属于哪条蛇或是否有食物，开销与蛇的数量无关"""
+    owner, food = arena.owner, arena.food
+    for screen_cell, cell in camera.visible_cells():
+        snake_id = owner.get(cell)
+        if snake_id is not None:
+            color = BLACK if snake_id == player_id else SNAKE_COLORS[snake_id % len(SNAKE_COLORS)]
+            draw_cell(surface, color, screen_cell)
+        elif cell in food:
+            draw_cell(surface, GRAY, screen_cell)
+
+def battle_royale(screen, clock, back_btn):
+    """大逃杀：玩家与几百条机器人蛇在同一张大棋盘上，撞到别的蛇就出局，死掉的蛇变成食物
+
+    返回 False 表示关闭了窗口，True 表示返回开始界面。
+    """
+    arena = Arena(ROYALE_GRID_SIZE, ROYALE_GRID_SIZE, food_count=ROYALE_FOOD)
+    player_id = arena.add_snake()
+    for _ in range(ROYALE_SNAKES - 1):
+        arena.add_snake()
+    player = arena.snakes[player_id]
+    rng = random.Random()
+    camera = Camera(ROYALE_GRID_SIZE, ROYALE_GRID_SIZE)
+    inputs = DirectionQueue()
+    tick_interval = 1.0 / MOVES_PER_SECOND
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    result = None  # 结束后显示的文字
+
+    while True:
+        now = time.perf_counter()
+        accumulator += min(now - last_time, MAX_FRAME_TIME)
+        last_time = now
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if back_btn.handle_event(event):
+                return True
+            if event.type == pygame.KEYDOWN:
+                if result is not None and event.key == pygame.K_SPACE:
+                    return True
+                if event.key in KEY_DIRECTIONS:
+                    inputs.push(KEY_DIRECTIONS[event.key], player)
+
+        while result is None and accumulator >= tick_interval:
+            accumulator -= tick_interval
+            actions = {snake_id: arena_bot(arena, snake, rng)
+                       for snake_id, snake in arena.snakes.items() if snake_id != player_id}
+            actions[player_id] = inputs.pop()
+            arena.step(actions)
+            if player_id not in arena.snakes:
+                result = f"你被淘汰了！排名第 {len(arena.snakes) + 1}（按空格键返回）"
+            elif len(arena.snakes) == 1:
+                result = "大逃杀胜利！（按空格键返回）"
+
+        screen.fill(BACKGROUND)
+        camera.update(player.positions[0])
+        draw_grid(screen, camera)
+        draw_arena(screen, arena, player_id, camera)
+        game_font.render_to(screen, (10, 70), f'长度: {len(player.positions)}', BLACK)
+        small_font.render_to(screen, (10, 120), f'存活: {len(arena.snakes)} / {ROYALE_SNAKES}', GRAY)
+        if result is not None:
+            result_rect = game_font.get_rect(result)
+            game_font.render_to(screen, (WINDOW_WIDTH//2 - result_rect.width//2, WINDOW_HEIGHT//2),
+                                result, BLACK)
+        back_btn.draw(screen)
+        pygame.display.update()
+        clock.tick(RENDER_FPS)
+
 def main():
-    snake = Snake()
-    food = Food()
+    # 创建游戏窗口
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('贪吃蛇游戏')
+    clock = pygame.time.Clock()
+
+    game = SnakeGame()
+    snake_color = random.choice(SNAKE_COLORS)  # 随机选择颜色
+    food_color = random.choice(SNAKE_COLORS)
+    is_moving = True  # 默认开始移动
+    inputs = DirectionQueue()
+    tick_interval = 1.0 / MOVES_PER_SECOND
+    accumulator = 0.0  # 尚未用于推进游戏的时间
+    # 自动驾驶：开始界面播放演示，游戏中按 A 键开关
+    pilot = Autopilot(GRID_WIDTH, GRID_HEIGHT)
+    pilots = {(GRID_WIDTH, GRID_HEIGHT): pilot}  # 按棋盘大小缓存，超大地图第一次按 A 键时才构造
+    autopilot = False
+    autopilot_used = False  # 用过自动驾驶的一局不记录最高分
+    realign_steps = None  # 蛇身不在环上时，已经连续沿环走了几步；None 表示蛇身在环上
+    demo = SnakeGame()
+    demo_camera = Camera(GRID_WIDTH, GRID_HEIGHT)
+    camera = Camera(GRID_WIDTH, GRID_HEIGHT)
+    demo_accumulator = 0.0
+    last_time = time.perf_counter()
     running = True
     game_started = False
     high_score = scores.load_scores()["snake"]  # 加载最高分
@@ -203,7 +359,29 @@ def main():
         button_color=START_BTN_COLOR,
         hover_color=START_BTN_HOVER
     )
+
+    # 超大地图按钮：棋盘远大于窗口，视口跟随蛇头滚动
+    huge_btn = Button(
+        WINDOW_WIDTH//2 - 100,
+        WINDOW_HEIGHT//2 + 50,
+        200,
+        60,
+        "超大地图",
+        button_color=START_BTN_COLOR,
+        hover_color=START_BTN_HOVER
+    )
     
+    # 大逃杀按钮
+    royale_btn = Button(
+        WINDOW_WIDTH//2 - 100,
+        WINDOW_HEIGHT//2 + 130,
+        200,
+        60,
+        "大逃杀",
+        button_color=START_BTN_COLOR,
+        hover_color=START_BTN_HOVER
+    )
+
     # 创建返回按钮 - 使用灰色
     back_btn = Button(
         10,
@@ -218,6 +396,10 @@ def main():
     )
 
     while running:
+        now = time.perf_counter()
+        frame_time = min(now - last_time, MAX_FRAME_TIME)
+        last_time = now
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return
@@ -227,30 +409,58 @@ def main():
                 return  # 直接返回到游戏选择菜单
                 
             if not game_started:
+                grid_size = None
                 if start_btn.handle_event(event):
+                    grid_size = (GRID_WIDTH, GRID_HEIGHT)
+                elif huge_btn.handle_event(event):
+                    grid_size = (HUGE_GRID_WIDTH, HUGE_GRID_HEIGHT)
+                elif royale_btn.handle_event(event):
+                    if not battle_royale(screen, clock, back_btn):
+                        return
+                    last_time = time.perf_counter()
+                if grid_size is not None:
+                    if (game.grid_width, game.grid_height) != grid_size:
+                        game = SnakeGame(*grid_size)
+                        camera = Camera(*grid_size)
                     game_started = True
-                    snake.is_moving = True
+                    is_moving = True
+                    inputs.clear()
+                    accumulator = 0.0
+                    autopilot = autopilot_used = False
+                    realign_steps = None
                 continue
                 
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP and snake.direction != DOWN:
-                    snake.direction = UP
-                    snake.is_moving = True
-                elif event.key == pygame.K_DOWN and snake.direction != UP:
-                    snake.direction = DOWN
-                    snake.is_moving = True
-                elif event.key == pygame.K_LEFT and snake.direction != RIGHT:
-                    snake.direction = LEFT
-                    snake.is_moving = True
-                elif event.key == pygame.K_RIGHT and snake.direction != LEFT:
-                    snake.direction = RIGHT
-                    snake.is_moving = True
+                if event.key in KEY_DIRECTIONS:
+                    # 方向先进入队列，每个 tick 只取出一个
+                    if inputs.push(KEY_DIRECTIONS[event.key], game.snake):
+                        is_moving = True
                 elif event.key == pygame.K_SPACE:
-                    snake.is_moving = not snake.is_moving
+                    is_moving = not is_moving
+                elif event.key == pygame.K_a:
+                    grid_size = (game.grid_width, game.grid_height)
+                    if grid_size[0] * grid_size[1] > AUTOPILOT_MAX_CELLS:
+                        continue  # 棋盘太大，构造哈密顿环的内存和时间都不划算
+                    if grid_size not in pilots:
+                        pilots[grid_size] = Autopilot(*grid_size)
+                    autopilot = not autopilot
+                    autopilot_used = autopilot_used or autopilot
+                    # 玩家操作过的蛇身不一定在环上，直接沿环走可能撞上自己，先走回环上
+                    realign_steps = None if not autopilot or pilots[grid_size].aligned(game.snake) else 0
+                    inputs.clear()
 
         screen.fill(BACKGROUND)
         
         if not game_started:
+            # 0. 背景中的自动驾驶演示
+            demo_accumulator += frame_time
+            while demo_accumulator >= 1.0 / DEMO_MOVES_PER_SECOND:
+                demo_accumulator -= 1.0 / DEMO_MOVES_PER_SECOND
+                if demo.step(pilot(demo))[1]:
+                    demo.reset()
+            draw_snake(screen, demo.snake, DEMO_COLOR, demo_camera)
+            draw_food(screen, demo.food, DEMO_COLOR, demo_camera)
+
             # 1. 游戏标题
             title_text = "贪吃蛇"
             title_rect = game_font.get_rect(title_text)
@@ -273,35 +483,62 @@ def main():
             start_btn.rect.centerx = WINDOW_WIDTH//2
             start_btn.rect.centery = WINDOW_HEIGHT * 0.6  # 位于屏幕60%处
             start_btn.draw(screen)
+            huge_btn.rect.centerx = WINDOW_WIDTH//2
+            huge_btn.rect.centery = WINDOW_HEIGHT * 0.6 + 80
+            huge_btn.draw(screen)
+            royale_btn.rect.centerx = WINDOW_WIDTH//2
+            royale_btn.rect.centery = WINDOW_HEIGHT * 0.6 + 160
+            royale_btn.draw(screen)
         else:
-            # 游戏逻辑
-            if snake.is_moving:
-                if not snake.update():
+            # 游戏逻辑：固定时间步长，积累的时间每满一个间隔推进一格
+            if is_moving:
+                accumulator += frame_time
+            while game_started and accumulator >= tick_interval:
+                accumulator -= tick_interval
+                if not autopilot:
+                    action = inputs.pop()
+                elif realign_steps is None:
+                    action = pilots[game.grid_width, game.grid_height](game)
+                else:
+                    action, on_cycle = pilots[game.grid_width, game.grid_height].recover_direction(game)
+                    realign_steps = realign_steps + 1 if on_cycle else 0
+                ate, done = game.step(action)
+                if realign_steps is not None and realign_steps + 1 >= len(game.snake.positions):
+                    realign_steps = None  # 蛇身全部落在环上连续的一段
+                if ate:
+                    food_color = random.choice(SNAKE_COLORS)  # 每次重新生成时改变颜色
+                if done:
                     # 游戏结束时保存最高分
-                    scores.save_score("snake", snake.score)
-                    high_score = scores.load_scores()["snake"]  # 重新加载最高分
-                    snake.reset()
-                    food.randomize_position()
+                    if not autopilot_used:
+                        scores.save_score("snake", game.score)
+                        high_score = scores.load_scores()["snake"]  # 重新加载最高分
+                    game.reset()
+                    is_moving = True
                     game_started = False
-
-            if snake.get_head_position() == food.position:
-                snake.length += 1
-                snake.score += 1
-                food.randomize_position()
+                    realign_steps = None
 
             # 绘制游戏元素
-            snake.draw(screen)
-            food.draw(screen)
-            score_text = f'得分: {snake.score}'
+            camera.update(game.snake.get_head_position())
+            draw_grid(screen, camera)
+            draw_snake(screen, game.snake, snake_color, camera)
+            draw_food(screen, game.food, food_color, camera)
+            score_text = f'得分: {game.score}'
             high_score_text = f'最高分: {high_score}'
             game_font.render_to(screen, (10, 70), score_text, WHITE)
             game_font.render_to(screen, (10, 120), high_score_text, WHITE)  # 显示最高分
+            if autopilot:
+                small_font.render_to(screen, (10, 170), "自动驾驶中（按 A 键退出）", GRAY)
+            if camera.follow and game.food.position is not None:
+                # 食物不在视口内时提示方向和距离
+                hint = food_hint(game)
+                if hint is not None:
+                    small_font.render_to(screen, (10, 200), hint, GRAY)
         
         # 始终显示返回按钮
         back_btn.draw(screen)
         
         pygame.display.update()
-        clock.tick(10)
+        clock.tick(RENDER_FPS)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
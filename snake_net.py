@@ -0,0 +1,376 @@
+"""局域网多人贪吃蛇：asyncio 服务器持有权威棋盘，每个 tick 只广播二进制增量
+
+运行方式：
+    python snake_net.py server [--port 8765]
+    python snake_net.py client [--host 127.0.0.1] [--port 8765]
+
+协议（小端序）：
+- 客户端 -> 服务器：每次转向 3 字节，序号 uint16 + 方向（DIRECTIONS 下标）uint8。
+- 服务器 -> 客户端：每条消息前有 uint32 长度，首字节为消息类型。
+  'S' 完整快照，只在连接时发送一次；
+  'T' 每个 tick 的增量：出生的蛇、移动的蛇及其方向、没有弹出蛇尾（变长）的蛇、
+  死亡的蛇、食物增减。移动的方向每条蛇只占 1 字节，客户端自己推算新蛇头和蛇尾。
+  格子一律编码为 y * 宽度 + x 的 uint32，蛇的编号也是 uint32。
+"""
+import argparse
+import asyncio
+import struct
+import time
+from collections import deque
+
+from snake_core import DIRECTIONS, Arena
+
+DEFAULT_PORT = 8765
+TICK_RATE = 20  # 每秒 tick 数
+ARENA_WIDTH = 120  # 多人棋盘大小（格子数）
+ARENA_HEIGHT = 90
+ARENA_FOOD = 32  # 棋盘上至少保持的食物数量
+INPUT_WINDOW = 3  # 服务器为每个玩家缓冲、客户端预测的最多未确认转向数
+MAX_WRITE_BUFFER = 1 << 20  # 客户端积压超过这么多字节就断开，避免拖慢所有人
+NO_SNAKE = 0xFFFFFFFF  # 玩家当前没有蛇（死亡后等待下一个 tick 复活）
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+
+INPUT = struct.Struct('<HB')
+LENGTH = struct.Struct('<I')
+TICK_HEADER = struct.Struct('<cHI')  # 类型、已处理的最后一个转向序号、玩家当前的蛇
+TICK_COUNTS = struct.Struct('<IIIIIII')  # tick 以及出生、移动、变长、死亡、食物增、食物减的数量
+SNAPSHOT_HEADER = struct.Struct('<cHHIII')  # 类型、宽、高、tick、玩家的蛇、蛇的数量
+
+
+def encode_tick(arena, events):
+    """把 Arena.step 返回的变化编码为所有玩家共用的消息体"""
+    w, snakes = arena.grid_width, arena.snakes
+    spawns = events["spawns"]
+    moved = [snake_id for snake_id, _ in events["heads"]]
+    popped = set(events["tails"])
+    grown = [snake_id for snake_id in moved if snake_id not in popped]
+    values = []
+    for snake_id, (x, y) in spawns:
+        values += (snake_id, y * w + x)
+    values += moved
+    values += grown
+    values += events["deaths"]
+    values += [y * w + x for x, y in events["food_added"]]
+    values += [y * w + x for x, y in events["food_removed"]]
+    counts = TICK_COUNTS.pack(arena.ticks, len(spawns), len(moved), len(grown),
+                              len(events["deaths"]), len(events["food_added"]),
+                              len(events["food_removed"]))
+    # 移动后的方向就是这一步走的方向
+    directions = bytes(DIRECTION_INDEX[snakes[snake_id].direction] for snake_id in moved)
+    return counts + struct.pack(f'<{len(values)}I', *values) + directions
+
+
+def encode_snapshot(arena, snake_id):
+    """完整棋盘：每条蛇从蛇头到蛇尾的格子和目标长度，以及所有食物"""
+    w = arena.grid_width
+    values = []
+    for snake in arena.snakes.values():
+        values += (snake.id, snake.length, len(snake.positions))
+        values += [y * w + x for x, y in snake.positions]
+    values.append(len(arena.food))
+    values += [y * w + x for x, y in arena.food]
+    header = SNAPSHOT_HEADER.pack(b'S', arena.grid_width, arena.grid_height, arena.ticks,
+                                  NO_SNAKE if snake_id is None else snake_id, len(arena.snakes))
+    return header + struct.pack(f'<{len(values)}I', *values)
+
+
+class Player:
+    """服务器上的一个连接：缓冲的转向和当前控制的蛇"""
+    def __init__(self, writer):
+        self.writer = writer
+        self.snake_id = None
+        self.inputs = deque(maxlen=INPUT_WINDOW)  # (序号, 方向)
+        self.ack = 0  # 已经应用的最后一个转向序号
+
+
+class GameServer:
+    """权威服务器：固定频率推进 Arena，把同一份增量广播给所有玩家"""
+    def __init__(self, grid_width=ARENA_WIDTH, grid_height=ARENA_HEIGHT, food_count=ARENA_FOOD,
+                 tick_rate=TICK_RATE, seed=None):
+        self.arena = Arena(grid_width, grid_height, food_count, seed=seed)
+        self.tick_interval = 1.0 / tick_rate
+        self.players = set()
+        self.tick_times = deque(maxlen=1000)  # 最近每个 tick 的处理耗时（秒）
+        self.server = None
+
+    async def start(self, host='0.0.0.0', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._handle_client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def run(self):
+        """按固定时间步长循环 tick，某次处理超时后下一次立即补上，不累积误差"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick_interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self.tick()
+
+    def tick(self):
+        start = time.perf_counter()
+        arena = self.arena
+        actions = {}
+        for player in self.players:
+            if player.snake_id not in arena.snakes:
+                player.snake_id = arena.add_snake()  # 死亡的玩家在新的位置复活
+            if player.inputs:
+                player.ack, direction = player.inputs.popleft()
+                actions[player.snake_id] = DIRECTIONS[direction]
+        body = encode_tick(arena, arena.step(actions))
+
+        for player in list(self.players):
+            transport = player.writer.transport
+            if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                self._disconnect(player)
+                continue
+            snake_id = player.snake_id if player.snake_id in arena.snakes else NO_SNAKE
+            header = TICK_HEADER.pack(b'T', player.ack, snake_id)
+            player.writer.write(LENGTH.pack(len(header) + len(body)) + header + body)
+        self.tick_times.append(time.perf_counter() - start)
+
+    def _disconnect(self, player):
+        if player in self.players:
+            self.players.discard(player)
+            self.arena.remove_snake(player.snake_id)
+            player.writer.close()
+
+    async def _handle_client(self, reader, writer):
+        player = Player(writer)
+        player.snake_id = self.arena.add_snake()
+        self.players.add(player)
+        snapshot = encode_snapshot(self.arena, player.snake_id)
+        writer.write(LENGTH.pack(len(snapshot)) + snapshot)
+        try:
+            while True:
+                seq, direction = INPUT.unpack(await reader.readexactly(INPUT.size))
+                if direction < len(DIRECTIONS):
+                    player.inputs.append((seq, direction))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._disconnect(player)
+
+
+class GameClient:
+    """客户端：用服务器的快照和增量维护棋盘副本，并预测自己还没被确认的转向
+
+    predicted 是自己的蛇的预测位置：服务器最近发来的蛇身，再按顺序执行每个未确认的转向各走一格
+    （服务器每个 tick 应用一个转向）。按键后立即重算，转向不必等一个往返才出现在屏幕上；
+    收到 tick 时从服务器的蛇身重建，已确认的转向已经包含在其中，只重放仍未确认的。
+    """
+    def __init__(self):
+        self.grid_width = 0
+        self.grid_height = 0
+        self.ticks = 0
+        self.snakes = {}  # 蛇的编号 -> 从蛇头到蛇尾的格子双端队列
+        self.food = set()
+        self.snake_id = None
+        self.pending = deque()  # 已发送但服务器还没应用的 (序号, 方向)
+        self.predicted = None  # 自己的蛇预测的格子双端队列，没有蛇时为 None
+        self._seq = 0
+        self.bytes_received = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._apply(await self._read_message())
+
+    async def _read_message(self):
+        size, = LENGTH.unpack(await self.reader.readexactly(LENGTH.size))
+        self.bytes_received += LENGTH.size + size
+        return await self.reader.readexactly(size)
+
+    async def receive(self):
+        """读取并应用下一条消息，连接断开时抛出 asyncio.IncompleteReadError"""
+        self._apply(await self._read_message())
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    @property
+    def direction(self):
+        """预测的当前方向：最后一个未确认的转向，没有时用服务器上的蛇身推算"""
+        if self.pending:
+            return DIRECTIONS[self.pending[-1][1]]
+        body = self.snakes.get(self.snake_id)
+        if body is None or len(body) < 2:
+            return None
+        (hx, hy), (nx, ny) = body[0], body[1]
+        # 穿墙时相邻两节的坐标差会是棋盘宽度减一
+        dx = (hx - nx + 1) % self.grid_width - 1
+        dy = (hy - ny + 1) % self.grid_height - 1
+        return (dx, dy)
+
+    def send_direction(self, direction):
+        """发送转向；掉头、重复或预测窗口已满时忽略，返回是否发送"""
+        current = self.direction
+        if self.snake_id is None or direction == current:
+            return False
+        if current is not None and direction == (-current[0], -current[1]):
+            return False
+        if len(self.pending) >= INPUT_WINDOW:
+            return False
+        self._seq = (self._seq + 1) & 0xFFFF
+        self.pending.append((self._seq, DIRECTIONS.index(direction)))
+        self.writer.write(INPUT.pack(self._seq, DIRECTIONS.index(direction)))
+        self._predict()
+        return True
+
+    def _predict(self):
+        """从服务器的蛇身出发重放未确认的转向；预测吃到食物时不弹出蛇尾"""
+        body = self.snakes.get(self.snake_id)
+        if body is None:
+            self.predicted = None
+            return
+        predicted = deque(body)
+        w, h = self.grid_width, self.grid_height
+        for _, direction in self.pending:
+            (x, y), (dx, dy) = predicted[0], DIRECTIONS[direction]
+            head = ((x + dx) % w, (y + dy) % h)
+            predicted.appendleft(head)
+            if head not in self.food:
+                predicted.pop()
+        self.predicted = predicted
+
+    def _position(self, cell):
+        return (cell % self.grid_width, cell // self.grid_width)
+
+    def _apply(self, message):
+        kind = message[:1]
+        if kind == b'S':
+            self._apply_snapshot(message)
+        elif kind == b'T':
+            self._apply_tick(message)
+
+    def _apply_snapshot(self, message):
+        _, self.grid_width, self.grid_height, self.ticks, snake_id, count = \
+            SNAPSHOT_HEADER.unpack_from(message)
+        values = struct.unpack_from(f'<{(len(message) - SNAPSHOT_HEADER.size) // 4}I',
+                                    message, SNAPSHOT_HEADER.size)
+        position = self._position
+        self.snake_id = None if snake_id == NO_SNAKE else snake_id
+        self.snakes = {}
+        i = 0
+        for _ in range(count):
+            sid, _length, size = values[i:i + 3]
+            self.snakes[sid] = deque(position(c) for c in values[i + 3:i + 3 + size])
+            i += 3 + size
+        self.food = {position(c) for c in values[i + 1:i + 1 + values[i]]}
+        self._predict()
+
+    def _apply_tick(self, message):
+        _, ack, snake_id = TICK_HEADER.unpack_from(message)
+        offset = TICK_HEADER.size
+        counts = TICK_COUNTS.unpack_from(message, offset)
+        offset += TICK_COUNTS.size
+        self.ticks, spawns, moves, grows, deaths, food_added, food_removed = counts
+        count = 2 * spawns + moves + grows + deaths + food_added + food_removed
+        values = struct.unpack_from(f'<{count}I', message, offset)
+        directions = message[offset + 4 * count:]
+        position, snakes, food = self._position, self.snakes, self.food
+        w, h = self.grid_width, self.grid_height
+
+        # 快照之后的第一个 tick 可能重复快照中已有的出生和食物，这里的操作都是幂等的
+        i = 0
+        for _ in range(spawns):
+            snakes.setdefault(values[i], deque([position(values[i + 1])]))
+            i += 2
+        moved = values[i:i + moves]
+        grown = set(values[i + moves:i + moves + grows])
+        i += moves + grows
+        # 同一个 tick 里先死亡再移动，死亡的蛇不会出现在移动列表中
+        for sid in values[i:i + deaths]:
+            snakes.pop(sid, None)
+        i += deaths
+        for sid, direction in zip(moved, directions):
+            body = snakes[sid]
+            (x, y), (dx, dy) = body[0], DIRECTIONS[direction]
+            body.appendleft(((x + dx) % w, (y + dy) % h))
+            if sid not in grown:
+                body.pop()
+        food.update(position(c) for c in values[i:i + food_added])
+        i += food_added
+        food.difference_update(position(c) for c in values[i:i + food_removed])
+
+        self.snake_id = None if snake_id == NO_SNAKE else snake_id
+        # 服务器已经应用的转向不再需要预测；序号按 16 位回绕比较
+        while self.pending and (ack - self.pending[0][0]) & 0xFFFF < 0x8000:
+            self.pending.popleft()
+        if self.snake_id is None:
+            self.pending.clear()
+        self._predict()
+
+
+async def serve(host, port):
+    server = GameServer()
+    port = await server.start(host, port)
+    print(f"多人贪吃蛇服务器已启动：{host}:{port}")
+    await server.run()
+
+
+async def play(host, port):
+    """pygame 客户端：方向键转向，视口跟随自己的蛇"""
+    import pygame
+    from snake_game import (WINDOW_WIDTH, WINDOW_HEIGHT, BACKGROUND, GRAY, SNAKE_COLORS,
+                            KEY_DIRECTIONS, RENDER_FPS, Camera, draw_cell, game_font)
+
+    client = GameClient()
+    await client.connect(host, port)
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('多人贪吃蛇')
+    camera = Camera(client.grid_width, client.grid_height)
+
+    async def receive_forever():
+        while True:
+            await client.receive()
+
+    receiver = asyncio.ensure_future(receive_forever())
+    try:
+        while not receiver.done():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN and event.key in KEY_DIRECTIONS:
+                    client.send_direction(KEY_DIRECTIONS[event.key])
+
+            screen.fill(BACKGROUND)
+            body = client.predicted  # 自己的蛇画预测的位置，按键后立即转向
+            if body:
+                camera.update(body[0])
+            for position in client.food:
+                screen_cell = camera.to_screen(position)
+                if screen_cell is not None:
+                    draw_cell(screen, GRAY, screen_cell)
+            for sid, positions in client.snakes.items():
+                if sid == client.snake_id and body is not None:
+                    positions = body
+                color = SNAKE_COLORS[sid % len(SNAKE_COLORS)]
+                for position in positions:
+                    screen_cell = camera.to_screen(position)
+                    if screen_cell is not None:
+                        draw_cell(screen, color, screen_cell)
+            length = len(body) if body else 0
+            game_font.render_to(screen, (10, 10), f'长度: {length}  玩家: {len(client.snakes)}', GRAY)
+            pygame.display.update()
+            await asyncio.sleep(1.0 / RENDER_FPS)
+    finally:
+        receiver.cancel()
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局域网多人贪吃蛇")
+    parser.add_argument('mode', choices=['server', 'client'])
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    if args.mode == 'server':
+        asyncio.run(serve(args.host or '0.0.0.0', args.port))
+    else:
+        asyncio.run(play(args.host or '127.0.0.1', args.port))
+
+
+if __name__ == '__main__':
+    main()
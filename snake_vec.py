@@ -0,0 +1,236 @@
+"""基于 NumPy 的批量贪吃蛇环境：一次 step 同时推进成千上万个独立棋盘
+
+规则与 snake_core.SnakeGame 一致：穿墙回到另一侧，吃到食物后下一步变长，
+撞到自己则本局结束。结束的棋盘会在同一次 step 中自动重新开始。
+"""
+import numpy as np
+
+from snake_core import GRID_WIDTH, GRID_HEIGHT, DIRECTIONS, RIGHT
+
+# 观测数组中每个格子的取值
+EMPTY = 0
+FOOD = 1
+BODY = 2
+HEAD = 3
+
+# 动作编号即 DIRECTIONS 中的下标（上、下、左、右），-1 表示保持方向
+
+
+def neighbor_table(grid_width, grid_height):
+    """预先计算每个格子按各移动状态（穿墙）到达的格子，下标为 格子 * 8 + 状态"""
+    y, x = np.divmod(np.arange(grid_width * grid_height, dtype=np.intp), grid_width)
+    table = np.empty((grid_width * grid_height, len(DIRECTIONS), 2), dtype=np.intp)
+    for i, (dx, dy) in enumerate(DIRECTIONS):
+        table[:, i, :] = ((y + dy) % grid_height * grid_width + (x + dx) % grid_width)[:, None]
+    return table.reshape(-1)
+
+
+def turn_table():
+    """预先计算转向后的移动状态，下标为 状态 * 5 + 动作 + 1
+
+    移动状态 = 方向 * 2 + (蛇身长于一格)，蛇身长于一格时不允许直接掉头。
+    """
+    table = np.empty((len(DIRECTIONS), 2, len(DIRECTIONS) + 1), dtype=np.intp)
+    for i, (dx, dy) in enumerate(DIRECTIONS):
+        for longer in (0, 1):
+            table[i, longer, 0] = i * 2 + longer
+            for j, d in enumerate(DIRECTIONS):
+                turn = i if longer and d == (-dx, -dy) else j
+                table[i, longer, j + 1] = turn * 2 + longer
+    return table.reshape(-1)
+
+
+def move_table(grid_width, grid_height):
+    """把转向和前进合成一张表，下标为 格子 * 64 + 状态 * 8 + 动作 + 1
+
+    值为 新格子 * 64 + 新状态 * 8 + 1，加上下一步的动作就是下一次查表的下标，每步只查一次表。
+    """
+    size = grid_width * grid_height
+    turns = turn_table().reshape(8, len(DIRECTIONS) + 1)
+    cells = neighbor_table(grid_width, grid_height).reshape(size, 8)[:, turns]
+    table = np.zeros((size, 8, 8), dtype=np.intp)
+    table[:, :, :len(DIRECTIONS) + 1] = cells * 64 + turns * 8 + 1
+    return table.reshape(-1)
+
+
+class VecSnakeEnv:
+    """N 个独立棋盘的批量环境，所有状态都保存在预先分配的 NumPy 数组中
+
+    obs 形状为 (N, 高, 宽)，每次 step 原地更新并返回同一个数组；
+    蛇身保存在各棋盘共用写指针的环形缓冲区中，头部写入、尾部清除都只涉及 N 个元素。
+    """
+    def __init__(self, num_boards, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, seed=None):
+        self.num_boards = num_boards
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.size = grid_width * grid_height
+        self.rng = np.random.default_rng(seed)
+        self._moves = move_table(grid_width, grid_height)
+
+        n = num_boards
+        # 末尾多留一个格子，不需要弹出尾巴的棋盘把写操作指向这里，省去按掩码筛选
+        self._cells = np.zeros(n * self.size + 1, dtype=np.uint8)
+        self._scratch = n * self.size
+        self.obs = self._cells[:-1].reshape(n, grid_height, grid_width)
+        self._base = np.arange(n, dtype=np.intp) * self.size  # 各棋盘在一维数组中的起点
+
+        # 所有棋盘共用一个环形缓冲区写指针，按 (位置, 棋盘) 排列，保存蛇身在 _cells 中的下标，
+        # 每步写入蛇头是一整行的连续写；容量取 2 的幂，回绕只需一次按位与
+        self._ring = 1 << (self.size - 1).bit_length()
+        body_type = np.int32 if n * self.size < 2**31 else np.int64
+        self._body = np.zeros((self._ring, n), dtype=body_type)
+        self._flat_body = self._body.reshape(-1)
+        self._boards = np.arange(n, dtype=np.intp)
+        self._ptr = 0
+
+        self.head = np.zeros(n, dtype=np.intp)  # 蛇头所在格子（y * 宽度 + x）
+        self.body_size = np.zeros(n, dtype=np.intp)  # 当前蛇身格子数
+        self.length = np.zeros(n, dtype=np.intp)  # 目标长度，吃到食物后加一
+        # 蛇头格子 * 64 + 移动状态 * 8 + 1，移动状态 = 方向 * 2 + (蛇身长于一格)；加上动作就是 _moves 的下标
+        self._key = np.zeros(n, dtype=np.intp)
+        self.food = np.zeros(n, dtype=np.intp)
+        self.score = np.zeros(n, dtype=np.int64)
+        self._clock = 0  # 总共 step 了几次
+        self._started = np.zeros(n, dtype=np.int64)  # 各棋盘重新开始时的 _clock
+
+        # step 的输出，同样原地更新
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.dones = np.zeros(n, dtype=bool)
+        self.final_scores = np.zeros(n, dtype=np.int64)  # 最近一次结束时的得分
+
+        # step 用到的临时数组，每次都用 out= 写回这里，不再分配新数组
+        self._index = np.zeros(n, dtype=np.intp)
+        self._cell_head = np.zeros(n, dtype=np.intp)  # 蛇头在 _cells 中的下标，与 _spare 每步交换
+        self._spare = np.zeros(n, dtype=np.intp)
+        self._target = np.zeros(n, dtype=np.uint8)
+        self._tail = np.zeros(n, dtype=body_type)
+        self._grow = np.zeros(n, dtype=bool)
+        self._ate = np.zeros(n, dtype=bool)
+
+        self.reset()
+
+    @property
+    def steps(self):
+        """各棋盘这一局走了几步"""
+        return self._clock - self._started
+
+    @property
+    def direction(self):
+        """各棋盘当前方向在 DIRECTIONS 中的下标"""
+        return (self._key >> 4) & 3
+
+    def reset(self, boards=None):
+        """重新开始指定棋盘（默认全部），返回观测数组"""
+        if boards is None:
+            boards = np.arange(self.num_boards, dtype=np.intp)
+        if len(boards) == 0:
+            return self.obs
+        self.obs[boards] = EMPTY
+        start = self.grid_height // 2 * self.grid_width + self.grid_width // 2
+        self.head[boards] = start
+        self._cell_head[boards] = self._base[boards] + start
+        self._body[self._ptr, boards] = self._cell_head[boards]
+        self._cells[self._cell_head[boards]] = HEAD
+        self.body_size[boards] = 1
+        self.length[boards] = 1
+        self._key[boards] = start * 64 + DIRECTIONS.index(RIGHT) * 2 * 8 + 1
+        self.score[boards] = 0
+        self._started[boards] = self._clock
+        self._spawn_food(boards)
+        return self.obs
+
+    def _spawn_food(self, boards):
+        """在指定棋盘的空格子中均匀随机放置食物，已经占满的棋盘标记为结束"""
+        cells = self._cells
+        base = self._base[boards]
+        candidates = self.rng.integers(0, self.size, len(boards))
+        spots = base + candidates
+        ok = cells[spots] == EMPTY
+        if ok.all():
+            # 棋盘通常很空，几乎总是一次就全部放好，不必按掩码挑选
+            self.food[boards] = candidates
+            cells[spots] = FOOD
+            return
+        # 否则批量拒绝采样几轮
+        pending = np.arange(len(boards))
+        for attempt in range(8):
+            chosen = pending[ok]
+            self.food[boards[chosen]] = candidates[ok]
+            cells[spots[ok]] = FOOD
+            pending = pending[~ok]
+            if len(pending) == 0:
+                return
+            if attempt == 7:
+                break
+            candidates = self.rng.integers(0, self.size, len(pending))
+            spots = base[pending] + candidates
+            ok = cells[spots] == EMPTY
+        # 剩下的棋盘几乎被占满，逐个在空格子中精确抽取
+        for i in pending:
+            board = boards[i]
+            row = cells[base[i]:base[i] + self.size]
+            empty = np.flatnonzero(row == EMPTY)
+            if len(empty) == 0:
+                self.dones[board] = True
+            else:
+                cell = empty[self.rng.integers(len(empty))]
+                self.food[board] = cell
+                row[cell] = FOOD
+
+    def step(self, actions):
+        """所有棋盘各走一步，返回 (obs, rewards, dones)，三者都是预先分配的数组
+
+        actions 为长度 N 的整数数组，取值是 DIRECTIONS 的下标或 -1。
+        rewards 在吃到食物时为 1；dones 为 True 的棋盘已经自动重新开始，
+        其得分记录在 final_scores 中。
+        """
+        cells = self._cells
+        base = self._base
+        index = self._index
+        key = self._key
+
+        # 转向（查表忽略 -1 以及蛇身长于一格时的掉头）并前进一格；actions 可以是列表，由 np.add 转换
+        old_head, new_head = self._cell_head, self._spare
+        self._cell_head, self._spare = new_head, old_head
+        np.add(key, actions, out=index)
+        self._moves.take(index, out=key)
+        np.right_shift(key, 6, out=self.head)
+        np.add(base, self.head, out=new_head)
+
+        target = cells.take(new_head, out=self._target)
+        np.greater_equal(target, BODY, out=self.dones)
+        ate = np.equal(target, FOOD, out=self._ate)
+        np.copyto(self.rewards, ate)
+
+        # 移动蛇头（撞到自己的棋盘随后会被整体重置，这里不必区分）
+        cells[old_head] = BODY
+        cells[new_head] = HEAD
+        mask = self._ring - 1
+        self._ptr = (self._ptr + 1) & mask
+        self._body[self._ptr] = new_head
+
+        # 长度已达目标的棋盘弹出尾巴，其余棋盘的写操作落在多留的格子上
+        grow = np.less(self.body_size, self.length, out=self._grow)
+        np.subtract(self._ptr, self.body_size, out=index)
+        index &= mask
+        index *= self.num_boards
+        index += self._boards
+        np.copyto(index, self._flat_body.take(index, out=self._tail))
+        np.copyto(index, self._scratch, where=grow)
+        cells[index] = EMPTY
+        self.body_size += grow
+        np.left_shift(grow, 3, out=index)
+        key |= index  # 变长后的蛇身一定长于一格
+        self._clock += 1
+
+        eaten = np.flatnonzero(ate)  # 吃到食物的棋盘一定没有撞到自己
+        if len(eaten):
+            self.length[eaten] += 1
+            self.score[eaten] += 1
+            self._spawn_food(eaten)
+
+        if self.dones.any():
+            finished = np.flatnonzero(self.dones)
+            self.final_scores[finished] = self.score[finished]
+            self.reset(finished)
+        return self.obs, self.rewards, self.dones
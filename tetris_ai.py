@@ -0,0 +1,253 @@
+"""俄罗斯方块机器人：枚举当前方块和下一个方块所有可达的落点，用 Dellacherie 风格的特征给棋盘打分
+
+运行方式：
+    python tetris_ai.py play [--games 10] [--lookahead]
+    python tetris_ai.py tune [--generations 10] [--population 24] [--workers 4]
+
+棋盘直接使用 Tetris.rows 的行掩码表示，模拟落下和计算特征都是整数位运算。
+"""
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from tetris_core import PIECES, WALL, run_games
+
+# 特征依次为：落点高度、消行数、行变换、列变换、空洞、井深累计、总高度、相邻列高度差
+FEATURES = ("落点高度", "消行", "行变换", "列变换", "空洞", "井", "总高度", "高度差")
+# Dellacherie / El-Tetris 的权重，总高度和高度差默认不计
+DEFAULT_WEIGHTS = (-4.500, 3.418, -3.218, -9.349, -7.899, -3.386, 0.0, 0.0)
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # Python 3.10 以前
+    def popcount(value):
+        return bin(value).count("1")
+
+
+def collides(rows, masks, x, y):
+    shift = x + WALL
+    for i, mask in masks:
+        if rows[y + i] & (mask << shift):
+            return True
+    return False
+
+
+def reachable(rows, piece_type, rotation, x, y):
+    """从 (rotation, x, y) 出发先原地旋转、再左右平移能到达的所有 (旋转, x)，与 Tetris 的操作方式一致"""
+    rotations = PIECES[piece_type]
+    result = []
+    for k in range(len(rotations)):
+        r = (rotation + k) % len(rotations)
+        masks = rotations[r].masks
+        if collides(rows, masks, x, y):
+            break  # Tetris.rotate 只能按顺序旋转，卡住后后面的状态也到不了
+        result.append((r, x))
+        for step in (-1, 1):
+            nx = x + step
+            while not collides(rows, masks, nx, y):
+                result.append((r, nx))
+                nx += step
+    return result
+
+
+def drop(rows, skyline, piece, x, y):
+    """与 Tetris.drop_position 相同：先用每列高度计算落点，方块在悬空方块下面时逐行下移"""
+    left = x + piece.left
+    landing = min(skyline[left + c] - 1 - bottom for c, bottom in enumerate(piece.profile))
+    if landing < y:
+        landing = y
+        while not collides(rows, piece.masks, x, landing + 1):
+            landing += 1
+    return landing
+
+
+def place(rows, height, full_row, piece, x, y):
+    """把方块固定在 (x, y) 并按 Tetris.break_lines 的规则消行，返回 (新的行掩码, 消行数)"""
+    rows = rows[:]
+    shift = x + WALL
+    for i, mask in piece.masks:
+        rows[y + i] |= mask << shift
+    kept = [row for row in rows[2:height] if row != full_row]
+    cleared = height - 2 - len(kept)
+    lines = cleared + (rows[1] == full_row)
+    if cleared:
+        rows = [rows[0], rows[1]] + [rows[1]] * cleared + kept + rows[height:]
+    return rows, lines
+
+
+def analyze(rows, height, width):
+    """一次从上到下扫描，返回 (每列最高方块的行号, 行变换, 列变换, 空洞, 井深累计)"""
+    cols = ((1 << width) - 1) << WALL
+    pairs = ((1 << (width + 1)) - 1) << (WALL - 1)  # 左墙到右墙之间相邻两格组成的 width + 1 对
+    skyline = [height] * width
+    covered = 0  # 上方已经出现过方块的列
+    row_transitions = column_transitions = holes = wells = 0
+    above = 0  # 上一行的方块
+    depths = []  # depths[k] 为当前井深超过 k 的列
+    for i in range(height):
+        row = rows[i]
+        inner = row & cols
+        if not covered:
+            if not inner:
+                row_transitions += 2  # 空行只有两侧与墙壁之间的变换
+                continue
+        new = inner & ~covered
+        while new:
+            low = new & -new
+            skyline[low.bit_length() - 1 - WALL] = i
+            new ^= low
+        holes += popcount(covered & ~inner)
+        covered |= inner
+        row_transitions += popcount((row ^ (row >> 1)) & pairs)
+        column_transitions += popcount(inner ^ above)
+        above = inner
+        # 井：本格为空而左右两格（含墙壁）都有方块，连续 d 格深的井累计 1 + 2 + ... + d
+        well = ~row & (row << 1) & (row >> 1) & cols
+        if well or depths:
+            level = [well]
+            for mask in depths:
+                mask &= well
+                if not mask:
+                    break
+                level.append(mask)
+            depths = level if well else []
+            for mask in depths:
+                wells += popcount(mask)
+    column_transitions += popcount(~above & cols)  # 最下面一行与地板之间
+    return skyline, row_transitions, column_transitions, holes, wells
+
+
+class TetrisBot:
+    """对每个可达落点打分并选择最好的一个，可以同时考虑下一个方块"""
+    def __init__(self, weights=DEFAULT_WEIGHTS, lookahead=True):
+        self.weights = tuple(weights)
+        self.lookahead = lookahead
+        self.evaluations = 0  # 累计给多少个棋盘打过分
+
+    def evaluate(self, rows, height, width, piece, y, lines):
+        """返回 (分数, 每列高度)"""
+        self.evaluations += 1
+        skyline, row_t, col_t, holes, wells = analyze(rows, height, width)
+        heights = [height - top for top in skyline]
+        bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        landing = height - y - (piece.top + piece.bottom) / 2
+        w = self.weights
+        score = (w[0] * landing + w[1] * lines + w[2] * row_t + w[3] * col_t + w[4] * holes +
+                 w[5] * wells + w[6] * sum(heights) + w[7] * bumpiness)
+        return score, skyline
+
+    def _candidates(self, rows, skyline, height, width, full_row, piece_type, rotation, x, y):
+        """依次给出每个可达落点的 (旋转, x, 分数, 落下后的行掩码, 每列最高方块)"""
+        for r, px in reachable(rows, piece_type, rotation, x, y):
+            piece = PIECES[piece_type][r]
+            landing = drop(rows, skyline, piece, px, y)
+            new_rows, lines = place(rows, height, full_row, piece, px, landing)
+            score, new_skyline = self.evaluate(new_rows, height, width, piece, landing, lines)
+            yield r, px, score, new_rows, new_skyline
+
+    def best_move(self, game):
+        """返回当前方块的最佳 (旋转, x)，没有可达落点时返回 None"""
+        figure, following = game.figure, game.next_figure
+        height, width, full_row = game.height, game.width, game.full_row
+        best, best_score = None, 0
+        for r, x, score, rows, skyline in self._candidates(
+                game.rows, game.skyline, height, width, full_row,
+                figure.type, figure.rotation, figure.x, figure.y):
+            if self.lookahead and following is not None:
+                # 下一个方块从出生位置开始放，取它最好的落点作为这一步的分数
+                score = max((s for *_, s, _, _ in self._candidates(
+                    rows, skyline, height, width, full_row,
+                    following.type, following.rotation, following.x, following.y)),
+                    default=-math.inf)
+            if best is None or score > best_score:
+                best, best_score = (r, x), score
+        return best
+
+    def __call__(self, game):
+        return self.best_move(game)
+
+
+def play_game(weights=DEFAULT_WEIGHTS, seed=None, max_pieces=500, lookahead=False, mode="uniform"):
+    """无界面玩一局，返回 tetris_core.run_games 的统计数据，另加耗时和评估次数"""
+    bot = TetrisBot(weights, lookahead)
+    start = time.perf_counter()
+    result = run_games(bot, [seed], max_pieces, mode)[0]
+    result["seconds"] = time.perf_counter() - start
+    result["evaluations"] = bot.evaluations
+    return result
+
+
+def _play_task(args):
+    return play_game(*args)
+
+
+def tune(generations=10, population=24, elite_fraction=0.25, games=4, max_pieces=300,
+         workers=None, seed=0):
+    """交叉熵方法调整权重：每一代按正态分布采样一批权重，在进程池中并行对局，
+    用消行最多的一部分更新均值和标准差。返回最终的权重均值。"""
+    rng = random.Random(seed)
+    mean = list(DEFAULT_WEIGHTS)
+    std = [max(abs(w) / 2, 1.0) for w in mean]
+    elite = max(1, int(population * elite_fraction))
+    with multiprocessing.Pool(workers) as pool:
+        for generation in range(generations):
+            candidates = [[rng.gauss(m, s) for m, s in zip(mean, std)] for _ in range(population)]
+            # 同一代的所有权重使用相同的方块序列，比较更公平
+            seeds = [seed * 100003 + generation * games + k for k in range(games)]
+            tasks = [(w, s, max_pieces, False) for w in candidates for s in seeds]
+            start = time.perf_counter()
+            results = pool.map(_play_task, tasks)
+            elapsed = time.perf_counter() - start
+
+            lines = [sum(r["lines"] for r in results[i * games:(i + 1) * games]) / games
+                     for i in range(population)]
+            heights = [sum(r["height"] for r in results[i * games:(i + 1) * games])
+                       for i in range(population)]
+            # 消行数相同（例如都打满了方块数上限）时，结束时堆得更低的更好
+            ranked = sorted(range(population), key=lambda i: (-lines[i], heights[i]))[:elite]
+            for k in range(len(mean)):
+                values = [candidates[i][k] for i in ranked]
+                mean[k] = sum(values) / elite
+                # 加一点随代数衰减的噪声，避免过早收敛
+                std[k] = math.sqrt(sum((v - mean[k]) ** 2 for v in values) / elite) + 1.0 / (generation + 1)
+            evaluations = sum(r["evaluations"] for r in results)
+            print(f"第 {generation + 1} 代：最佳 {lines[ranked[0]]:.1f} 行/局，"
+                  f"精英平均 {sum(lines[i] for i in ranked) / elite:.1f} 行/局，"
+                  f"{evaluations / elapsed:,.0f} 次评估/秒")
+        # 正常关闭并等待子进程退出，而不是在退出 with 时直接 terminate
+        pool.close()
+        pool.join()
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description="俄罗斯方块机器人")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    play_parser = sub.add_parser("play", help="用默认权重无界面玩若干局")
+    play_parser.add_argument("--games", type=int, default=10)
+    play_parser.add_argument("--max-pieces", type=int, default=1000)
+    play_parser.add_argument("--lookahead", action="store_true", help="同时考虑下一个方块")
+    tune_parser = sub.add_parser("tune", help="在进程池中用交叉熵方法调整权重")
+    tune_parser.add_argument("--generations", type=int, default=10)
+    tune_parser.add_argument("--population", type=int, default=24)
+    tune_parser.add_argument("--games", type=int, default=4)
+    tune_parser.add_argument("--max-pieces", type=int, default=300)
+    tune_parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.mode == "play":
+        results = [play_game(seed=seed, max_pieces=args.max_pieces, lookahead=args.lookahead)
+                   for seed in range(args.games)]
+        lines = sum(r["lines"] for r in results) / args.games
+        rate = sum(r["evaluations"] for r in results) / sum(r["seconds"] for r in results)
+        print(f"平均 {lines:.1f} 行/局，{rate:,.0f} 次评估/秒")
+    else:
+        weights = tune(args.generations, args.population, games=args.games,
+                       max_pieces=args.max_pieces, workers=args.workers)
+        print("权重：" + "，".join(f"{name} {w:.3f}" for name, w in zip(FEATURES, weights)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""俄罗斯方块核心规则（不依赖 pygame，可无界面批量运行）"""
+import random
+import struct
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+COLOR_COUNT = 7  # 方块颜色编号为 1..7，对应 tetris_game.COLORS 中除背景色以外的颜色
+
+# 方块形状定义
+SHAPES = [
+    [[1, 5, 9, 13], [4, 5, 6, 7]],  # I
+    [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],  # J
+    [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],  # L
+    [[1, 2, 5, 6]],  # O
+    [[5, 6, 8, 9], [1, 5, 6, 10]],  # S
+    [[1, 4, 5, 6], [1, 5, 6, 9], [4, 5, 6, 9], [1, 4, 5, 9]],  # T
+    [[4, 5, 9, 10], [2, 6, 5, 9]]  # Z
+]
+
+# 棋盘每行用一个整数表示，第 j 列对应第 j + WALL 位，两侧各留 WALL 位当作墙壁，
+# 方块伸出左右边界时与墙壁相与即可判断碰撞，不需要逐格检查坐标
+WALL = 4
+
+class Piece(NamedTuple):
+    """一种方块的一个旋转状态，坐标都是相对 4x4 方框左上角的偏移"""
+    cells: Tuple[Tuple[int, int], ...]  # 占用的 (行, 列)
+    masks: Tuple[Tuple[int, int], ...]  # 非空行的 (行, 行掩码)，第 j 列对应掩码第 j 位
+    top: int  # 外接矩形的上、下、左、右边界（包含）
+    bottom: int
+    left: int
+    right: int
+    profile: Tuple[int, ...]  # 从 left 到 right 每列最下面一格的行偏移
+
+def build_piece(shape: List[int]) -> Piece:
+    """把 4x4 编号列表解码成 Piece"""
+    cells = tuple(sorted(divmod(index, 4) for index in shape))
+    masks = [0, 0, 0, 0]
+    for i, j in cells:
+        masks[i] |= 1 << j
+    rows = [i for i, _ in cells]
+    cols = [j for _, j in cells]
+    left, right = min(cols), max(cols)
+    profile = tuple(max(i for i, j in cells if j == col) for col in range(left, right + 1))
+    return Piece(cells, tuple((i, mask) for i, mask in enumerate(masks) if mask),
+                 min(rows), max(rows), left, right, profile)
+
+# 每种方块每个旋转状态解码后的数据，导入时计算一次，PIECES[类型][旋转]
+PIECES = [[build_piece(shape) for shape in rotations] for rotations in SHAPES]
+
+class PieceGenerator:
+    """方块序列生成器，相同的 seed 得到相同的方块和颜色序列
+
+    mode 为 "uniform" 时每个方块独立均匀随机；为 "bag" 时每 7 个方块是 7 种方块的一个随机排列（7-bag）。
+    """
+    MODES = ("uniform", "bag")
+
+    def __init__(self, seed=None, mode: str = "uniform"):
+        if mode not in self.MODES:
+            raise ValueError(f"未知的方块生成方式：{mode}")
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.bag: List[int] = []
+
+    def next(self) -> Tuple[int, int]:
+        """返回下一个方块的 (类型, 颜色)"""
+        if self.mode == "bag":
+            if not self.bag:
+                self.bag = list(range(len(SHAPES)))
+                self.rng.shuffle(self.bag)
+            piece_type = self.bag.pop()
+        else:
+            piece_type = self.rng.randint(0, len(SHAPES) - 1)
+        return piece_type, self.rng.randint(1, COLOR_COUNT)
+
+class Tetris:
+    def __init__(self, height: int, width: int, generator: "PieceGenerator" = None):
+        self.height = height
+        self.width = width
+        self.generator = generator or PieceGenerator()
+        self.field = [[0 for _ in range(width)] for _ in range(height)]  # 每格的颜色，只用于绘制
+        # 每行的占用位掩码，底部多留 4 行全满的行当作地板
+        self.full_row = (1 << (width + 2 * WALL)) - 1
+        self.empty_row = self.full_row ^ (((1 << width) - 1) << WALL)
+        self.rows = [self.empty_row] * height + [self.full_row] * 4
+        self.skyline = [height] * width  # 每列最上面一个方块所在的行，空列为 height
+        self._ghost_key = None  # 上次计算落点时方块的 (对象, 旋转, x, y)
+        self._ghost_y = 0
+        self.score = 0
+        self.lines = 0  # 累计消去的行数
+        self.pieces = 0  # 累计固定的方块数
+        self.state = "start"  # 游戏开始就是运行状态
+        self.figure = None
+        self.figure_pos = [0, 0]
+        self.next_figure = None
+        self.level = 1
+        
+        self.new_figure()  # 创建第一个方块
+    
+    def new_figure(self) -> None:
+        if not self.next_figure:
+            self.next_figure = Figure(3, 0, *self.generator.next())
+        self.figure = self.next_figure
+        self.next_figure = Figure(3, 0, *self.generator.next())
+    
+    def intersects(self) -> bool:
+        figure = self.figure
+        rows, y, shift = self.rows, figure.y, figure.x + WALL
+        for i, mask in figure.piece().masks:
+            if rows[y + i] & (mask << shift):
+                return True
+        return False
+    
+    def freeze(self) -> None:
+        figure = self.figure
+        piece = figure.piece()
+        for i, mask in piece.masks:
+            self.rows[figure.y + i] |= mask << (figure.x + WALL)
+        for i, j in piece.cells:
+            self.field[figure.y + i][figure.x + j] = figure.color
+        skyline = self.skyline
+        for i, j in piece.cells:
+            if figure.y + i < skyline[figure.x + j]:
+                skyline[figure.x + j] = figure.y + i
+        self._ghost_key = None
+        self.pieces += 1
+        self.break_lines()
+        self.new_figure()
+        if self.intersects():
+            self.state = "gameover"
+    
+    def break_lines(self) -> None:
+        # 从第 2 行起过滤掉满行，每消一行就在上方补一份第 1 行；
+        # 第 0、1 行保持不动，第 1 行满时每次都计一行（与逐格下移的旧实现结果一致）
+        rows, full = self.rows, self.full_row
+        kept = [i for i in range(2, self.height) if rows[i] != full]
+        cleared = self.height - 2 - len(kept)
+        lines = cleared + (rows[1] == full)
+        if cleared:
+            field = self.field
+            self.rows[:self.height] = [rows[0], rows[1]] + [rows[1]] * cleared + [rows[i] for i in kept]
+            self.field = ([field[0], field[1]] + [field[1][:] for _ in range(cleared)] +
+                          [field[i] for i in kept])
+            self.update_skyline()
+        self.lines += lines
+        self.score += lines ** 2
+        self.level = self.score // 10 + 1
+    
+    def update_skyline(self) -> None:
+        """根据行掩码从上往下重新计算每列的最高方块，只在消行后调用"""
+        skyline = self.skyline = [self.height] * self.width
+        remaining = (1 << self.width) - 1  # 还没找到方块的列
+        for i in range(self.height):
+            found = (self.rows[i] >> WALL) & remaining
+            remaining ^= found
+            while found:
+                low = found & -found
+                skyline[low.bit_length() - 1] = i
+                found ^= low
+            if not remaining:
+                break
+
+    def drop_position(self) -> int:
+        """当前方块直接落下后的 y 坐标，结果按方块位置缓存，同时用于直接落下和绘制落点影子
+
+        方块完全在各列最高方块之上时，落点由每列高度和方块底部轮廓直接算出；
+        方块塞在悬空的方块下面时才逐行下移检查。
+        """
+        figure = self.figure
+        key = (figure, figure.rotation, figure.x, figure.y)
+        if key == self._ghost_key:
+            return self._ghost_y
+        piece = figure.piece()
+        x, y = figure.x + piece.left, figure.y
+        skyline = self.skyline
+        landing = self.height
+        for col, bottom in enumerate(piece.profile):
+            landing = min(landing, skyline[x + col] - 1 - bottom)
+        if landing < y:
+            # 有一列的最高方块不在方块下方，退回逐行检查
+            saved = figure.y
+            while not self.intersects():
+                figure.y += 1
+            landing = figure.y - 1
+            figure.y = saved
+        self._ghost_key, self._ghost_y = key, landing
+        return landing
+
+    def go_space(self) -> None:
+        self.figure.y = self.drop_position()
+        self.freeze()
+    
+    def go_down(self) -> None:
+        self.figure.y += 1
+        if self.intersects():
+            self.figure.y -= 1
+            self.freeze()
+    
+    def go_side(self, dx: int) -> None:
+        self.figure.x += dx
+        if self.intersects():
+            self.figure.x -= dx
+    
+    def rotate(self) -> None:
+        rotation = self.figure.rotation
+        self.figure.rotate()
+        if self.intersects():
+            self.figure.rotation = rotation
+
+    def place(self, rotation: int, x: int) -> None:
+        """先原地旋转、再左右平移到 (rotation, x)，然后直接落下；到不了的位置停在能到的最近处"""
+        figure = self.figure
+        for _ in range(len(SHAPES[figure.type])):
+            if figure.rotation == rotation:
+                break
+            self.rotate()
+        for _ in range(self.width + WALL):
+            if figure.x == x:
+                break
+            before = figure.x
+            self.go_side(1 if x > figure.x else -1)
+            if figure.x == before:
+                break
+        self.go_space()
+
+class Figure:
+    def __init__(self, x: int, y: int, piece_type: int = None, color: int = None):
+        self.x = x
+        self.y = y
+        self.type = random.randint(0, len(SHAPES) - 1) if piece_type is None else piece_type
+        self.color = random.randint(1, COLOR_COUNT) if color is None else color  # 确保不使用背景色
+        self.rotation = 0
+    
+    def image(self) -> List[int]:
+        return SHAPES[self.type][self.rotation]
+
+    def piece(self) -> Piece:
+        return PIECES[self.type][self.rotation]
+    
+    def rotate(self) -> None:
+        self.rotation = (self.rotation + 1) % len(SHAPES[self.type])
+
+
+SNAPSHOT_HEADER = "<BBBbhBBIIIIB"  # 当前方块(类型, 颜色, 旋转, x, y)、下一个方块(类型, 颜色)、分数、行数、方块数、等级、是否结束
+HIGH_NIBBLE = bytes(b >> 4 for b in range(256))  # 一个字节拆成两格颜色用的转换表
+LOW_NIBBLE = bytes(b & 15 for b in range(256))
+
+
+class SnapshotRing:
+    """在预先分配的 bytearray 中循环保存最近 capacity 个局面，用于悔棋
+
+    每个局面定长：方块状态和分数、每行的占用位掩码（不含墙壁）、每格颜色（4 位一格）。
+    10x20 的棋盘每个局面 165 字节，保存和恢复都不需要复制二维列表。
+    随机数发生器不保存，恢复之后的新方块按发生器当前的状态继续生成。
+    """
+    def __init__(self, capacity: int, height: int, width: int):
+        if width > 64:
+            raise ValueError("棋盘宽度不能超过 64")
+        code = "H" if width <= 16 else "I" if width <= 32 else "Q"
+        self.row_bytes = (width + 1) // 2
+        self.format = struct.Struct(f"{SNAPSHOT_HEADER}{height}{code}{height * self.row_bytes}s")
+        self.capacity = capacity
+        self.height = height
+        self.width = width
+        self.buffer = bytearray(capacity * self.format.size)
+        self.nbytes = height * self.row_bytes
+        self.low_bytes = int.from_bytes(b"\0\xff" * self.nbytes, "big")  # 每两个字节中的低字节
+        self.start = 0  # 最早一个局面所在的槽
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        self.start = self.count = 0
+
+    def save(self, game: "Tetris") -> None:
+        """把局面写到最新的位置，满了就覆盖最早的一个"""
+        figure, following = game.figure, game.next_figure
+        inner = (1 << self.width) - 1
+        # 每格一个字节拼成大整数，把每两个字节 (a, b) 合成 a << 4 | b 后隔一个字节取一个
+        pad = b"\0" if self.width & 1 else b""
+        cells = int.from_bytes(b"".join(bytes(row) + pad for row in game.field), "big")
+        colors = (((cells >> 4) | cells) & self.low_bytes).to_bytes(self.nbytes * 2, "big")[1::2]
+        slot = (self.start + self.count) % self.capacity
+        self.format.pack_into(
+            self.buffer, slot * self.format.size,
+            figure.type, figure.color, figure.rotation, figure.x, figure.y,
+            following.type, following.color, game.score, game.lines, game.pieces, game.level,
+            game.state == "gameover",
+            *[(row >> WALL) & inner for row in game.rows[:self.height]], colors)
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def load(self, game: "Tetris", back: int = 0) -> None:
+        """把游戏恢复到倒数第 back + 1 个局面，缓冲区不变"""
+        if not 0 <= back < self.count:
+            raise IndexError("没有这么早的局面")
+        slot = (self.start + self.count - 1 - back) % self.capacity
+        values = self.format.unpack_from(self.buffer, slot * self.format.size)
+        (piece_type, color, rotation, x, y, next_type, next_color,
+         game.score, game.lines, game.pieces, game.level, over) = values[:12]
+        height, width, row_bytes = self.height, self.width, self.row_bytes
+        empty = game.empty_row
+        game.rows[:height] = [empty | (mask << WALL) for mask in values[12:12 + height]]
+        colors = values[-1]
+        cells = bytearray(self.nbytes * 2)
+        cells[0::2] = colors.translate(HIGH_NIBBLE)
+        cells[1::2] = colors.translate(LOW_NIBBLE)
+        step = row_bytes * 2
+        game.field = [list(cells[k:k + width]) for k in range(0, len(cells), step)]
+        game.figure = Figure(x, y, piece_type, color)
+        game.figure.rotation = rotation
+        game.next_figure = Figure(3, 0, next_type, next_color)
+        game.state = "gameover" if over else "start"
+        game._ghost_key = None
+        game.update_skyline()
+
+    def rewind(self, game: "Tetris") -> bool:
+        """丢掉最新的局面并恢复到它之前的一个，局面不足两个时返回 False"""
+        if self.count < 2:
+            return False
+        self.count -= 1
+        self.load(game)
+        return True
+
+
+def run_games(policy: Callable[[Tetris], Optional[Tuple[int, int]]], seeds: Iterable,
+              max_pieces: int = 1000, mode: str = "uniform",
+              height: int = 20, width: int = 10) -> List[Dict]:
+    """按给定种子依次无界面地运行多局游戏，返回每局的统计数据
+
+    policy(game) 返回当前方块的落点 (旋转, x)，返回 None 表示原地直接落下；
+    回放固定操作序列或接入机器人都只需要提供这样一个函数。
+    """
+    results = []
+    for seed in seeds:
+        game = Tetris(height, width, PieceGenerator(seed, mode))
+        while game.state != "gameover" and game.pieces < max_pieces:
+            move = policy(game)
+            if move is None:
+                game.go_space()
+            else:
+                game.place(*move)
+        results.append({
+            "seed": seed,
+            "pieces": game.pieces,
+            "lines": game.lines,
+            "score": game.score,
+            "level": game.level,
+            "height": game.height - min(game.skyline),  # 结束时最高一列的高度
+        })
+    return results
@@ -1,7 +1,8 @@
+import time
+
 import pygame
-import random
-from typing import List, Tuple
 import scores
+from tetris_core import SnapshotRing, Tetris
 
 pygame.init()
 pygame.freetype.init()
@@ -58,16 +59,103 @@ START_BTN_HOVER = ORANGE_HOVER  # 开始按钮悬停色
 BUTTON_TEXT = WHITE  # 开始按钮文字保持白色
 BUTTON_BORDER = (200, 200, 200)  # 按钮边框和阴影颜色
 
-# 方块形状定义
-SHAPES = [
-    [[1, 5, 9, 13], [4, 5, 6, 7]],  # I
-    [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],  # J
-    [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],  # L
-    [[1, 2, 5, 6]],  # O
-    [[5, 6, 8, 9], [1, 5, 6, 10]],  # S
-    [[1, 4, 5, 6], [1, 5, 6, 9], [4, 5, 6, 9], [1, 4, 5, 9]],  # T
-    [[4, 5, 9, 10], [2, 6, 5, 9]]  # Z
-]
+# 时间常量（秒），下落和按键重复都按真实时间计算，与绘制帧率无关
+FPS = 60  # 绘制帧率，只影响画面流畅度
+GRAVITY_BASE = 0.5  # 1 级时每下落一行的间隔，等级越高间隔越短
+GRAVITY_MIN = 1 / 60  # 下落间隔的下限
+SOFT_DROP_INTERVAL = 1 / 60  # 按住下键时每下落一行的间隔
+LOCK_DELAY = 0.5  # 方块落到底后多久固定，期间仍可移动和旋转
+LOCK_RESETS = 15  # 落到底后移动或旋转最多重新计时的次数，避免一直拖延
+DAS = 0.17  # 按住左右键后开始自动重复前的延迟
+ARR = 0.05  # 自动重复时每移动一格的间隔，为 0 时直接移到底
+MAX_FRAME_TIME = 0.25  # 单帧最多计算的时间，窗口被拖动等卡顿后不会一下落很多行
+REWIND_DEPTH = 10000  # 最多能悔棋回退的方块数
+
+def gravity_interval(level):
+    """每下落一行的秒数，等级很高时不会变成 0"""
+    return max(GRAVITY_BASE / level, GRAVITY_MIN)
+
+
+class FallTimer:
+    """按经过的时间让方块下落，落到底后等待 LOCK_DELAY 秒再固定"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.elapsed = 0.0  # 距离上一次下落累计的时间
+        self.lock_time = None  # 方块落到底后已经等待的时间，悬空时为 None
+        self.lock_resets = 0
+        self.position = None  # 上一帧方块的 (对象, x, y, 旋转)
+
+    def update(self, game, dt, soft_drop=False):
+        figure = game.figure
+        position = (figure, figure.x, figure.y, figure.rotation)
+        if self.position is None or figure is not self.position[0]:
+            self.reset()  # 第一次调用，或按空格直接落下后换了新方块
+        elif position != self.position and self.lock_time is not None and self.lock_resets < LOCK_RESETS:
+            self.lock_resets += 1  # 落到底后玩家移动或旋转了方块，重新计时
+            self.lock_time = 0.0
+
+        interval = gravity_interval(game.level)
+        if soft_drop:
+            interval = min(interval, SOFT_DROP_INTERVAL)
+        if game.drop_position() > figure.y:
+            self.lock_time = None
+            self.elapsed += dt
+            while self.elapsed >= interval and game.drop_position() > figure.y:
+                self.elapsed -= interval
+                game.go_down()  # 下面还有空位，只会下移一行
+            if game.drop_position() > figure.y:
+                self.position = (figure, figure.x, figure.y, figure.rotation)
+                return
+            # 这一帧落到了底，最后一次下落之后剩下的时间算作锁定等待
+            dt, self.elapsed = self.elapsed, 0.0
+        self.lock_time = (self.lock_time or 0.0) + dt
+        if self.lock_time >= LOCK_DELAY:
+            carry = self.lock_time - LOCK_DELAY
+            game.go_down()  # 已经落到底，go_down 会固定方块并生成下一个
+            self.reset()
+            # 超出的时间留给下一个方块，帧率低时也不会每个方块多等一帧
+            self.elapsed = carry
+            figure = game.figure
+        self.position = (figure, figure.x, figure.y, figure.rotation)
+
+
+class AutoShift:
+    """按住左右键时先移动一格，DAS 秒后每 ARR 秒再移动一格"""
+    def __init__(self, das=DAS, arr=ARR):
+        self.das = das
+        self.arr = arr
+        self.direction = 0  # 当前按住的方向，-1 左，1 右，0 没有按
+        self.held = 0.0
+        self.repeats = 0
+
+    def press(self, game, direction):
+        self.direction = direction
+        self.held = 0.0
+        self.repeats = 0
+        game.go_side(direction)
+
+    def release(self, direction):
+        # 同时按住两个方向时，松开先按的那个不影响后按的方向
+        if direction == self.direction:
+            self.direction = 0
+
+    def update(self, game, dt):
+        if not self.direction:
+            return
+        self.held += dt
+        if self.held < self.das:
+            return
+        due = game.width if self.arr <= 0 else int((self.held - self.das) / self.arr) + 1
+        while self.repeats < due:
+            self.repeats += 1
+            x = game.figure.x
+            game.go_side(self.direction)
+            if game.figure.x == x:
+                self.repeats = due  # 碰到墙或方块，不把这段时间攒到以后
+                break
+
 
 class Button:
     def __init__(self, x, y, width, height, text, icon=None, small=False, button_color=None, hover_color=None):
@@ -133,99 +221,6 @@ class Button:
                 return True
         return False
 
-class Tetris:
-    def __init__(self, height: int, width: int):
-        self.height = height
-        self.width = width
-        self.field = [[0 for _ in range(width)] for _ in range(height)]
-        self.score = 0
-        self.state = "start"  # 游戏开始就是运行状态
-        self.figure = None
-        self.figure_pos = [0, 0]
-        self.next_figure = None
-        self.level = 1
-        
-        self.new_figure()  # 创建第一个方块
-    
-    def new_figure(self) -> None:
-        if not self.next_figure:
-            self.next_figure = Figure(3, 0)
-        self.figure = self.next_figure
-        self.next_figure = Figure(3, 0)
-    
-    def intersects(self) -> bool:
-        for i in range(4):
-            for j in range(4):
-                if i * 4 + j in self.figure.image():
-                    if (i + self.figure.y > self.height - 1 or
-                        j + self.figure.x > self.width - 1 or
-                        j + self.figure.x < 0 or
-                        self.field[i + self.figure.y][j + self.figure.x] > 0):
-                        return True
-        return False
-    
-    def freeze(self) -> None:
-        for i in range(4):
-            for j in range(4):
-                if i * 4 + j in self.figure.image():
-                    self.field[i + self.figure.y][j + self.figure.x] = self.figure.color
-        self.break_lines()
-        self.new_figure()
-        if self.intersects():
-            self.state = "gameover"
-    
-    def break_lines(self) -> None:
-        lines = 0
-        for i in range(1, self.height):
-            zeros = 0
-            for j in range(self.width):
-                if self.field[i][j] == 0:
-                    zeros += 1
-            if zeros == 0:
-                lines += 1
-                for i2 in range(i, 1, -1):
-                    for j in range(self.width):
-                        self.field[i2][j] = self.field[i2-1][j]
-        self.score += lines ** 2
-        self.level = self.score // 10 + 1
-    
-    def go_space(self) -> None:
-        while not self.intersects():
-            self.figure.y += 1
-        self.figure.y -= 1
-        self.freeze()
-    
-    def go_down(self) -> None:
-        self.figure.y += 1
-        if self.intersects():
-            self.figure.y -= 1
-            self.freeze()
-    
-    def go_side(self, dx: int) -> None:
-        self.figure.x += dx
-        if self.intersects():
-            self.figure.x -= dx
-    
-    def rotate(self) -> None:
-        rotation = self.figure.rotation
-        self.figure.rotate()
-        if self.intersects():
-            self.figure.rotation = rotation
-
-class Figure:
-    def __init__(self, x: int, y: int):
-        self.x = x
-        self.y = y
-        self.type = random.randint(0, len(SHAPES) - 1)
-        self.color = random.randint(1, len(COLORS) - 1)  # 确保不使用背景色
-        self.rotation = 0
-    
-    def image(self) -> List[int]:
-        return SHAPES[self.type][self.rotation]
-    
-    def rotate(self) -> None:
-        self.rotation = (self.rotation + 1) % len(SHAPES[self.type])
-
 def main():
     pygame.init()
     
@@ -248,9 +243,13 @@ def main():
     
     # 游戏循环
     clock = pygame.time.Clock()
-    fps = 60
-    counter = 0
     pressing_down = False
+    fall = FallTimer()
+    shift = AutoShift()
+    last_time = time.perf_counter()
+    history = SnapshotRing(REWIND_DEPTH, GRID_HEIGHT, GRID_WIDTH)  # 每个方块出现时的局面
+    saved_pieces = None  # 已经保存到第几个方块
+    practice = False  # 悔过棋的一局算练习，不计最高分
     
     game_started = False
     start_btn = Button(
@@ -282,12 +281,9 @@ def main():
         if game_started and game.figure is None:
             game.new_figure()
         
-        counter += 1
-        
-        if counter > fps // (2 * game.level):
-            counter = 0
-            if game.state == "start" and game_started:
-                game.go_down()
+        now = time.perf_counter()
+        dt = min(now - last_time, MAX_FRAME_TIME)
+        last_time = now
         
         # 事件处理
         for event in pygame.event.get():
@@ -302,6 +298,10 @@ def main():
                 if start_btn.handle_event(event):
                     game_started = True
                     game = Tetris(GRID_HEIGHT, GRID_WIDTH)
+                    fall, shift = FallTimer(), AutoShift()
+                    history.clear()
+                    saved_pieces = None
+                    practice = False
                 continue
                 
             if event.type == pygame.KEYDOWN:
@@ -310,22 +310,35 @@ def main():
                 if event.key == pygame.K_DOWN:
                     pressing_down = True
                 if event.key == pygame.K_LEFT:
-                    game.go_side(-1)
+                    shift.press(game, -1)
                 if event.key == pygame.K_RIGHT:
-                    game.go_side(1)
+                    shift.press(game, 1)
                 if event.key == pygame.K_SPACE:
                     game.go_space()
+                if event.key in (pygame.K_z, pygame.K_BACKSPACE):
+                    # 悔棋：回到上一个方块刚出现的时候
+                    if history.rewind(game):
+                        saved_pieces = game.pieces
+                        practice = True
                 if event.key == pygame.K_ESCAPE:
                     return
             if event.type == pygame.KEYUP:
                 if event.key == pygame.K_DOWN:
                     pressing_down = False
+                if event.key == pygame.K_LEFT:
+                    shift.release(-1)
+                if event.key == pygame.K_RIGHT:
+                    shift.release(1)
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # 鼠标左键
                     game.rotate()
         
-        if pressing_down:
-            game.go_down()
+        if game_started and game.state == "start":
+            if game.pieces != saved_pieces:
+                history.save(game)
+                saved_pieces = game.pieces
+            shift.update(game, dt)
+            fall.update(game, dt, pressing_down)
         
         # 绘制背景
         screen.fill(BACKGROUND)
@@ -377,24 +390,31 @@ def main():
                                         game_top + i * CELL_SIZE,
                                         CELL_SIZE - 1, CELL_SIZE - 1])
             
-            # 绘制当前方块
+            # 绘制落点影子和当前方块
             if game.figure is not None:
-                for i in range(4):
-                    for j in range(4):
-                        if i * 4 + j in game.figure.image():
-                            pygame.draw.rect(screen, COLORS[game.figure.color],
-                                           [game_left + (j + game.figure.x) * CELL_SIZE,
-                                            game_top + (i + game.figure.y) * CELL_SIZE,
-                                            CELL_SIZE - 1, CELL_SIZE - 1])
+                ghost_y = game.drop_position()
+                for i, j in game.figure.piece().cells:
+                    pygame.draw.rect(screen, COLORS[game.figure.color],
+                                   [game_left + (j + game.figure.x) * CELL_SIZE,
+                                    game_top + (i + ghost_y) * CELL_SIZE,
+                                    CELL_SIZE - 1, CELL_SIZE - 1], 2)
+                for i, j in game.figure.piece().cells:
+                    pygame.draw.rect(screen, COLORS[game.figure.color],
+                                   [game_left + (j + game.figure.x) * CELL_SIZE,
+                                    game_top + (i + game.figure.y) * CELL_SIZE,
+                                    CELL_SIZE - 1, CELL_SIZE - 1])
             
             # 绘制分数和等级
             game_font.render_to(screen, [50, 100], f"分数: {game.score}", TEXT_COLOR)
             game_font.render_to(screen, [50, 150], f"等级: {game.level}", TEXT_COLOR)
             game_font.render_to(screen, [50, 200], f"最高分: {high_score}", TEXT_COLOR)
+            if practice:
+                small_font.render_to(screen, [50, 250], "练习模式（不计最高分）", TEXT_COLOR)
             
             # 游戏结束显示
             if game.state == "gameover":
-                scores.save_score("tetris", game.score)  # 保存最高分
+                if not practice:
+                    scores.save_score("tetris", game.score)  # 保存最高分
                 high_score = scores.load_scores()["tetris"]  # 重新加载最高分
                 game_started = False
         
@@ -402,7 +422,7 @@ def main():
         back_btn.draw(screen)
         
         pygame.display.flip()
-        clock.tick(fps)
+        clock.tick(FPS)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file